@@ -0,0 +1,63 @@
+import statistics
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from cafes.models import Cafe
+from menu.cache import bump_menu_version
+
+
+class Command(BaseCommand):
+    """Бенчмарк страницы кафе: рендер без кэша фрагментов меню и с ним"""
+    help = 'Замер времени рендера страницы кафе до и после кэширования фрагментов меню'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cafe-id', type=int, help='ID кафе (по умолчанию первое активное)')
+        parser.add_argument('--requests', type=int, default=50,
+                            help='Количество запросов в каждом режиме (по умолчанию 50)')
+
+    def handle(self, *args, **options):
+        cafe = Cafe.objects.filter(is_active=True)
+        if options['cafe_id']:
+            cafe = cafe.filter(id=options['cafe_id'])
+        cafe = cafe.first()
+        if cafe is None:
+            raise CommandError('Активное кафе не найдено')
+
+        host = next((h for h in settings.ALLOWED_HOSTS if h and '*' not in h), 'localhost')
+        client = Client(HTTP_HOST=host.lstrip('.'))
+        url = f'/cafe/{cafe.id}/'
+
+        # Прогрев: шаблоны, соединение с БД
+        client.get(url)
+
+        # "До": перед каждым запросом меняем версию меню, фрагменты не находятся в кэше
+        cold = self._measure(client, url, options['requests'], lambda: bump_menu_version(cafe.id))
+        # "После": фрагменты берутся из кэша
+        warm = self._measure(client, url, options['requests'], lambda: None)
+
+        self.stdout.write(f'Кафе: {cafe.name}, запросов в режиме: {options["requests"]}')
+        for title, (timings, queries) in (('без кэша', cold), ('с кэшем', warm)):
+            self.stdout.write(
+                f'  {title:<10} p50={statistics.median(timings) * 1000:.1f}мс '
+                f'mean={statistics.mean(timings) * 1000:.1f}мс запросов к БД={queries}'
+            )
+
+        speedup = statistics.median(cold[0]) / statistics.median(warm[0])
+        self.stdout.write(self.style.SUCCESS(f'Ускорение рендера страницы: x{speedup:.1f}'))
+
+    def _measure(self, client, url, count, before_request):
+        timings = []
+        queries = 0
+        for _ in range(count):
+            before_request()
+            with CaptureQueriesContext(connection) as context:
+                started = time.perf_counter()
+                response = client.get(url)
+                timings.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                raise CommandError(f'{url} ответил {response.status_code}')
+            queries = len(context)
+        return timings, queries
@@ -1,8 +1,14 @@
+import json
+import logging
 from django.shortcuts import render, get_object_or_404, redirect
 from django.http import JsonResponse
+from django.utils.functional import SimpleLazyObject
 from .models import Cafe
+from menu.cache import get_menu_version, MENU_FRAGMENT_TIMEOUT
 from menu.models import Category, MenuItem, MenuItemVariant, Addon, AddonGroup, MenuItemVariant, Addon, AddonGroup
 
+logger = logging.getLogger(__name__)
+
 
 def home(request):
     """Главная страница с информацией о GreatIdeas"""
@@ -28,12 +34,8 @@ def cafe_list(request):
     return render(request, 'cafes/list.html', context)
 
 
-def cafe_detail(request, cafe_id):
-    """Страница конкретного кафе с меню"""
-    cafe = get_object_or_404(Cafe, id=cafe_id, is_active=True)
-    categories = Category.objects.filter(cafe=cafe, is_active=True).order_by('order', 'name')
-    
-    # Получаем меню по категориям
+def _build_cafe_menu(cafe, categories):
+    """Меню кафе по категориям и JSON-данные позиций для JavaScript"""
     menu_by_category = {}
     menu_items_json = {}
     
@@ -44,7 +46,7 @@ def cafe_detail(request, cafe_id):
             is_active=True
         ).order_by('order', 'name').prefetch_related('variants')
         
-        if items.exists():
+        if items:
             menu_by_category[category] = items
             
             # Формируем JSON данные для JavaScript
@@ -79,6 +81,21 @@ def cafe_detail(request, cafe_id):
                     'addons': applicable_addons
                 }
     
+    return {
+        'menu_by_category': menu_by_category,
+        'menu_items_json': json.dumps(menu_items_json),
+    }
+
+
+def cafe_detail(request, cafe_id):
+    """Страница конкретного кафе с меню"""
+    cafe = get_object_or_404(Cafe, id=cafe_id, is_active=True)
+    categories = Category.objects.filter(cafe=cafe, is_active=True).order_by('order', 'name')
+    
+    # Меню строится лениво: при попадании в кэш фрагментов шаблона
+    # (ключ — кафе и версия меню) запросы к позициям не выполняются
+    menu = SimpleLazyObject(lambda: _build_cafe_menu(cafe, categories))
+    
     # Находим первое популярное блюдо
     popular_item = MenuItem.objects.filter(
         cafe=cafe, 
@@ -98,31 +115,19 @@ def cafe_detail(request, cafe_id):
         is_active=True
     ).order_by('group', 'order', 'name')
     
-    # Подсчитываем количество товаров по категориям
-    category_counts = {}
-    for category in categories:
-        items = MenuItem.objects.filter(
-            cafe=cafe, 
-            category=category, 
-            is_active=True
-        )
-        category_counts[category.id] = items.count()
-    
-    import json
-    
     # Проверяем количество всех активных кафе
     total_cafes_count = Cafe.objects.filter(is_active=True).count()
     
     context = {
         'cafe': cafe,
         'categories': categories,
-        'menu_by_category': menu_by_category,
-        'category_counts': category_counts,
+        'menu': menu,
+        'menu_version': get_menu_version(cafe.id),
+        'menu_cache_timeout': MENU_FRAGMENT_TIMEOUT,
         'popular_item': popular_item,
         'addon_groups': addon_groups,
         'addons': addons,
         'total_cafes_count': total_cafes_count,
-        'menu_items_json': json.dumps(menu_items_json),
     }
     return render(request, 'cafes/detail.html', context)
 
@@ -423,10 +428,10 @@ def _check_and_clear_paid_cart(request):
                         # Очищаем корзину
                         del request.session['cart']
                         request.session.modified = True
-                        print(f"DEBUG: Корзина очищена для пользователя {telegram_user.telegram_id} из-за оплаченного заказа")
+                        logger.info("Корзина очищена для пользователя %s из-за оплаченного заказа", telegram_user.telegram_id)
             except Exception as e:
-                print(f"DEBUG: Ошибка при проверке оплаченных заказов: {e}")
+                logger.exception("Ошибка при проверке оплаченных заказов: %s", e)
     except Exception as e:
-        print(f"DEBUG: Ошибка в _check_and_clear_paid_cart: {e}")
+        logger.exception("Ошибка в _check_and_clear_paid_cart: %s", e)
     
     return JsonResponse({'success': False})
@@ -14,3 +14,7 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'greatideas.settings')
 
 application = get_asgi_application()
+
+from greatideas.startup import check_production_configuration  # noqa: E402
+
+check_production_configuration()
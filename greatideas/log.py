@@ -0,0 +1,70 @@
+"""
+Инфраструктура логирования
+
+- RequestIdFilter добавляет в каждую запись id текущего запроса
+  (устанавливается RequestIdMiddleware), чтобы связывать строки одного запроса.
+- SamplingFilter пропускает только долю DEBUG/INFO записей горячих путей;
+  WARNING и выше проходят всегда.
+- QueueLoggingHandler кладет записи в очередь, а вывод в поток выполняет
+  отдельный поток QueueListener — запрос не ждет синхронной записи в stderr.
+"""
+import atexit
+import contextvars
+import logging
+import queue
+import random
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+_request_id = contextvars.ContextVar('request_id', default='-')
+
+
+def get_request_id() -> str:
+    """id текущего запроса ('-' вне запроса)"""
+    return _request_id.get()
+
+
+def set_request_id(request_id: str):
+    """Установить id запроса; возвращает токен для reset_request_id"""
+    return _request_id.set(request_id)
+
+
+def reset_request_id(token):
+    _request_id.reset(token)
+
+
+class RequestIdFilter(logging.Filter):
+    """Добавляет в запись атрибут request_id"""
+
+    def filter(self, record):
+        record.request_id = _request_id.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Пропускает долю rate записей ниже WARNING"""
+
+    def __init__(self, rate: float = 1.0, name: str = ''):
+        super().__init__(name)
+        self.rate = rate
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or self.rate >= 1:
+            return True
+        return random.random() < self.rate
+
+
+class QueueLoggingHandler(QueueHandler):
+    """Неблокирующий обработчик: форматирование и запись в stderr в фоновом потоке"""
+
+    def __init__(self, format: str = logging.BASIC_FORMAT, level=logging.NOTSET):
+        log_queue = queue.SimpleQueue()
+        super().__init__(log_queue)
+        self.setLevel(level)
+
+        target = logging.StreamHandler(sys.stderr)
+        target.setFormatter(logging.Formatter(format))
+        self.listener = QueueListener(log_queue, target, respect_handler_level=True)
+        self.listener.start()
+        # Дописываем оставшиеся в очереди записи при завершении процесса
+        atexit.register(self.listener.stop)
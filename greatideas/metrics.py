@@ -0,0 +1,258 @@
+"""
+Метрики производительности запросов
+
+PerformanceMetricsMiddleware для каждого запроса собирает время ответа,
+число и время SQL-запросов, время исходящих HTTP-запросов (Telegram Bot API,
+ЮKassa) и размер ответа и складывает их в гистограммы в памяти процесса с
+меткой view — имя маршрута. metrics_view отдает гистограммы в текстовом
+формате Prometheus (только персоналу или по PERF_METRICS_TOKEN).
+
+При PERF_METRICS_ENABLED=False middleware отключается при старте
+(MiddlewareNotUsed), перехватчики SQL и HTTP не устанавливаются.
+Гистограммы у каждого воркера gunicorn свои.
+"""
+import contextvars
+import hmac
+import threading
+import time
+from bisect import bisect_left
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden, Http404
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+SIZE_BUCKETS = (1_000, 10_000, 50_000, 100_000, 500_000, 1_000_000)
+
+# (имя, описание, границы корзин)
+METRICS = {
+    'request_duration': ('greatideas_request_duration_seconds', 'Время обработки запроса', TIME_BUCKETS),
+    'db_queries': ('greatideas_request_db_queries', 'Число SQL-запросов на запрос', COUNT_BUCKETS),
+    'db_duration': ('greatideas_request_db_duration_seconds', 'Время SQL-запросов на запрос', TIME_BUCKETS),
+    'http_duration': ('greatideas_request_outbound_http_duration_seconds', 'Время исходящих HTTP-запросов на запрос', TIME_BUCKETS),
+    'response_size': ('greatideas_response_size_bytes', 'Размер ответа', SIZE_BUCKETS),
+}
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами"""
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Гистограммы по метрике и имени маршрута"""
+
+    def __init__(self):
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def observe(self, view_name, values: dict):
+        with self._lock:
+            for metric, value in values.items():
+                key = (metric, view_name)
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = Histogram(METRICS[metric][2])
+                histogram.observe(value)
+
+    def render(self) -> str:
+        """Текстовый формат Prometheus"""
+        with self._lock:
+            items = sorted(self._histograms.items())
+            snapshot = [(key, list(h.counts), h.sum, h.count) for key, h in items]
+
+        lines = []
+        for metric, (name, description, buckets) in METRICS.items():
+            lines.append(f'# HELP {name} {description}')
+            lines.append(f'# TYPE {name} histogram')
+            for (key_metric, view_name), counts, total, count in snapshot:
+                if key_metric != metric:
+                    continue
+                label = f'view="{_escape_label(view_name)}"'
+                cumulative = 0
+                for bound, bucket_count in zip(buckets, counts):
+                    cumulative += bucket_count
+                    lines.append(f'{name}_bucket{{{label},le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{{label},le="+Inf"}} {count}')
+                lines.append(f'{name}_sum{{{label}}} {total}')
+                lines.append(f'{name}_count{{{label}}} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = MetricsRegistry()
+
+
+class RequestStats:
+    """Счетчики текущего запроса"""
+
+    __slots__ = ('db_queries', 'db_duration', 'http_duration')
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_duration = 0.0
+        self.http_duration = 0.0
+
+
+# Контекстная переменная наследуется потоками sync_to_async, поэтому SQL и
+# HTTP из синхронного кода async view учитываются в том же запросе
+_current_stats = contextvars.ContextVar('request_stats', default=None)
+
+
+def _db_execute_wrapper(execute, sql, params, many, context):
+    stats = _current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.db_queries += 1
+        stats.db_duration += time.perf_counter() - started
+
+
+def _install_db_wrapper(sender, connection, **kwargs):
+    if _db_execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_db_execute_wrapper)
+
+
+def _timed_send(send):
+    """Обертка синхронного send() HTTP-клиента"""
+    def wrapper(*args, **kwargs):
+        stats = _current_stats.get()
+        if stats is None:
+            return send(*args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return send(*args, **kwargs)
+        finally:
+            stats.http_duration += time.perf_counter() - started
+    wrapper.__wrapped__ = send
+    return wrapper
+
+
+def _timed_async_send(send):
+    """Обертка асинхронного send() HTTP-клиента"""
+    async def wrapper(*args, **kwargs):
+        stats = _current_stats.get()
+        if stats is None:
+            return await send(*args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return await send(*args, **kwargs)
+        finally:
+            stats.http_duration += time.perf_counter() - started
+    wrapper.__wrapped__ = send
+    return wrapper
+
+
+_instrumentation_lock = threading.Lock()
+_instrumented = False
+
+
+def install_instrumentation():
+    """Подключить учет SQL и исходящих HTTP (requests, httpx) — один раз на процесс"""
+    global _instrumented
+    with _instrumentation_lock:
+        if _instrumented:
+            return
+        _instrumented = True
+
+        from django.db import connections
+        connection_created.connect(_install_db_wrapper, dispatch_uid='greatideas_metrics_db')
+        for connection in connections.all(initialized_only=True):
+            _install_db_wrapper(None, connection)
+
+        import requests
+        requests.Session.send = _timed_send(requests.Session.send)
+
+        try:
+            import httpx
+        except ImportError:
+            return
+        httpx.Client.send = _timed_send(httpx.Client.send)
+        httpx.AsyncClient.send = _timed_async_send(httpx.AsyncClient.send)
+
+
+class PerformanceMetricsMiddleware:
+    """Сбор метрик производительности по имени маршрута"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PERF_METRICS_ENABLED:
+            raise MiddlewareNotUsed()
+        install_instrumentation()
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        stats = RequestStats()
+        token = _current_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_stats.reset(token)
+        self._record(request, response, stats, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = _current_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_stats.reset(token)
+        self._record(request, response, stats, time.perf_counter() - started)
+        return response
+
+    def _record(self, request, response, stats, duration):
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match and match.view_name else '<unresolved>'
+
+        values = {
+            'request_duration': duration,
+            'db_queries': stats.db_queries,
+            'db_duration': stats.db_duration,
+            'http_duration': stats.http_duration,
+        }
+        if not response.streaming:
+            values['response_size'] = len(response.content)
+        registry.observe(view_name, values)
+
+
+def metrics_view(request):
+    """Метрики в формате Prometheus (персонал или Bearer PERF_METRICS_TOKEN)"""
+    if not settings.PERF_METRICS_ENABLED:
+        raise Http404()
+
+    token = settings.PERF_METRICS_TOKEN
+    authorization = request.headers.get('Authorization', '')
+    has_token = bool(token) and hmac.compare_digest(authorization, f'Bearer {token}')
+    if not has_token and not (request.user.is_authenticated and request.user.is_staff):
+        return HttpResponseForbidden()
+
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
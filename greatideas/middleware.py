@@ -0,0 +1,56 @@
+"""
+Общие middleware проекта
+"""
+import re
+import uuid
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from greatideas.log import set_request_id, reset_request_id
+
+# Допустимый id запроса из заголовка (например, $request_id от nginx)
+REQUEST_ID_RE = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+
+class RequestIdMiddleware:
+    """
+    Присваивает запросу correlation id
+
+    Берет X-Request-ID от прокси или генерирует новый, делает его доступным
+    логированию (greatideas.log.RequestIdFilter) и возвращает в ответе.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def _get_request_id(self, request):
+        request_id = request.headers.get('X-Request-ID', '')
+        if not REQUEST_ID_RE.match(request_id):
+            request_id = uuid.uuid4().hex
+        request.request_id = request_id
+        return request_id
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        request_id = self._get_request_id(request)
+        token = set_request_id(request_id)
+        try:
+            response = self.get_response(request)
+        finally:
+            reset_request_id(token)
+        response['X-Request-ID'] = request_id
+        return response
+
+    async def __acall__(self, request):
+        request_id = self._get_request_id(request)
+        token = set_request_id(request_id)
+        try:
+            response = await self.get_response(request)
+        finally:
+            reset_request_id(token)
+        response['X-Request-ID'] = request_id
+        return response
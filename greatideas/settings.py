@@ -70,6 +70,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'greatideas.middleware.RequestIdMiddleware',
+    'greatideas.metrics.PerformanceMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -127,6 +129,19 @@ else:
     }
 
 
+# Cache
+# Кэш фрагментов шаблонов и версий меню. По умолчанию — память процесса;
+# при DEBUG=False нужен общий для воркеров gunicorn бэкенд (иначе проверка
+# greatideas.startup останавливает запуск), например
+# django.core.cache.backends.filebased.FileBasedCache + /var/tmp/greatideas_cache
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'greatideas'),
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -192,6 +207,11 @@ TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN', '')
 TELEGRAM_BOT_USERNAME = os.getenv('TELEGRAM_BOT_USERNAME', '')
 TELEGRAM_WEBHOOK_URL = os.getenv('TELEGRAM_WEBHOOK_URL', '')
 
+# Режим получения обновлений ботами: 'polling' (отдельные процессы run_bot/run_staff_bot)
+# или 'webhook' (обновления принимает ASGI-приложение, см. telegram_bot.webhook)
+TELEGRAM_BOT_MODE = os.getenv('TELEGRAM_BOT_MODE', 'polling')
+TELEGRAM_WEBHOOK_SECRET = os.getenv('TELEGRAM_WEBHOOK_SECRET', '')
+
 # Staff Notification Bot Settings
 STAFF_BOT_TOKEN = os.getenv('STAFF_BOT_TOKEN', '8144320612:AAGjo3B_V8R2cNCM0Iktqd_Ow7qk2E2GJD8')
 STAFF_CHAT_ID = os.getenv('STAFF_CHAT_ID', '-1003165131771')  # ID чата/группы для уведомлений персонала
@@ -201,6 +221,49 @@ PAYMENT_PROVIDER_TOKEN = os.getenv('PAYMENT_PROVIDER_TOKEN', '')
 YOOKASSA_SECRET_KEY = os.getenv('YOOKASSA_SECRET_KEY', '')
 YOOKASSA_SHOP_ID = os.getenv('YOOKASSA_SHOP_ID', '1164804')  # Правильный Shop ID
 
+# Logging
+# Записи выводятся в stderr фоновым потоком (greatideas.log.QueueLoggingHandler),
+# каждая строка содержит id запроса. DEBUG/INFO горячих путей (оформление
+# заказа, корзина) пропускаются с долей LOG_SAMPLE_RATE
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'request_id': {
+            '()': 'greatideas.log.RequestIdFilter',
+        },
+        'hot_path_sampling': {
+            '()': 'greatideas.log.SamplingFilter',
+            'rate': float(os.getenv('LOG_SAMPLE_RATE', '0.1')),
+        },
+    },
+    'handlers': {
+        'queue': {
+            '()': 'greatideas.log.QueueLoggingHandler',
+            'format': '%(asctime)s %(levelname)s %(name)s [request_id=%(request_id)s] %(message)s',
+            'filters': ['request_id'],
+        },
+    },
+    'root': {
+        'handlers': ['queue'],
+        'level': os.getenv('LOG_LEVEL', 'INFO'),
+    },
+    'loggers': {
+        'orders.telegram_payments': {
+            'filters': ['hot_path_sampling'],
+        },
+        'cafes.views': {
+            'filters': ['hot_path_sampling'],
+        },
+    },
+}
+
+# Метрики производительности запросов (greatideas.metrics, эндпоинт /metrics/)
+PERF_METRICS_ENABLED = os.getenv('PERF_METRICS_ENABLED', 'False').lower() == 'true'
+# Токен для сборщика Prometheus (заголовок Authorization: Bearer <токен>);
+# без токена метрики доступны только персоналу
+PERF_METRICS_TOKEN = os.getenv('PERF_METRICS_TOKEN', '')
+
 # Celery Configuration (for async tasks)
 CELERY_BROKER_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
@@ -0,0 +1,47 @@
+"""
+Настройки продакшена
+
+Использование: DJANGO_SETTINGS_MODULE=greatideas.settings_production
+(см. gunicorn.service). Все значения берутся из greatideas.settings и .env,
+здесь переопределяется только то, что не должно зависеть от окружения.
+"""
+import os
+
+from .settings import *  # noqa: F401,F403
+
+DEBUG = False
+
+# Кэш общий для всех воркеров gunicorn: версии кэшей хранятся без срока
+# жизни, и с кэшем в памяти процесса запуск остановит greatideas.startup.
+# CACHE_BACKEND/CACHE_LOCATION из .env имеют приоритет
+if not os.getenv('CACHE_BACKEND'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.getenv('CACHE_LOCATION', '/var/tmp/greatideas_cache'),
+        }
+    }
+
+# Отладочные приложения не должны попадать в продакшен, даже если их
+# добавили в базовые настройки для локальной разработки
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app != 'debug_toolbar']
+MIDDLEWARE = [m for m in MIDDLEWARE if not m.startswith('debug_toolbar.')]
+
+# Шаблоны разбираются с диска один раз на процесс и дальше берутся из памяти.
+# При явном списке loaders APP_DIRS должен быть выключен
+TEMPLATES = [
+    {
+        **TEMPLATES[0],
+        'APP_DIRS': False,
+        'OPTIONS': {
+            **TEMPLATES[0]['OPTIONS'],
+            'debug': False,
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
+        },
+    },
+]
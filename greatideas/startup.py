@@ -0,0 +1,64 @@
+"""
+Проверки конфигурации при старте процесса приложения (wsgi/asgi)
+"""
+import logging
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+logger = logging.getLogger(__name__)
+
+
+def get_reparsing_template_engines():
+    """Имена движков Django-шаблонов, которые перечитывают шаблоны с диска на каждый рендер"""
+    from django.template import engines
+    from django.template.backends.django import DjangoTemplates
+    from django.template.loaders.cached import Loader as CachedLoader
+
+    reparsing = []
+    for engine in engines.all():
+        if not isinstance(engine, DjangoTemplates):
+            continue
+        loaders = engine.engine.template_loaders
+        if not loaders or not all(isinstance(loader, CachedLoader) for loader in loaders):
+            reparsing.append(engine.name)
+    return reparsing
+
+
+def get_process_local_caches():
+    """Алиасы кэшей с бэкендом в памяти процесса (не общие для воркеров gunicorn)"""
+    from django.core.cache import caches
+    from django.core.cache.backends.locmem import LocMemCache
+
+    return [alias for alias in settings.CACHES if isinstance(caches[alias], LocMemCache)]
+
+
+def check_production_configuration():
+    """
+    Проверить настройки боевого процесса
+
+    Недопустимые, но безопасные настройки пишутся в лог предупреждением.
+    Кэш в памяти процесса при DEBUG=False останавливает запуск: версии
+    кэшей (меню, каталог событий игры) хранятся без срока жизни, и смена
+    версии в одном воркере не видна остальным — они бесконечно отдают
+    устаревшие данные и 304 по старому ETag.
+    """
+    local_caches = get_process_local_caches()
+    if local_caches and not settings.DEBUG:
+        raise ImproperlyConfigured(
+            f"Кэш в памяти процесса (LocMemCache) недопустим при DEBUG=False: {', '.join(local_caches)}. "
+            f"Укажите общий бэкенд в CACHE_BACKEND, например "
+            f"django.core.cache.backends.filebased.FileBasedCache"
+        )
+
+    if settings.DEBUG:
+        logger.warning(
+            "Приложение запущено с DEBUG=True. Для продакшена используйте "
+            "DJANGO_SETTINGS_MODULE=greatideas.settings_production"
+        )
+
+    reparsing = get_reparsing_template_engines()
+    if reparsing:
+        logger.warning(
+            f"Шаблоны перечитываются с диска при каждом рендере (движки: {', '.join(reparsing)}). "
+            f"Включите django.template.loaders.cached.Loader"
+        )
@@ -18,6 +18,7 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from greatideas.metrics import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -27,6 +28,8 @@ urlpatterns = [
     path('orders/', include('orders.tracking_urls')),
     path('payments/', include('payments.urls')),
     path('game/', include('startup_game.urls')),
+    path('telegram/', include('telegram_bot.urls')),
+    path('metrics/', metrics_view, name='metrics'),
 ]
 
 # Для обслуживания медиа файлов в режиме разработки
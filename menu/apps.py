@@ -4,3 +4,16 @@ from django.apps import AppConfig
 class MenuConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'menu'
+
+    def ready(self):
+        from django.db.models.signals import post_save, post_delete, m2m_changed
+        from menu.cache import bump_menu_version_for_instance
+        from menu.models import Category, MenuItem, MenuItemVariant, Addon, AddonGroup
+
+        # Смена версии меню для кэша фрагментов страницы кафе
+        for model in (Category, MenuItem, MenuItemVariant, Addon, AddonGroup):
+            post_save.connect(bump_menu_version_for_instance, sender=model, dispatch_uid=f'menu_version_save_{model.__name__}')
+            post_delete.connect(bump_menu_version_for_instance, sender=model, dispatch_uid=f'menu_version_delete_{model.__name__}')
+
+        for through in (Addon.menu_items.through, Addon.categories.through):
+            m2m_changed.connect(bump_menu_version_for_instance, sender=through, dispatch_uid=f'menu_version_m2m_{through.__name__}')
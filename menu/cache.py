@@ -0,0 +1,52 @@
+"""
+Версия меню кафе для кэширования фрагментов шаблонов
+
+Версия хранится в кэше Django и меняется при любом изменении категорий,
+позиций, вариантов и добавок кафе (сигналы подключаются в MenuConfig.ready).
+Версия входит в ключ {% cache %}, поэтому после правки меню старые фрагменты
+просто перестают использоваться. При нескольких процессах (gunicorn) нужен
+общий бэкенд кэша (CACHE_BACKEND в .env), иначе другие процессы увидят
+изменения только после истечения MENU_FRAGMENT_TIMEOUT.
+"""
+import time
+from django.core.cache import cache
+
+# Время жизни кэшированных фрагментов меню, секунд
+MENU_FRAGMENT_TIMEOUT = 300
+
+
+def _version_key(cafe_id) -> str:
+    return f"menu_version:{cafe_id}"
+
+
+def get_menu_version(cafe_id) -> int:
+    """Текущая версия меню кафе"""
+    version = cache.get(_version_key(cafe_id))
+    if version is None:
+        version = bump_menu_version(cafe_id)
+    return version
+
+
+def bump_menu_version(cafe_id) -> int:
+    """Сменить версию меню кафе (инвалидирует кэшированные фрагменты)"""
+    version = time.time_ns()
+    cache.set(_version_key(cafe_id), version, None)
+    return version
+
+
+def _cafe_id_for(instance):
+    """id кафе, к меню которого относится объект"""
+    if hasattr(instance, 'cafe_id'):
+        return instance.cafe_id
+    # MenuItemVariant связан с кафе через позицию меню
+    from menu.models import MenuItem
+    return MenuItem.objects.filter(id=instance.menu_item_id).values_list('cafe_id', flat=True).first()
+
+
+def bump_menu_version_for_instance(sender, instance, **kwargs):
+    """Обработчик post_save/post_delete/m2m_changed моделей меню"""
+    if kwargs.get('action', 'post_').startswith('pre_'):
+        return
+    cafe_id = _cafe_id_for(instance)
+    if cafe_id is not None:
+        bump_menu_version(cafe_id)
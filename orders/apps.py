@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class OrdersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'orders'
+
+    def ready(self):
+        from orders.signals import order_status_changed
+        from orders.status_notifications import notify_customer_on_status_change
+        from orders.tracking_events import publish_status_change
+
+        order_status_changed.connect(notify_customer_on_status_change, dispatch_uid='orders_notify_customer')
+        order_status_changed.connect(publish_status_change, dispatch_uid='orders_publish_status')
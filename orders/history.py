@@ -0,0 +1,55 @@
+"""
+История заказов пользователя с keyset-пагинацией
+
+Страницы выбираются по курсору (created_at, id) последнего показанного
+заказа, а не через OFFSET, поэтому стоимость каждой страницы не зависит от
+того, сколько заказов у пользователя уже было. Кафе, позиции и добавки
+загружаются фиксированным числом запросов на страницу.
+"""
+import base64
+from datetime import datetime
+from django.db.models import Q
+from orders.models import Order
+
+ORDER_HISTORY_PAGE_SIZE = 20
+
+
+def encode_cursor(order) -> str:
+    """Курсор, указывающий на заказ (последний на странице)"""
+    raw = f"{order.created_at.isoformat()}|{order.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    """Разобрать курсор в (created_at, id); ValueError при неверном формате"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, order_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(order_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Неверный курсор: {cursor}") from e
+
+
+def order_history_queryset(telegram_user):
+    """Заказы пользователя в порядке истории с загруженными связями"""
+    return Order.objects.with_details().filter(user=telegram_user).order_by('-created_at', '-id')
+
+
+def get_order_history_page(telegram_user, cursor: str = None, limit: int = ORDER_HISTORY_PAGE_SIZE):
+    """
+    Страница истории заказов
+
+    Returns:
+        (список заказов, курсор следующей страницы или None)
+    """
+    queryset = order_history_queryset(telegram_user)
+    if cursor:
+        created_at, order_id = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=order_id)
+        )
+
+    # Берем на один заказ больше, чтобы узнать, есть ли следующая страница
+    orders = list(queryset[:limit + 1])
+    next_cursor = encode_cursor(orders[limit - 1]) if len(orders) > limit else None
+    return orders[:limit], next_cursor
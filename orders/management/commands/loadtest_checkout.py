@@ -0,0 +1,318 @@
+"""
+Нагрузочный сценарий оформления заказа (end-to-end)
+
+Каждый виртуальный пользователь проходит путь:
+    login → cafe_detail → add_to_cart → cart → create-payment → webhook ЮKassa
+
+Запросы выполняются через Django test Client внутри процессов-воркеров
+(по умолчанию 3 — как в нашей конфигурации gunicorn), внешние сервисы
+(Telegram Bot API, отправка инвойса) подменяются локальными заглушками.
+Для каждого шага считаются пропускная способность, перцентили задержки
+и количество SQL-запросов. Результат сравнивается с базовой линией
+loadtest_checkout_baseline.json, чтобы ловить регрессии производительности;
+любая ошибка на шаге сценария считается регрессией.
+"""
+import hashlib
+import hmac
+import json
+import multiprocessing
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+
+BASELINE_PATH = Path(__file__).with_name('loadtest_checkout_baseline.json')
+
+# Синтетические пользователи получают telegram_id из отдельного диапазона,
+# чтобы их можно было безопасно удалить после прогона
+SYNTHETIC_TELEGRAM_ID_BASE = 9_000_000_000
+
+STEPS = ['login', 'cafe_detail', 'add_to_cart', 'cart', 'create_payment', 'webhook']
+
+
+def build_init_data(bot_token, telegram_id):
+    """Сформировать подписанную строку initData Telegram Web App"""
+    user = json.dumps({
+        'id': telegram_id,
+        'first_name': 'Load',
+        'last_name': f'Test {telegram_id}',
+        'username': f'loadtest_{telegram_id}',
+        'language_code': 'ru',
+    }, separators=(',', ':'))
+    fields = {
+        'auth_date': str(int(time.time())),
+        'query_id': f'loadtest{telegram_id}',
+        'user': user,
+    }
+    data_check_string = '\n'.join(f"{key}={value}" for key, value in sorted(fields.items()))
+    secret_key = hmac.new(b"WebAppData", bot_token.encode('utf-8'), hashlib.sha256).digest()
+    fields['hash'] = hmac.new(secret_key, data_check_string.encode('utf-8'), hashlib.sha256).hexdigest()
+    return urllib.parse.urlencode(fields)
+
+
+class _StandInResponse:
+    """Ответ локальной заглушки Telegram Bot API"""
+    status_code = 200
+
+    def json(self):
+        return {'ok': True, 'result': {'message_id': 1}}
+
+
+def _stand_in_post(*args, **kwargs):
+    return _StandInResponse()
+
+
+@contextmanager
+def _stand_ins():
+    """Локальные заглушки рабочих часов, инвойса и Telegram Bot API"""
+    with mock.patch('orders.api_views.is_working_hours', return_value=True), \
+            mock.patch('orders.api_views.send_invoice_sync'), \
+            mock.patch('requests.post', side_effect=_stand_in_post):
+        yield
+
+
+def _run_scenarios(telegram_ids, cafe_id, menu_item_id):
+    """Прогнать сценарий для набора пользователей (выполняется в воркере)"""
+    from payments.models import Payment
+
+    connections.close_all()
+    samples = []
+    host = next((host for host in settings.ALLOWED_HOSTS if host and host != '*' and not host.startswith('.')), 'localhost')
+
+    def timed(step, client, method, path, **kwargs):
+        with CaptureQueriesContext(connection) as queries:
+            # monotonic-часы общие для всех процессов машины: окна шагов сравнимы между воркерами
+            started = time.monotonic()
+            response = getattr(client, method)(path, **kwargs)
+            finished = time.monotonic()
+        samples.append({
+            'step': step,
+            'started': started,
+            'finished': finished,
+            'seconds': finished - started,
+            'queries': len(queries),
+            'ok': response.status_code < 400,
+        })
+        return response
+
+    for telegram_id in telegram_ids:
+        client = Client(raise_request_exception=False, HTTP_HOST=host)
+        init_data = build_init_data(settings.TELEGRAM_BOT_TOKEN, telegram_id)
+
+        timed('login', client, 'post', '/users/telegram-auth/',
+              data=json.dumps({'initData': init_data}), content_type='application/json')
+        timed('cafe_detail', client, 'get', f'/cafe/{cafe_id}/')
+        timed('add_to_cart', client, 'post', '/add-to-cart/',
+              data=json.dumps({'item_id': menu_item_id, 'quantity': 2}),
+              content_type='application/json')
+        timed('cart', client, 'get', '/cart/')
+
+        cart_data = {
+            cart_key: {'quantity': item['quantity']}
+            for cart_key, item in client.session.get('cart', {}).items()
+        }
+        response = timed('create_payment', client, 'post', '/api/orders/create-payment/',
+                         data=json.dumps({
+                             'telegram_id': telegram_id,
+                             'cart_data': cart_data,
+                             'workspace_number': 1 + telegram_id % 30,
+                         }),
+                         content_type='application/json')
+        if response.status_code != 200:
+            continue
+
+        payment = Payment.objects.only('invoice_payload').get(id=response.json()['payment_id'])
+        timed('webhook', client, 'post', '/payments/yookassa/webhook/',
+              data=json.dumps({
+                  'type': 'notification',
+                  'event': 'payment.succeeded',
+                  'object': {
+                      'id': f'loadtest-{telegram_id}',
+                      'status': 'succeeded',
+                      'amount': {'value': '0.00', 'currency': 'RUB'},
+                      'metadata': {'invoice_payload': payment.invoice_payload},
+                  },
+              }),
+              content_type='application/json')
+
+    connections.close_all()
+    return samples
+
+
+def _percentile(sorted_values, percent):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(percent / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class Command(BaseCommand):
+    help = 'Нагрузочный сценарий оформления заказа с отчетом по задержкам и SQL-запросам'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=60,
+                            help='Количество виртуальных пользователей (сценариев)')
+        parser.add_argument('--workers', type=int, default=3,
+                            help='Количество параллельных воркеров (как у gunicorn)')
+        parser.add_argument('--cafe-id', type=int, help='ID кафе (по умолчанию первое активное)')
+        parser.add_argument('--tolerance', type=float, default=0.5,
+                            help='Допустимое ухудшение задержки/пропускной способности относительно базовой линии')
+        parser.add_argument('--save-baseline', action='store_true',
+                            help='Сохранить результат прогона как новую базовую линию')
+        parser.add_argument('--keep-data', action='store_true',
+                            help='Не удалять синтетических пользователей и заказы после прогона')
+        parser.add_argument('--force', action='store_true',
+                            help='Разрешить запуск при DEBUG=False')
+
+    def handle(self, *args, **options):
+        from cafes.models import Cafe
+        from menu.models import MenuItem
+
+        if not settings.DEBUG and not options['force']:
+            raise CommandError('Сценарий создает заказы в базе данных. Для запуска при DEBUG=False используйте --force')
+        if not settings.TELEGRAM_BOT_TOKEN:
+            raise CommandError('TELEGRAM_BOT_TOKEN нужен для подписи синтетического initData')
+
+        cafes = Cafe.objects.filter(is_active=True)
+        if options['cafe_id']:
+            cafes = cafes.filter(id=options['cafe_id'])
+        cafe = cafes.first()
+        if not cafe:
+            raise CommandError('Не найдено активное кафе')
+        menu_item = MenuItem.objects.filter(cafe=cafe, is_active=True).first()
+        if not menu_item:
+            raise CommandError(f'В кафе {cafe.name} нет активных позиций меню')
+
+        workers = max(1, options['workers'])
+        first_id = SYNTHETIC_TELEGRAM_ID_BASE + int(time.time()) % 1_000_000 * 1000
+        telegram_ids = [first_id + n for n in range(options['users'])]
+        chunks = [telegram_ids[n::workers] for n in range(workers)]
+
+        self.stdout.write(
+            f"Кафе: {cafe.name}, позиция: {menu_item.name}, "
+            f"пользователей: {len(telegram_ids)}, воркеров: {workers}"
+        )
+
+        # Заглушки для ЮKassa и персонала должны работать и без реальных ключей
+        with override_settings(
+            YOOKASSA_SECRET_KEY=settings.YOOKASSA_SECRET_KEY or 'loadtest',
+            PAYMENT_PROVIDER_TOKEN=settings.PAYMENT_PROVIDER_TOKEN or 'loadtest',
+        ):
+            connections.close_all()
+            started = time.perf_counter()
+            # Заглушки ставятся один раз до запуска воркеров: форкнутые процессы наследуют
+            # их, а потоки не патчат общие модули процесса одновременно
+            with _stand_ins():
+                results = self._run_workers(workers, chunks, cafe.id, menu_item.id)
+            wall_time = time.perf_counter() - started
+
+        samples = [sample for worker_samples in results for sample in worker_samples]
+        report = self._build_report(samples, wall_time)
+        self._print_report(report, wall_time)
+
+        if not options['keep_data']:
+            self._cleanup(telegram_ids)
+
+        if options['save_baseline']:
+            failed = [step for step, row in report.items() if row['errors']]
+            if failed:
+                raise CommandError(f"Прогон с ошибками нельзя сохранить как базовую линию: {', '.join(failed)}")
+            baseline = {
+                'description': (
+                    f"{workers} воркера(ов), {len(telegram_ids)} пользователей, "
+                    f"БД {connection.vendor}"
+                ),
+                'steps': report,
+            }
+            BASELINE_PATH.write_text(json.dumps(baseline, ensure_ascii=False, indent=2) + '\n', encoding='utf-8')
+            self.stdout.write(self.style.SUCCESS(f'Базовая линия сохранена в {BASELINE_PATH.name}'))
+            return
+
+        self._compare_with_baseline(report, options['tolerance'])
+
+    def _run_workers(self, workers, chunks, cafe_id, menu_item_id):
+        if 'fork' in multiprocessing.get_all_start_methods():
+            with multiprocessing.get_context('fork').Pool(workers) as pool:
+                return pool.starmap(_run_scenarios, [(chunk, cafe_id, menu_item_id) for chunk in chunks])
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(lambda chunk: _run_scenarios(chunk, cafe_id, menu_item_id), chunks))
+
+    def _build_report(self, samples, wall_time):
+        report = {}
+        for step in STEPS:
+            step_samples = [sample for sample in samples if sample['step'] == step]
+            if not step_samples:
+                continue
+            latencies = sorted(sample['seconds'] * 1000 for sample in step_samples)
+            # Пропускная способность шага — по его собственному окну: от начала первого
+            # запроса шага до конца последнего
+            window = max(sample['finished'] for sample in step_samples) - min(sample['started'] for sample in step_samples)
+            window = window or wall_time
+            queries = sorted(sample['queries'] for sample in step_samples)
+            report[step] = {
+                'requests': len(step_samples),
+                'errors': sum(1 for sample in step_samples if not sample['ok']),
+                'throughput_rps': round(len(step_samples) / window, 2),
+                'p50_ms': round(_percentile(latencies, 50), 2),
+                'p95_ms': round(_percentile(latencies, 95), 2),
+                'p99_ms': round(_percentile(latencies, 99), 2),
+                'queries_mean': round(sum(queries) / len(queries), 2),
+                'queries_p50': _percentile(queries, 50),
+                'queries_max': max(queries),
+            }
+        return report
+
+    def _print_report(self, report, wall_time):
+        header = f"{'шаг':<16}{'запр.':>7}{'ошиб.':>7}{'rps':>9}{'p50 мс':>10}{'p95 мс':>10}{'p99 мс':>10}{'SQL ср.':>9}{'SQL max':>9}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for step, row in report.items():
+            self.stdout.write(
+                f"{step:<16}{row['requests']:>7}{row['errors']:>7}{row['throughput_rps']:>9}"
+                f"{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}"
+                f"{row['queries_mean']:>9}{row['queries_max']:>9}"
+            )
+        self.stdout.write(f"Общее время: {wall_time:.2f} с")
+
+    def _compare_with_baseline(self, report, tolerance):
+        if not BASELINE_PATH.exists():
+            self.stdout.write(self.style.WARNING('Базовая линия не найдена, сравнение пропущено'))
+            return
+
+        baseline = json.loads(BASELINE_PATH.read_text(encoding='utf-8'))['steps']
+        regressions = []
+        for step, expected in baseline.items():
+            actual = report.get(step)
+            if not actual:
+                regressions.append(f"{step}: шаг не выполнялся")
+                continue
+            if actual['errors']:
+                regressions.append(f"{step}: ошибок {actual['errors']} из {actual['requests']}")
+            # Повторы сохранения заказа при совпадении номера зависят от конкуренции
+            # воркеров и увеличивают максимум, поэтому бюджет SQL сравнивается по медиане
+            if actual['queries_p50'] > expected['queries_p50']:
+                regressions.append(f"{step}: SQL-запросов {actual['queries_p50']} (было {expected['queries_p50']})")
+            if actual['p95_ms'] > expected['p95_ms'] * (1 + tolerance):
+                regressions.append(f"{step}: p95 {actual['p95_ms']} мс (было {expected['p95_ms']} мс)")
+            if actual['throughput_rps'] < expected['throughput_rps'] * (1 - tolerance):
+                regressions.append(f"{step}: {actual['throughput_rps']} rps (было {expected['throughput_rps']} rps)")
+
+        if regressions:
+            raise CommandError('Регрессия производительности:\n' + '\n'.join(regressions))
+        self.stdout.write(self.style.SUCCESS('Результаты в пределах базовой линии'))
+
+    def _cleanup(self, telegram_ids):
+        """Удалить синтетических пользователей вместе с их заказами и платежами"""
+        from django.contrib.auth.models import User
+        from users.models import TelegramUser
+
+        TelegramUser.objects.filter(telegram_id__in=telegram_ids).delete()
+        User.objects.filter(username__in=[f"tg_{telegram_id}" for telegram_id in telegram_ids]).delete()
@@ -80,6 +80,13 @@ class Command(BaseCommand):
     help = 'Запуск Staff Bot для уведомлений персонала'
     
     def handle(self, *args, **options):
+        from telegram_bot.webhook import is_webhook_mode
+        if is_webhook_mode():
+            self.stdout.write(self.style.WARNING(
+                'TELEGRAM_BOT_MODE=webhook: обновления принимает ASGI-приложение, polling не запускается'
+            ))
+            return
+        
         try:
             self.stdout.write("Запуск Staff Bot...")
             bot = StaffBot()
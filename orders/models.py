@@ -1,8 +1,43 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import Prefetch, prefetch_related_objects
 from django.utils import timezone
 from cafes.models import Cafe
 from menu.models import MenuItem, MenuItemVariant, Addon
 from users.models import TelegramUser
+from orders.signals import order_status_changed
+
+# Попыток сохранить заказ при совпадении номера с параллельным заказом
+ORDER_NUMBER_ATTEMPTS = 5
+
+# Статус не загружен из БД (отложен через only()/defer()) — смену не определить
+STATUS_NOT_LOADED = object()
+
+
+def order_items_prefetch():
+    """Prefetch позиций заказа с товарами, вариантами и добавками"""
+    return Prefetch(
+        'items',
+        queryset=OrderItem.objects.select_related('menu_item', 'variant').prefetch_related(
+            Prefetch('selected_addons', queryset=OrderItemAddon.objects.select_related('addon'))
+        ),
+    )
+
+
+def prefetch_order_details(order):
+    """
+    Догрузить в уже полученный заказ кафе, позиции, варианты и добавки
+    
+    Не более 3 запросов вместо N×4 при обходе order.items.all() и добавок.
+    Возвращает тот же объект заказа.
+    """
+    prefetch_related_objects([order], 'cafe', order_items_prefetch())
+    return order
+
+
+class OrderQuerySet(models.QuerySet):
+    def with_details(self):
+        """Заказы с кафе, позициями, вариантами и добавками"""
+        return self.select_related('cafe').prefetch_related(order_items_prefetch())
 
 
 class Order(models.Model):
@@ -57,30 +92,76 @@ class Order(models.Model):
     staff_notification_sent = models.BooleanField(default=False, verbose_name="Уведомление персонала отправлено")
     staff_message_id = models.IntegerField(null=True, blank=True, verbose_name="ID сообщения в чате персонала")
     
+    objects = OrderQuerySet.as_manager()
+    
     class Meta:
         verbose_name = "Заказ"
         verbose_name_plural = "Заказы"
         ordering = ['-created_at']
+        indexes = [
+            # История заказов пользователя (keyset-пагинация, orders.history)
+            models.Index(fields=['user', '-created_at', '-id'], name='orders_order_user_hist_idx'),
+        ]
     
     def __str__(self):
         return f"Заказ #{self.order_number} - {self.cafe.name}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Запоминаем статус из БД, чтобы save() мог определить смену статуса
+        instance._loaded_status = instance.__dict__.get('status', STATUS_NOT_LOADED)
+        return instance
+    
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        # Статус перечитан из БД (в том числе отложенный — при первом обращении к полю)
+        if (fields is None or 'status' in fields) and 'status' not in self.get_deferred_fields():
+            self._loaded_status = self.status
+    
     def save(self, *args, **kwargs):
-        if not self.order_number:
-            # Генерируем номер заказа
-            today = timezone.now().strftime('%Y%m%d')
-            last_order = Order.objects.filter(
-                created_at__date=timezone.now().date()
-            ).order_by('-id').first()
-            
-            if last_order and last_order.order_number.startswith(today):
-                sequence = int(last_order.order_number[-3:]) + 1
-            else:
-                sequence = 1
-            
-            self.order_number = f"{today}{sequence:03d}"
+        if self.order_number:
+            super().save(*args, **kwargs)
+        else:
+            self._save_with_order_number(*args, **kwargs)
         
-        super().save(*args, **kwargs)
+        old_status = getattr(self, '_loaded_status', None)
+        if old_status is STATUS_NOT_LOADED:
+            return
+        update_fields = kwargs.get('update_fields')
+        if self.status != old_status and (update_fields is None or 'status' in update_fields):
+            self._loaded_status = self.status
+            order_status_changed.send(
+                sender=Order, order=self, old_status=old_status, new_status=self.status
+            )
+    
+    def _next_order_number(self):
+        """Следующий номер заказа за сегодня"""
+        today = timezone.now().strftime('%Y%m%d')
+        last_order = Order.objects.filter(
+            created_at__date=timezone.now().date()
+        ).order_by('-id').first()
+        
+        if last_order and last_order.order_number.startswith(today):
+            sequence = int(last_order.order_number[-3:]) + 1
+        else:
+            sequence = 1
+        
+        return f"{today}{sequence:03d}"
+    
+    def _save_with_order_number(self, *args, **kwargs):
+        """Сохранить новый заказ, повторив попытку, если номер занял параллельный заказ"""
+        for attempt in range(ORDER_NUMBER_ATTEMPTS):
+            self.order_number = self._next_order_number()
+            try:
+                with transaction.atomic():
+                    super().save(*args, **kwargs)
+                return
+            except IntegrityError:
+                taken = Order.objects.filter(order_number=self.order_number).exists()
+                self.order_number = ''
+                if not taken or attempt == ORDER_NUMBER_ATTEMPTS - 1:
+                    raise
 
 
 class OrderItem(models.Model):
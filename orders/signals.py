@@ -0,0 +1,8 @@
+"""
+Сигналы заказов
+"""
+from django.dispatch import Signal
+
+# Отправляется после сохранения заказа с изменившимся статусом.
+# Аргументы: order, old_status (None, если прежний статус неизвестен), new_status
+order_status_changed = Signal()
@@ -8,6 +8,7 @@ from django.conf import settings
 from telegram import Bot, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.error import TelegramError
 from asgiref.sync import sync_to_async
+from orders.models import prefetch_order_details
 
 logger = logging.getLogger(__name__)
 
@@ -130,64 +131,21 @@ class StaffNotificationService:
     
     async def _format_order_message(self, order) -> str:
         """Форматировать сообщение с информацией о заказе"""
-        
-        # Получаем позиции заказа
-        items_text = ""
-        items = await sync_to_async(lambda: list(order.items.all()))()
-        
-        for order_item in items:
-            item_text = f"• {order_item.menu_item.name}"
-            
-            if order_item.variant:
-                item_text += f" ({order_item.variant.name})"
-            
-            if order_item.quantity > 1:
-                item_text += f" x{order_item.quantity}"
-            
-            # Проверяем есть ли добавки
-            if await sync_to_async(order_item.selected_addons.exists)():
-                addons = await sync_to_async(lambda: list(order_item.selected_addons.all()))()
-                addon_names = [addon.addon.name for addon in addons]
-                item_text += f" + {', '.join(addon_names)}"
-            
-            item_text += f" - {order_item.total_price} ₽"
-            items_text += item_text + "\n"
-        
-        # Определяем тип получения
-        delivery_type = "🏃 Самовывоз" if order.delivery_type == 'pickup' else "🚚 Доставка"
-        
-        message_text = f"""
-🆕 *НОВЫЙ ЗАКАЗ #{order.order_number}*
-
-🏪 *Кафе:* {order.cafe.name}
-👤 *Клиент:* {order.customer_name}
-📞 *Телефон:* {order.customer_phone}
-📍 *Рабочее место:* №{order.workspace_number}
-{delivery_type}
-
-📋 *Состав заказа:*
-{items_text}
-💰 *Общая сумма:* {order.total_amount} ₽
-
-⏰ *Время заказа:* {order.created_at.strftime('%H:%M')}
-"""
-        
-        if order.delivery_type == 'delivery' and order.delivery_address:
-            message_text += f"📍 *Адрес доставки:* {order.delivery_address}\n"
-        
-        if order.comment:
-            message_text += f"💬 *Комментарий:* {order.comment}\n"
-        
-        return message_text.strip()
+        await sync_to_async(prefetch_order_details)(order)
+        return self._render_order_message(order)
     
     def _format_order_message_sync(self, order) -> str:
         """Синхронная версия форматирования сообщения с информацией о заказе"""
+        prefetch_order_details(order)
+        return self._render_order_message(order)
+    
+    def _render_order_message(self, order) -> str:
+        """Текст уведомления по заказу с предзагруженными позициями (без запросов к БД)"""
         
         # Получаем позиции заказа
         items_text = ""
-        items = list(order.items.all())
         
-        for order_item in items:
+        for order_item in order.items.all():
             item_text = f"• {order_item.menu_item.name}"
             
             if order_item.variant:
@@ -197,8 +155,8 @@ class StaffNotificationService:
                 item_text += f" x{order_item.quantity}"
             
             # Проверяем есть ли добавки
-            if order_item.selected_addons.exists():
-                addons = list(order_item.selected_addons.all())
+            addons = order_item.selected_addons.all()
+            if addons:
                 addon_names = [addon.addon.name for addon in addons]
                 item_text += f" + {', '.join(addon_names)}"
             
@@ -253,14 +211,27 @@ class StaffNotificationService:
         try:
             from django.utils import timezone
             from .models import Order
+            from .signals import order_status_changed
+            
+            # Одно атомарное UPDATE ... WHERE status != 'delivered': повторное
+            # нажатие кнопки не перезаписывает время доставки
+            delivered_at = timezone.now()
+            updated = await Order.objects.filter(id=order_id).exclude(status='delivered').aupdate(
+                status='delivered',
+                delivered_at=delivered_at,
+                updated_at=delivered_at,
+            )
+            
+            order = await Order.objects.select_related('cafe').aget(id=order_id)
             
-            # Получаем заказ
-            order = await sync_to_async(Order.objects.get)(id=order_id)
+            if not updated:
+                logger.info(f"Заказ #{order.order_number} уже был отмечен как доставленный")
+                return True
             
-            # Обновляем статус
-            order.status = 'delivered'
-            order.delivered_at = await sync_to_async(timezone.now)()
-            await sync_to_async(order.save)(update_fields=['status', 'delivered_at'])
+            # UPDATE минует Order.save(), поэтому сигнал о смене статуса отправляем сами
+            await order_status_changed.asend(
+                sender=Order, order=order, old_status=None, new_status='delivered'
+            )
             
             # Обновляем сообщение в чате персонала
             if order.staff_message_id:
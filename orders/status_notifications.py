@@ -0,0 +1,115 @@
+"""
+Уведомления клиентов о смене статуса заказа
+
+Обработчик сигнала order_status_changed после коммита транзакции ставит
+уведомление в очередь фонового потока. Поток отправляет сообщение через
+Telegram Bot API и записывает его в BotMessage, поэтому ни запрос, ни
+обработчик бота не ждут ответа Telegram, а клиенту не нужно обновлять
+страницу отслеживания заказа.
+"""
+import atexit
+import logging
+import queue
+import threading
+import requests
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+# Статусы, о которых сообщаем клиенту. О подтверждении (оплате) уже
+# сообщает обработчик платежа
+STATUS_MESSAGES = {
+    'preparing': "👨‍🍳 Заказ *#{number}* готовится.",
+    'ready': "🔔 Заказ *#{number}* готов!\n\n🏪 {cafe}\n📍 {address}",
+    'delivered': "✅ Заказ *#{number}* доставлен. Приятного аппетита!",
+    'cancelled': "❌ Заказ *#{number}* отменен.",
+}
+
+# Сколько ждать отправки оставшихся уведомлений при завершении процесса, секунд
+SHUTDOWN_TIMEOUT = 5
+
+
+class OrderStatusNotifier:
+    """Фоновый отправитель уведомлений о статусе заказа"""
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def enqueue(self, order_id: int, status: str):
+        """Поставить уведомление в очередь"""
+        self._ensure_started()
+        self._queue.put((order_id, status))
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name='order-status-notifier', daemon=True
+                )
+                self._thread.start()
+
+    def shutdown(self):
+        """Дождаться отправки уже поставленных уведомлений"""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(SHUTDOWN_TIMEOUT)
+
+    def _run(self):
+        session = requests.Session()
+        while True:
+            task = self._queue.get()
+            if task is None:
+                break
+            try:
+                self._send(session, *task)
+            except Exception as e:
+                logger.error(f"Ошибка отправки уведомления о статусе заказа {task[0]}: {e}")
+            finally:
+                close_old_connections()
+
+    def _send(self, session, order_id: int, status: str):
+        from orders.models import Order
+        from telegram_bot.models import BotMessage
+
+        order = Order.objects.select_related('user', 'cafe').get(pk=order_id)
+        if order.status != status:
+            # Статус успел измениться еще раз — уведомление устарело
+            return
+        if not order.user.telegram_id or not settings.TELEGRAM_BOT_TOKEN:
+            return
+
+        text = STATUS_MESSAGES[status].format(
+            number=order.order_number, cafe=order.cafe.name, address=order.cafe.address
+        )
+        response = session.post(
+            f"https://api.telegram.org/bot{settings.TELEGRAM_BOT_TOKEN}/sendMessage",
+            json={'chat_id': order.user.telegram_id, 'text': text, 'parse_mode': 'Markdown'},
+            timeout=30,
+        )
+        result = response.json() if response.status_code == 200 else {}
+        if not result.get('ok'):
+            logger.error(
+                f"Уведомление о статусе заказа #{order.order_number} не отправлено: "
+                f"{result.get('description', response.status_code)}"
+            )
+            return
+
+        BotMessage.objects.create(user=order.user, message_type=f'order_{status}', message_text=text)
+        logger.info(f"Клиент уведомлен о статусе '{status}' заказа #{order.order_number}")
+
+
+order_status_notifier = OrderStatusNotifier()
+atexit.register(order_status_notifier.shutdown)
+
+
+def notify_customer_on_status_change(sender, order, old_status, new_status, **kwargs):
+    """Обработчик order_status_changed: уведомление после коммита транзакции"""
+    if new_status not in STATUS_MESSAGES:
+        return
+    order_id = order.pk
+    transaction.on_commit(lambda: order_status_notifier.enqueue(order_id, new_status))
@@ -1,14 +1,17 @@
 """
 Утилиты для работы с Telegram Payments (исправленная версия)
 """
+import logging
 import uuid
 from decimal import Decimal
 from telegram import LabeledPrice
 from django.conf import settings
-from orders.models import Order, OrderItem, OrderItemAddon
+from orders.models import Order, OrderItem, OrderItemAddon, prefetch_order_details
 from payments.models import Payment
 from users.models import TelegramUser
 
+logger = logging.getLogger(__name__)
+
 
 class TelegramPaymentService:
     """Сервис для работы с платежами через Telegram"""
@@ -42,8 +45,9 @@ class TelegramPaymentService:
         """
         from menu.models import MenuItem, MenuItemVariant, Addon
         
-        print(f"DEBUG: Создание заказа для пользователя {telegram_user.telegram_id}")
-        print(f"DEBUG: cart_data = {cart_data}")
+        logger.info("Создание заказа для пользователя %s, позиций в корзине: %d",
+                    telegram_user.telegram_id, len(cart_data or {}))
+        logger.debug("Корзина пользователя %s: %s", telegram_user.telegram_id, cart_data)
         
         # Проверяем, что корзина не пуста
         if not cart_data:
@@ -61,7 +65,7 @@ class TelegramPaymentService:
         try:
             first_item = MenuItem.objects.get(id=int(first_item_id))
             cafe = first_item.cafe
-            print(f"DEBUG: Определено кафе: {cafe.name}")
+            logger.debug("Определено кафе: %s", cafe.name)
         except (MenuItem.DoesNotExist, ValueError) as e:
             raise ValueError(f"Не удалось найти товар с ID {first_item_id}: {e}")
         
@@ -80,14 +84,14 @@ class TelegramPaymentService:
         # order_number будет сгенерирован автоматически в save()
         order.save()
         
-        print(f"DEBUG: Создан заказ #{order.order_number}")
+        logger.debug("Создан заказ #%s", order.order_number)
         
         total_amount = Decimal('0')
         
         # Обрабатываем каждую позицию корзины
         for cart_key, cart_item_data in cart_data.items():
             try:
-                print(f"DEBUG: Обработка позиции {cart_key}: {cart_item_data}")
+                logger.debug("Обработка позиции %s: %s", cart_key, cart_item_data)
                 
                 # Парсим cart_key для извлечения item_id и variant_id
                 if '_v' in str(cart_key):
@@ -106,7 +110,7 @@ class TelegramPaymentService:
                     quantity = cart_item_data.get('quantity', 1)
                     addon_ids = cart_item_data.get('addon_ids', [])
                 else:
-                    print(f"WARNING: Неизвестный формат данных для {cart_key}: {cart_item_data}")
+                    logger.warning("Неизвестный формат данных для %s: %r", cart_key, cart_item_data)
                     continue
                 
                 # Получаем объекты из базы
@@ -117,7 +121,7 @@ class TelegramPaymentService:
                     try:
                         variant = MenuItemVariant.objects.get(id=variant_id, menu_item=menu_item)
                     except MenuItemVariant.DoesNotExist:
-                        print(f"WARNING: Вариант {variant_id} не найден для товара {item_id}")
+                        logger.warning("Вариант %s не найден для товара %s", variant_id, item_id)
                 
                 # Создаем OrderItem - БEЗ автоматических расчетов, делаем вручную
                 order_item = OrderItem(
@@ -138,7 +142,7 @@ class TelegramPaymentService:
                 order_item.total_price = order_item.final_price * quantity
                 order_item.save()
                 
-                print(f"DEBUG: Создана позиция заказа: {order_item} за {order_item.total_price}")
+                logger.debug("Создана позиция заказа: %s за %s", order_item, order_item.total_price)
                 
                 # Добавляем добавки
                 addons_price = Decimal('0')
@@ -150,7 +154,7 @@ class TelegramPaymentService:
                             addon=addon
                         )
                         addons_price += addon.price
-                        print(f"DEBUG: Добавлена добавка: {addon.name} (+{addon.price})")
+                        logger.debug("Добавлена добавка: %s (+%s)", addon.name, addon.price)
                     
                     # Пересчитываем цены с учетом добавок
                     order_item.addons_price = addons_price
@@ -161,17 +165,17 @@ class TelegramPaymentService:
                 total_amount += order_item.total_price
                 
             except MenuItem.DoesNotExist:
-                print(f"ERROR: Товар с ID {item_id} не найден")
+                logger.error("Товар с ID %s не найден", item_id)
                 continue
             except Exception as e:
-                print(f"ERROR: Ошибка обработки позиции {cart_key}: {e}")
+                logger.exception("Ошибка обработки позиции %s: %s", cart_key, e)
                 continue
         
         # Обновляем общую сумму заказа
         order.total_amount = total_amount
         order.save()
         
-        print(f"DEBUG: Заказ {order.order_number} создан на сумму {total_amount}")
+        logger.info("Заказ #%s создан на сумму %s", order.order_number, total_amount)
         
         if order.items.count() == 0:
             order.delete()
@@ -184,7 +188,7 @@ class TelegramPaymentService:
         # Проверяем, есть ли уже платеж для этого заказа
         existing_payment = Payment.objects.filter(order=order).first()
         if existing_payment:
-            print(f"DEBUG: Найден существующий платеж для заказа {order.order_number}")
+            logger.debug("Найден существующий платеж для заказа #%s", order.order_number)
             return existing_payment
         
         # Создаем уникальный invoice_payload на основе номера заказа
@@ -199,12 +203,13 @@ class TelegramPaymentService:
             description=f"Оплата заказа #{order.order_number}",
             invoice_payload=invoice_payload,
         )
-        print(f"DEBUG: Создан новый платеж для заказа {order.order_number} с payload {invoice_payload}")
+        logger.info("Создан платеж для заказа #%s с payload %s", order.order_number, invoice_payload)
         return payment
     
     def create_invoice_prices(self, order: Order) -> list:
         """Создает список цен для Telegram инвойса"""
         prices = []
+        prefetch_order_details(order)
         
         # Добавляем позиции заказа
         for order_item in order.items.all():
@@ -1,3 +1,46 @@
+from decimal import Decimal
+
 from django.test import TestCase
 
-# Create your tests here.
+from cafes.models import Cafe
+from orders.models import Order
+from orders.signals import order_status_changed
+from users.models import TelegramUser
+
+
+class OrderStatusChangedTests(TestCase):
+    """Сигнал order_status_changed отправляется только при реальной смене статуса"""
+
+    def setUp(self):
+        cafe = Cafe.objects.create(name='Кафе', slug='cafe', address='Адрес', phone='+79990000000', working_hours='9-21')
+        user = TelegramUser.objects.create(telegram_id=1, first_name='Клиент')
+        self.order = Order.objects.create(
+            cafe=cafe, user=user, total_amount=Decimal('100'), customer_name='Клиент',
+            customer_phone='+79990000000', workspace_number=1,
+        )
+        self.changes = []
+        order_status_changed.connect(self.record, sender=Order, dispatch_uid='orders_tests_status')
+        self.addCleanup(order_status_changed.disconnect, sender=Order, dispatch_uid='orders_tests_status')
+
+    def record(self, sender, order, old_status, new_status, **kwargs):
+        self.changes.append((old_status, new_status))
+
+    def test_status_change_is_signalled(self):
+        order = Order.objects.get(pk=self.order.pk)
+        order.status = 'preparing'
+        order.save(update_fields=['status'])
+        order.save(update_fields=['status'])
+        self.assertEqual(self.changes, [('pending', 'preparing')])
+
+    def test_deferred_status_is_not_a_change(self):
+        order = Order.objects.only('id', 'order_number', 'comment').get(pk=self.order.pk)
+        order.comment = 'Без сахара'
+        order.save()
+        self.assertEqual(self.changes, [])
+
+    def test_lazily_loaded_status_is_compared(self):
+        order = Order.objects.only('id').get(pk=self.order.pk)
+        self.assertEqual(order.status, 'pending')
+        order.status = 'ready'
+        order.save(update_fields=['status'])
+        self.assertEqual(self.changes, [('pending', 'ready')])
@@ -0,0 +1,110 @@
+"""
+Push-уведомления страницы отслеживания заказа (Server-Sent Events)
+
+OrderStatusBroker — in-process pub/sub: обработчик сигнала order_status_changed
+после коммита публикует новый статус, а SSE-соединения этого процесса,
+ожидающие заказ, получают его без обращений к БД. Смена статуса в другом
+процессе (бот персонала, другой воркер) до брокера не дойдет, поэтому поток
+событий раз в STATUS_CHECK_INTERVAL дополнительно сверяет статус одним
+легким запросом и отправляет heartbeat, чтобы прокси не закрывали соединение.
+"""
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+# Интервал проверки статуса в БД и heartbeat, секунд
+STATUS_CHECK_INTERVAL = 15
+
+# Максимальная длительность одного соединения; EventSource переподключится сам
+STREAM_MAX_DURATION = 600
+
+# После этих статусов заказ больше не меняется — поток закрывается
+FINAL_STATUSES = ('delivered', 'cancelled')
+
+
+class OrderStatusBroker:
+    """Подписки SSE-соединений на смену статуса заказа"""
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, order_number: str) -> asyncio.Queue:
+        """Подписаться на статусы заказа из текущего event loop"""
+        queue = asyncio.Queue()
+        with self._lock:
+            self._subscribers[order_number].add((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, order_number: str, queue: asyncio.Queue):
+        with self._lock:
+            subscribers = self._subscribers.get(order_number)
+            if subscribers is None:
+                return
+            subscribers.discard((asyncio.get_running_loop(), queue))
+            if not subscribers:
+                del self._subscribers[order_number]
+
+    def publish(self, order_number: str, status: str):
+        """Передать новый статус подписчикам (вызывается из любого потока)"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(order_number, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, status)
+            except RuntimeError:
+                # Event loop соединения уже закрыт
+                pass
+
+
+order_status_broker = OrderStatusBroker()
+
+
+def publish_status_change(sender, order, old_status, new_status, **kwargs):
+    """Обработчик order_status_changed: публикация после коммита транзакции"""
+    order_number = order.order_number
+    transaction.on_commit(lambda: order_status_broker.publish(order_number, new_status))
+
+
+def format_status_event(status: str, status_display: str) -> str:
+    """Событие SSE со статусом заказа"""
+    data = json.dumps({'status': status, 'status_display': status_display}, ensure_ascii=False)
+    return f"event: status\ndata: {data}\n\n"
+
+
+async def order_status_stream(order_number: str, status: str):
+    """Асинхронный генератор событий SSE для одного заказа"""
+    from orders.models import Order
+
+    status_names = dict(Order.STATUS_CHOICES)
+    queue = order_status_broker.subscribe(order_number)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + STREAM_MAX_DURATION
+
+    try:
+        # Подсказка EventSource: интервал переподключения
+        yield f"retry: {STATUS_CHECK_INTERVAL * 1000}\n"
+        yield format_status_event(status, status_names.get(status, status))
+
+        while status not in FINAL_STATUSES and loop.time() < deadline:
+            try:
+                new_status = await asyncio.wait_for(queue.get(), STATUS_CHECK_INTERVAL)
+            except asyncio.TimeoutError:
+                new_status = await Order.objects.filter(
+                    order_number=order_number
+                ).values_list('status', flat=True).afirst()
+
+            if new_status is None:
+                break
+            if new_status != status:
+                status = new_status
+                yield format_status_event(status, status_names.get(status, status))
+            else:
+                yield ": ping\n\n"
+    finally:
+        order_status_broker.unsubscribe(order_number, queue)
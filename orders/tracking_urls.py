@@ -11,6 +11,12 @@ urlpatterns = [
     # API для получения статуса заказа
     path('api/status/<str:order_number>/', tracking_views.api_order_status, name='api_order_status'),
     
+    # Поток событий о смене статуса заказа (SSE, только под ASGI)
+    path('events/<str:order_number>/', tracking_views.order_status_events, name='order_status_events'),
+    
     # Список заказов пользователя
     path('my-orders/', tracking_views.user_orders, name='user_orders'),
+    
+    # API следующей страницы истории заказов (keyset-курсор)
+    path('api/my-orders/', tracking_views.api_user_orders, name='api_user_orders'),
 ]
\ No newline at end of file
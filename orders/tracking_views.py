@@ -2,9 +2,15 @@
 Views для отслеживания заказов пользователями
 """
 from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse
+from django.template.loader import render_to_string
+from django.http import JsonResponse, HttpResponse, HttpResponseForbidden, Http404, StreamingHttpResponse
 from django.contrib.auth.decorators import login_required
+from django.core.handlers.asgi import ASGIRequest
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
 from orders.models import Order
+from orders.history import get_order_history_page
+from orders.tracking_events import order_status_stream
 from users.models import TelegramUser
 
 
@@ -26,10 +32,20 @@ def order_status(request, order_number):
     return render(request, 'orders/order_status.html', context)
 
 
+def _order_status_etag(request, order_number):
+    """ETag статуса заказа: один запрос по уникальному индексу order_number"""
+    row = Order.objects.filter(order_number=order_number).values('status', 'updated_at').first()
+    if row is None:
+        return None
+    return f"{row['status']}-{row['updated_at'].timestamp()}"
+
+
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_order_status_etag)
 def api_order_status(request, order_number):
-    """API для получения статуса заказа"""
+    """API для получения статуса заказа (304 при неизменном If-None-Match)"""
     try:
-        order = Order.objects.get(order_number=order_number)
+        order = Order.objects.select_related('cafe').get(order_number=order_number)
         
         status_info = {
             'order_number': order.order_number,
@@ -100,17 +116,76 @@ def api_order_status(request, order_number):
         }, status=500)
 
 
+async def order_status_events(request, order_number):
+    """Поток Server-Sent Events со статусом заказа"""
+    if not isinstance(request, ASGIRequest):
+        # Под WSGI долгий поток занял бы воркер целиком. 204 останавливает
+        # переподключения EventSource, и страница переходит на опрос API
+        return HttpResponse(status=204)
+    
+    order = await Order.objects.filter(order_number=order_number).values('status', 'user_id').afirst()
+    if order is None:
+        raise Http404('Заказ не найден')
+    
+    # Проверяем права доступа (только владелец заказа может его видеть)
+    user = await request.auser()
+    if user.is_authenticated:
+        telegram_user_id = await TelegramUser.objects.filter(user=user).values_list('id', flat=True).afirst()
+        if telegram_user_id is not None and telegram_user_id != order['user_id']:
+            return HttpResponseForbidden()
+    
+    response = StreamingHttpResponse(
+        order_status_stream(order_number, order['status']),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Отключаем буферизацию ответа в nginx
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def _get_telegram_user(request):
+    """TelegramUser, связанный с авторизованным пользователем Django"""
+    if not request.user.is_authenticated:
+        return None
+    return TelegramUser.objects.filter(user=request.user).first()
+
+
 def user_orders(request):
-    """Список заказов пользователя"""
-    if not hasattr(request.user, 'telegram_user'):
+    """Список заказов пользователя (первая страница истории)"""
+    telegram_user = _get_telegram_user(request)
+    if telegram_user is None:
         return render(request, 'orders/no_orders.html')
     
-    orders = Order.objects.filter(
-        user=request.user.telegram_user
-    ).order_by('-created_at')
+    orders, next_cursor = get_order_history_page(telegram_user)
     
     context = {
         'orders': orders,
+        'next_cursor': next_cursor,
     }
     
-    return render(request, 'orders/user_orders.html', context)
\ No newline at end of file
+    return render(request, 'orders/user_orders.html', context)
+
+
+def api_user_orders(request):
+    """API следующей страницы истории заказов для бесконечной прокрутки"""
+    telegram_user = _get_telegram_user(request)
+    if telegram_user is None:
+        return JsonResponse({
+            'success': False,
+            'error': 'Пользователь не авторизован'
+        }, status=401)
+    
+    try:
+        orders, next_cursor = get_order_history_page(telegram_user, request.GET.get('cursor'))
+    except ValueError:
+        return JsonResponse({
+            'success': False,
+            'error': 'Неверный курсор'
+        }, status=400)
+    
+    return JsonResponse({
+        'success': True,
+        'html': render_to_string('orders/components/order_cards.html', {'orders': orders}, request=request),
+        'next_cursor': next_cursor,
+    })
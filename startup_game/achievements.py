@@ -0,0 +1,174 @@
+"""
+Выдача достижений (Achievement)
+
+Достижение выдается, когда в сессии выполнены все его заданные условия
+required_* (значение сессии >= порога). Пороги всех достижений хранятся в
+памяти процесса отсортированными массивами по каждой метрике, поэтому
+проверка сессии — bisect по каждой метрике без запросов к таблице
+достижений. Индекс перестраивается при смене версии в кэше Django
+(сигналы Achievement подключаются в StartupGameConfig.ready).
+
+Позиции bisect сессии запоминаются в процессе: при следующей проверке
+рассматриваются только пороги, пройденные с прошлой проверки, и для них
+сверяются остальные условия. Первая проверка сессии в процессе (или после
+перестройки индекса) просматривает все достигнутые пороги.
+
+Уже полученные пользователем достижения кэшируются, новые записываются
+одним bulk_create(ignore_conflicts=True) — параллельная выдача того же
+достижения не приводит к ошибке.
+"""
+import threading
+import time
+from bisect import bisect_right
+from collections import OrderedDict
+from django.core.cache import cache
+from .models import Achievement, UserAchievement
+
+VERSION_KEY = 'startup_game:achievements_version'
+
+# Время жизни кэша полученных пользователем достижений, секунд
+EARNED_CACHE_TIMEOUT = 3600
+
+METRICS = ('money', 'reputation', 'employees', 'customers', 'day', 'level')
+
+# Сколько сессий с запомненными позициями порогов хранит процесс
+POSITIONS_CACHE_SIZE = 10000
+
+
+def get_achievements_version() -> str:
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = bump_achievements_version()
+    return version
+
+
+def bump_achievements_version(*args, **kwargs) -> str:
+    """Сменить версию порогов (обработчик post_save/post_delete Achievement)"""
+    version = str(time.time_ns())
+    cache.set(VERSION_KEY, version, None)
+    return version
+
+
+def _earned_key(user_id) -> str:
+    return f'startup_game:achievements:user:{user_id}'
+
+
+def forget_earned_achievements(sender, instance, **kwargs):
+    """Сбросить кэш полученных достижений (обработчик post_delete UserAchievement)"""
+    cache.delete(_earned_key(instance.user_id))
+
+
+class ThresholdIndex:
+    """Пороги достижений: по метрике отсортированные пороги и id в том же порядке"""
+
+    __slots__ = ('thresholds', 'achievement_ids', 'achievements')
+
+    def __init__(self, achievements):
+        self.achievements = {achievement.id: achievement for achievement in achievements}
+        self.thresholds = {}
+        self.achievement_ids = {}
+        for metric in METRICS:
+            pairs = sorted(
+                (getattr(achievement, f'required_{metric}'), achievement.id)
+                for achievement in achievements
+                if getattr(achievement, f'required_{metric}') is not None
+            )
+            self.thresholds[metric] = [threshold for threshold, _ in pairs]
+            self.achievement_ids[metric] = [achievement_id for _, achievement_id in pairs]
+
+    def positions(self, values: dict) -> tuple:
+        """Позиции значений метрик в массивах порогов (число достигнутых порогов)"""
+        return tuple(bisect_right(self.thresholds[metric], values[metric]) for metric in METRICS)
+
+    def crossed(self, previous: tuple, current: tuple) -> set:
+        """id достижений, пороги которых пройдены при переходе от позиций previous к current"""
+        crossed = set()
+        for metric, before, after in zip(METRICS, previous, current):
+            if after > before:
+                crossed.update(self.achievement_ids[metric][before:after])
+        return crossed
+
+    def satisfied(self, achievement_id, values: dict) -> bool:
+        """Выполнены ли все условия достижения"""
+        achievement = self.achievements[achievement_id]
+        return all(
+            values[metric] >= getattr(achievement, f'required_{metric}')
+            for metric in METRICS
+            if getattr(achievement, f'required_{metric}') is not None
+        )
+
+
+class AchievementEvaluator:
+    """Проверка сессии и выдача новых достижений"""
+
+    def __init__(self):
+        self._index = None
+        self._version = None
+        self._lock = threading.Lock()
+        # id сессии -> (индекс, позиции на прошлой проверке), вытеснение самых старых
+        self._positions = OrderedDict()
+
+    def index(self) -> ThresholdIndex:
+        version = get_achievements_version()
+        if self._version != version:
+            with self._lock:
+                if self._version != version:
+                    self._index = ThresholdIndex(list(Achievement.objects.all()))
+                    self._version = version
+        return self._index
+
+    def earned_ids(self, user_id) -> set:
+        earned = cache.get(_earned_key(user_id))
+        if earned is None:
+            earned = set(UserAchievement.objects.filter(user_id=user_id).values_list('achievement_id', flat=True))
+            cache.set(_earned_key(user_id), earned, EARNED_CACHE_TIMEOUT)
+        return earned
+
+    def evaluate(self, session) -> list:
+        """Выдать достижения, заработанные состоянием сессии; возвращает новые Achievement"""
+        index = self.index()
+        values = {metric: getattr(session, metric) for metric in METRICS}
+        current = index.positions(values)
+
+        with self._lock:
+            remembered = self._positions.pop(session.pk, None)
+        if remembered is not None and remembered[0] is index:
+            previous = remembered[1]
+        else:
+            previous = (0,) * len(METRICS)
+
+        eligible = {
+            achievement_id for achievement_id in index.crossed(previous, current)
+            if index.satisfied(achievement_id, values)
+        }
+        new_achievements = self._award(session, index, eligible) if eligible else []
+
+        with self._lock:
+            self._positions[session.pk] = (index, current)
+            while len(self._positions) > POSITIONS_CACHE_SIZE:
+                self._positions.popitem(last=False)
+        return new_achievements
+
+    def _award(self, session, index, eligible) -> list:
+        earned = self.earned_ids(session.user_id)
+        new_ids = eligible - earned
+        if not new_ids:
+            return []
+
+        UserAchievement.objects.bulk_create([
+            UserAchievement(user_id=session.user_id, achievement_id=achievement_id, session_id=session.pk)
+            for achievement_id in new_ids
+        ], ignore_conflicts=True)
+        cache.set(_earned_key(session.user_id), earned | new_ids, EARNED_CACHE_TIMEOUT)
+        return [index.achievements[achievement_id] for achievement_id in sorted(new_ids)]
+
+
+achievement_evaluator = AchievementEvaluator()
+
+
+def achievements_payload(achievements) -> list:
+    """Новые достижения для JSON-ответа"""
+    return [
+        {'name': achievement.name, 'description': achievement.description, 'icon': achievement.icon}
+        for achievement in achievements
+    ]
@@ -0,0 +1,61 @@
+"""
+Активная игровая сессия пользователя
+
+У пользователя не больше одной активной GameSession (частичный уникальный
+индекс по user при is_active=True). Ее id запоминается в сессии Django, и
+API игры получают сессию выборкой по первичному ключу; условия user и
+is_active в том же запросе проверяют, что запомненный id еще актуален.
+Если сессия завершена или id нет, выполняется обычный поиск по user и id
+запоминается заново.
+"""
+from django.db import IntegrityError, transaction
+from .models import GameSession
+
+SESSION_KEY = 'startup_game_session_id'
+
+
+def _remember(request, session_id):
+    # Пишем только при изменении, чтобы не сохранять сессию Django на каждом запросе
+    if request.session.get(SESSION_KEY) != session_id:
+        if session_id is None:
+            request.session.pop(SESSION_KEY, None)
+        else:
+            request.session[SESSION_KEY] = session_id
+
+
+def get_active_session(request, queryset=None):
+    """
+    Активная сессия пользователя или None
+
+    queryset — базовый QuerySet (например, с select_for_update() или only()).
+    """
+    if queryset is None:
+        queryset = GameSession.objects.all()
+    queryset = queryset.filter(user=request.user, is_active=True)
+
+    session_id = request.session.get(SESSION_KEY)
+    if session_id is not None:
+        session = queryset.filter(pk=session_id).first()
+        if session is not None:
+            return session
+
+    session = queryset.first()
+    _remember(request, session.pk if session else None)
+    return session
+
+
+def _create_session(user, fields) -> GameSession:
+    with transaction.atomic():
+        GameSession.objects.filter(user=user, is_active=True).update(is_active=False)
+        return GameSession.objects.create(user=user, is_active=True, **fields)
+
+
+def start_new_session(request, **fields) -> GameSession:
+    """Завершить активную сессию пользователя и создать новую"""
+    try:
+        session = _create_session(request.user, fields)
+    except IntegrityError:
+        # Параллельный запрос успел создать активную сессию — завершаем и ее
+        session = _create_session(request.user, fields)
+    _remember(request, session.pk)
+    return session
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django import forms
-from .models import GameSession, GameEvent, Achievement, UserAchievement, EventTemplate, EventChoice, Skill, CompletedEvent
+from .models import GameSession, GameEvent, GameEventDailyAggregate, LeaderboardEntry, Achievement, UserAchievement, EventTemplate, EventChoice, Skill, CompletedEvent
 
 
 class EventTemplateAdminForm(forms.ModelForm):
@@ -43,6 +43,20 @@ class GameEventAdmin(admin.ModelAdmin):
     search_fields = ['title', 'description', 'session__company_name']
 
 
+@admin.register(LeaderboardEntry)
+class LeaderboardEntryAdmin(admin.ModelAdmin):
+    list_display = ['company_name', 'user', 'money', 'reputation', 'day', 'updated_at']
+    search_fields = ['company_name', 'user__username']
+    readonly_fields = ['session', 'user', 'company_name', 'money', 'reputation', 'day', 'updated_at']
+
+
+@admin.register(GameEventDailyAggregate)
+class GameEventDailyAggregateAdmin(admin.ModelAdmin):
+    list_display = ['session', 'event_type', 'day_occurred', 'events_count', 'money_change', 'reputation_change']
+    list_filter = ['event_type']
+    search_fields = ['session__company_name']
+
+
 @admin.register(Achievement)
 class AchievementAdmin(admin.ModelAdmin):
     list_display = ['name', 'description', 'icon']
@@ -4,4 +4,31 @@ from django.apps import AppConfig
 class StartupGameConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'startup_game'
-    verbose_name = 'Startup Game'
\ No newline at end of file
+    verbose_name = 'Startup Game'
+
+    def ready(self):
+        from django.db.models.signals import post_save, post_delete, m2m_changed
+        from startup_game.catalogue import bump_catalogue_version
+        from startup_game.achievements import bump_achievements_version, forget_earned_achievements
+        from startup_game.leaderboard import update_leaderboard
+        from startup_game.completed_events import invalidate_completed_events
+        from startup_game.models import (
+            GameSession, EventTemplate, EventChoice, Skill, Achievement, UserAchievement, CompletedEvent
+        )
+
+        # Смена версии кэшированного каталога событий
+        for model in (EventTemplate, EventChoice, Skill):
+            post_save.connect(bump_catalogue_version, sender=model, dispatch_uid=f'game_catalogue_save_{model.__name__}')
+            post_delete.connect(bump_catalogue_version, sender=model, dispatch_uid=f'game_catalogue_delete_{model.__name__}')
+        m2m_changed.connect(bump_catalogue_version, sender=EventChoice.skills.through, dispatch_uid='game_catalogue_m2m_skills')
+
+        # Пересборка индекса порогов достижений и кэша полученных достижений
+        post_save.connect(bump_achievements_version, sender=Achievement, dispatch_uid='game_achievements_save')
+        post_delete.connect(bump_achievements_version, sender=Achievement, dispatch_uid='game_achievements_delete')
+        post_delete.connect(forget_earned_achievements, sender=UserAchievement, dispatch_uid='game_achievements_forget')
+
+        # Денормализованный рейтинг
+        post_save.connect(update_leaderboard, sender=GameSession, dispatch_uid='game_leaderboard_update')
+
+        # Кэш завершенных событий сессии
+        post_delete.connect(invalidate_completed_events, sender=CompletedEvent, dispatch_uid='game_completed_events_delete')
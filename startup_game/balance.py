@@ -0,0 +1,178 @@
+"""
+Монте-Карло симуляция баланса событий
+
+Модуль не зависит от Django: каталог событий передается готовым словарем
+массивов (см. команду simulate_balance), поэтому функции можно выполнять в
+дочерних процессах multiprocessing. Все симулируемые сессии одного блока
+хранятся в массивах NumPy (по строке на сессию) и продвигаются по дням
+одновременно.
+
+Правила повторяют клиентский таймер (components/game_timer.html):
+- каждый день списывается DAILY_COST;
+- первое событие приходит на 4-6 день, следующее — через timeCost выбора
+  или через nextEventDelay, если выбор запускает связанное событие;
+- случайные события проверяются каждый день с вероятностью randomChance
+  в пределах minDay..maxDay;
+- каждое событие происходит в сессии не более одного раза;
+- игрок выбирает случайный из доступных по деньгам вариантов.
+
+Банкротство — деньги ушли в минус. Победы в игре нет, поэтому для
+симуляции победой считается достижение victory_money.
+"""
+import numpy as np
+
+START_MONEY = 500
+DAILY_COST = 50
+
+# Колонки матрицы эффектов и состояния сессии
+STATS = (
+    'money', 'reputation', 'employees', 'customers',
+    'prototype_skill', 'presentation_skill', 'pitching_skill', 'team_skill', 'marketing_skill',
+)
+MONEY = 0
+
+
+def simulate_chunk(catalogue: dict, sessions: int, seed, max_days: int, victory_money: int) -> dict:
+    """Симулировать блок сессий; возвращает агрегаты для merge_results"""
+    rng = np.random.default_rng(seed)
+
+    trigger = np.asarray(catalogue['trigger_type'])
+    chance = np.asarray(catalogue['random_chance'], dtype=np.float64)
+    min_day = np.asarray(catalogue['min_day'], dtype=np.int64)
+    max_day = np.asarray(catalogue['max_day'], dtype=np.int64)
+    choice_event = np.asarray(catalogue['choice_event'], dtype=np.int64)
+    money_cost = np.asarray(catalogue['money_cost'], dtype=np.int64)
+    time_cost = np.maximum(np.asarray(catalogue['time_cost'], dtype=np.int64), 1)
+    next_delay = np.maximum(np.asarray(catalogue['next_event_delay'], dtype=np.int64), 1)
+    effects = np.asarray(catalogue['effects'], dtype=np.int64).reshape(-1, len(STATS))
+    next_events = catalogue['next_events']
+
+    n_events = len(trigger)
+    n_choices = len(choice_event)
+    random_events = np.flatnonzero(trigger == 'random')
+    sequential_events = np.flatnonzero(trigger == 'sequential')
+    choices_by_event = [np.flatnonzero(choice_event == event) for event in range(n_events)]
+
+    state = np.zeros((sessions, len(STATS)), dtype=np.int64)
+    state[:, MONEY] = START_MONEY
+    state[:, STATS.index('employees')] = 1
+    occurred = np.zeros((sessions, n_events), dtype=bool)
+    next_event_day = rng.integers(4, 7, size=sessions)
+    pending = np.full(sessions, -1, dtype=np.int64)
+    finished_day = np.zeros(sessions, dtype=np.int64)  # 0 — игра продолжается
+    victory = np.zeros(sessions, dtype=bool)
+    event_counts = np.zeros(n_events, dtype=np.int64)
+    choice_counts = np.zeros(n_choices, dtype=np.int64)
+    rows = np.arange(sessions)
+
+    for day in range(1, max_days + 1):
+        active = finished_day == 0
+        if not active.any():
+            break
+        state[active, MONEY] -= DAILY_COST
+
+        fired = np.full(sessions, -1, dtype=np.int64)
+
+        # Случайные события дня (первое выпавшее)
+        for event in random_events:
+            if day < min_day[event] or (max_day[event] and day > max_day[event]):
+                continue
+            hit = active & (fired < 0) & ~occurred[:, event] & (rng.random(sessions) < chance[event])
+            fired[hit] = event
+
+        # Плановое событие: связанное из предыдущего выбора или случайное последовательное
+        due = active & (fired < 0) & (day >= next_event_day)
+        has_pending = due & (pending >= 0)
+        has_pending[has_pending] = ~occurred[rows[has_pending], pending[has_pending]]
+        fired[has_pending] = pending[has_pending]
+        pending[due] = -1
+
+        due &= fired < 0
+        if due.any() and len(sequential_events):
+            available = ~occurred[np.ix_(due, sequential_events)]
+            keys = rng.random(available.shape) * available
+            picked = sequential_events[keys.argmax(axis=1)]
+            picked[~available.any(axis=1)] = -1
+            fired[due] = picked
+
+        happened = fired >= 0
+        occurred[rows[happened], fired[happened]] = True
+        event_counts += np.bincount(fired[happened], minlength=n_events)
+
+        # Выбор случайного варианта, доступного по деньгам
+        chosen = np.full(sessions, -1, dtype=np.int64)
+        for event in np.unique(fired[happened]):
+            options = choices_by_event[event]
+            idx = np.flatnonzero(fired == event)
+            if not len(options):
+                continue
+            affordable = state[idx, MONEY][:, None] >= money_cost[options][None, :]
+            keys = rng.random(affordable.shape) * affordable
+            picked = options[keys.argmax(axis=1)]
+            picked[~affordable.any(axis=1)] = -1
+            chosen[idx] = picked
+
+        made = chosen >= 0
+        picked = chosen[made]
+        choice_counts += np.bincount(picked, minlength=n_choices)
+        state[made] += effects[picked]
+        state[made, MONEY] -= money_cost[picked]
+
+        # Планирование следующего события
+        next_event_day[happened & ~made] = day + 1
+        for choice in np.unique(picked):
+            idx = np.flatnonzero(chosen == choice)
+            targets = next_events[choice]
+            if targets:
+                pending[idx] = rng.choice(np.asarray(targets, dtype=np.int64), size=len(idx))
+                next_event_day[idx] = day + next_delay[choice]
+            else:
+                next_event_day[idx] = day + time_cost[choice]
+
+        bankrupt = active & (state[:, MONEY] < 0)
+        won = active & ~bankrupt & (state[:, MONEY] >= victory_money)
+        finished_day[bankrupt | won] = day
+        victory |= won
+
+    return {
+        'sessions': sessions,
+        'bankrupt_days': finished_day[(finished_day > 0) & ~victory],
+        'victory_days': finished_day[victory],
+        'final_state': state.sum(axis=0),
+        'event_counts': event_counts,
+        'choice_counts': choice_counts,
+    }
+
+
+def merge_results(results: list) -> dict:
+    """Объединить агрегаты блоков"""
+    return {
+        'sessions': sum(result['sessions'] for result in results),
+        'bankrupt_days': np.concatenate([result['bankrupt_days'] for result in results]),
+        'victory_days': np.concatenate([result['victory_days'] for result in results]),
+        'final_state': np.sum([result['final_state'] for result in results], axis=0),
+        'event_counts': np.sum([result['event_counts'] for result in results], axis=0),
+        'choice_counts': np.sum([result['choice_counts'] for result in results], axis=0),
+    }
+
+
+def _run_chunk(args):
+    return simulate_chunk(*args)
+
+
+def run_simulation(catalogue: dict, sessions: int, seed, max_days: int, victory_money: int,
+                   workers: int = 1, chunk_size: int = 5000) -> dict:
+    """Разбить сессии на блоки и посчитать их в workers процессах"""
+    chunks = [min(chunk_size, sessions - start) for start in range(0, sessions, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+    tasks = [(catalogue, size, chunk_seed, max_days, victory_money) for size, chunk_seed in zip(chunks, seeds)]
+
+    if workers > 1 and len(tasks) > 1:
+        try:
+            import multiprocessing
+            with multiprocessing.Pool(min(workers, len(tasks))) as pool:
+                return merge_results(pool.map(_run_chunk, tasks))
+        except (ImportError, OSError):
+            # Нет поддержки процессов (например, sandbox без /dev/shm) — считаем в текущем
+            pass
+    return merge_results([_run_chunk(task) for task in tasks])
@@ -0,0 +1,157 @@
+"""
+Каталог событий игры для get_events_api
+
+Каталог одинаков для всех игроков, поэтому он собирается фиксированным
+числом запросов (события, варианты, навыки вариантов, все навыки), один раз
+сериализуется в JSON и хранится в кэше в виде байтов под ключом с версией.
+Версия меняется при любом изменении EventTemplate, EventChoice, Skill и
+связей вариант-навык (сигналы подключаются в StartupGameConfig.ready) и
+используется как ETag ответа. По той же версии в памяти процесса хранится
+соответствие ключ события -> id EventTemplate.
+"""
+import json
+import threading
+import time
+from django.core.cache import cache
+from django.db.models import Prefetch
+
+VERSION_KEY = 'startup_game:catalogue_version'
+
+# Время жизни сериализованного каталога в кэше, секунд
+CATALOGUE_TIMEOUT = 3600
+
+
+def get_catalogue_version() -> str:
+    """Текущая версия каталога"""
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = bump_catalogue_version()
+    return version
+
+
+def bump_catalogue_version(*args, **kwargs) -> str:
+    """Сменить версию каталога (обработчик сигналов моделей каталога)"""
+    if kwargs.get('action', 'post_').startswith('pre_'):
+        return None
+    version = str(time.time_ns())
+    cache.set(VERSION_KEY, version, None)
+    return version
+
+
+def _choice_effects(choice) -> dict:
+    """Ненулевые эффекты варианта выбора"""
+    effects = {}
+    for key, value in (
+        ('money', choice.money_effect),
+        ('reputation', choice.reputation_effect),
+        ('employees', choice.employees_effect),
+        ('customers', choice.customers_effect),
+        ('prototype_skill', choice.prototype_skill_effect),
+        ('presentation_skill', choice.presentation_skill_effect),
+        ('pitching_skill', choice.pitching_skill_effect),
+        ('team_skill', choice.team_skill_effect),
+        ('marketing_skill', choice.marketing_skill_effect),
+    ):
+        if value != 0:
+            effects[key] = value
+    return effects
+
+
+def _skill_data(skill) -> dict:
+    return {
+        'name': skill.name,
+        'displayName': skill.display_name,
+        'color': skill.color,
+        'icon': skill.icon,
+        'sessionField': skill.session_field
+    }
+
+
+def _split_list(value: str) -> list:
+    return [part.strip() for part in value.split(',') if part.strip()] if value else []
+
+
+def build_event_catalogue() -> dict:
+    """Каталог событий и навыков (4 запроса независимо от размера каталога)"""
+    from .models import EventTemplate, EventChoice, Skill
+
+    active_skills = Skill.objects.filter(is_active=True).order_by('order')
+    choices = EventChoice.objects.order_by('order').prefetch_related(
+        Prefetch('skills', queryset=active_skills)
+    )
+    events = EventTemplate.objects.filter(is_active=True).order_by('order').prefetch_related(
+        Prefetch('choices', queryset=choices)
+    )
+
+    events_data = {}
+    for event in events:
+        choices_data = []
+        for choice in event.choices.all():
+            choices_data.append({
+                'id': choice.choice_id,
+                'text': choice.title,
+                'description': choice.description,
+                'timeCost': choice.time_cost,
+                'moneyCost': choice.money_cost,
+                'effects': _choice_effects(choice),
+                'buttonStyle': choice.button_style,
+                'skills': [_skill_data(skill) for skill in choice.skills.all()],
+                'nextEvents': _split_list(choice.next_events),
+                'nextEventDelay': choice.next_event_delay
+            })
+
+        events_data[event.key] = {
+            'title': event.title,
+            'description': event.description,
+            'choices': choices_data,
+            'triggerType': event.trigger_type,
+            'randomChance': event.random_chance,
+            'minDay': event.min_day,
+            'maxDay': event.max_day,
+            'parentChoices': _split_list(event.parent_choices)
+        }
+
+    skills_data = []
+    for skill in active_skills:
+        data = _skill_data(skill)
+        data['type'] = skill.session_field  # type для совместимости с JavaScript
+        skills_data.append(data)
+
+    return {
+        'events': events_data,
+        'availableSkills': skills_data
+    }
+
+
+_template_ids = (None, {})
+_template_ids_lock = threading.Lock()
+
+
+def get_event_template_ids(refresh: bool = False) -> dict:
+    """
+    Ключи активных событий -> id EventTemplate (без запроса, пока версия не сменилась)
+
+    refresh=True перечитывает соответствие, даже если версия та же.
+    """
+    global _template_ids
+    version = get_catalogue_version()
+    cached_version, template_ids = _template_ids
+    if refresh or cached_version != version:
+        from .models import EventTemplate
+        with _template_ids_lock:
+            cached_version, template_ids = _template_ids
+            if refresh or cached_version != version:
+                template_ids = dict(EventTemplate.objects.filter(is_active=True).values_list('key', 'id'))
+                _template_ids = (version, template_ids)
+    return template_ids
+
+
+def get_event_catalogue_json(version: str = None) -> bytes:
+    """Сериализованный каталог для версии (из кэша или собранный заново)"""
+    version = version or get_catalogue_version()
+    key = f'startup_game:catalogue:{version}'
+    payload = cache.get(key)
+    if payload is None:
+        payload = json.dumps(build_event_catalogue(), ensure_ascii=False).encode()
+        cache.set(key, payload, CATALOGUE_TIMEOUT)
+    return payload
@@ -0,0 +1,87 @@
+"""
+Завершенные события сессии (CompletedEvent)
+
+Список завершенных событий сессии хранится в кэше Django в компактном виде
+— [[event_key, choice_id, game_day], ...] — и сбрасывается при каждой
+записи. Уже завершенные события отсекаются до записи (по кэшу или по БД),
+запись — один INSERT ... ON CONFLICT DO NOTHING (bulk_create с
+ignore_conflicts, уникальность session+event_key), id шаблона события
+берется из соответствия ключ -> id в памяти процесса, без запросов к
+EventTemplate; ключ, которого нет в соответствии, перечитывает его один раз.
+"""
+from django.core.cache import cache
+from .catalogue import get_event_template_ids
+from .models import CompletedEvent
+
+# Время жизни кэшированного списка, секунд
+COMPLETED_CACHE_TIMEOUT = 3600
+
+
+def _key(session_id) -> str:
+    return f'startup_game:completed:{session_id}'
+
+
+def get_completed_events(session_id) -> list:
+    """Завершенные события сессии: [[event_key, choice_id, game_day], ...]"""
+    completed = cache.get(_key(session_id))
+    if completed is None:
+        completed = [
+            list(row) for row in CompletedEvent.objects.filter(session_id=session_id)
+            .values_list('event_key', 'choice_id', 'game_day')
+        ]
+        cache.set(_key(session_id), completed, COMPLETED_CACHE_TIMEOUT)
+    return completed
+
+
+def forget_completed_events(session_id):
+    cache.delete(_key(session_id))
+
+
+def invalidate_completed_events(sender, instance, **kwargs):
+    """Обработчик post_delete CompletedEvent"""
+    forget_completed_events(instance.session_id)
+
+
+def record_completed_events(session_id, events) -> list:
+    """
+    Записать завершенные события [(event_key, choice_id, game_day), ...]
+
+    Возвращает ключи новых событий; уже завершенные в результат не попадают.
+    Они отсекаются по списку сессии из кэша, а если его нет — по ключам
+    из БД (один запрос только по записываемым ключам). Вызывающий держит
+    блокировку строки сессии (select_for_update), чтобы параллельный
+    дубликат не прошел проверку; ON CONFLICT DO NOTHING остается защитой.
+    """
+    cached = cache.get(_key(session_id))
+    if cached is not None:
+        done = {event_key for event_key, _, _ in cached}
+    else:
+        done = set(
+            CompletedEvent.objects.filter(
+                session_id=session_id, event_key__in={event_key for event_key, _, _ in events}
+            ).values_list('event_key', flat=True)
+        )
+    new_events = []
+    for event_key, choice_id, game_day in events:
+        if event_key not in done:
+            done.add(event_key)
+            new_events.append((event_key, choice_id, game_day))
+    if not new_events:
+        return []
+
+    template_ids = get_event_template_ids()
+    if any(event_key not in template_ids for event_key, _, _ in new_events):
+        # Соответствие в памяти могло устареть раньше, чем сменилась версия каталога
+        template_ids = get_event_template_ids(refresh=True)
+    CompletedEvent.objects.bulk_create([
+        CompletedEvent(
+            session_id=session_id,
+            event_template_id=template_ids.get(event_key),
+            event_key=event_key,
+            choice_id=choice_id,
+            game_day=game_day
+        )
+        for event_key, choice_id, game_day in new_events
+    ], ignore_conflicts=True)
+    forget_completed_events(session_id)
+    return [event_key for event_key, _, _ in new_events]
@@ -0,0 +1,251 @@
+"""
+Движок симуляции игры
+
+Правила игры (смена дня, найм, маркетинг, офис, случайные события) без
+обращений к БД: действие меняет компактное состояние GameState и
+возвращает Outcome — данные ответа и события для записи в журнал.
+Случайность берется из генератора, засеянного (rng_seed, rng_step)
+сессии, поэтому одинаковая последовательность действий с тем же seed
+всегда дает тот же результат (replay), а день можно прокрутить без БД.
+
+View загружает состояние из сессии, вызывает apply_action и сохраняет
+только изменившиеся поля (GameState.diff).
+"""
+import random
+import secrets
+
+# Поля GameSession, с которыми работает движок
+STATE_FIELDS = ('day', 'money', 'reputation', 'employees', 'customers', 'rng_step')
+
+RANDOM_EVENT_CHANCE = 0.3
+EMPLOYEE_SALARY = 50
+CUSTOMER_INCOME = 10
+MARKETING_COST = 300
+OFFICE_UPGRADE_COST = 500
+
+
+def new_rng_seed() -> int:
+    """Seed генератора для новой сессии"""
+    return secrets.randbits(62)
+
+
+class ActionError(Exception):
+    """Действие невозможно в текущем состоянии (например, не хватает денег)"""
+
+
+class GameState:
+    """Состояние компании, которым оперирует движок"""
+
+    __slots__ = STATE_FIELDS + ('rng_seed',)
+
+    def __init__(self, rng_seed: int, day=1, money=500, reputation=0, employees=1, customers=0, rng_step=0):
+        self.rng_seed = rng_seed
+        self.day = day
+        self.money = money
+        self.reputation = reputation
+        self.employees = employees
+        self.customers = customers
+        self.rng_step = rng_step
+
+    @classmethod
+    def from_session(cls, session):
+        return cls(session.rng_seed, **{field: getattr(session, field) for field in STATE_FIELDS})
+
+    def copy(self):
+        return GameState(self.rng_seed, **{field: getattr(self, field) for field in STATE_FIELDS})
+
+    def diff(self, before) -> dict:
+        """Изменившиеся относительно before поля: {поле: новое значение}"""
+        return {
+            field: getattr(self, field)
+            for field in STATE_FIELDS
+            if getattr(self, field) != getattr(before, field)
+        }
+
+    def rng(self) -> random.Random:
+        """Генератор текущего шага: зависит только от seed и номера шага"""
+        return random.Random(self.rng_seed * 2 ** 32 + self.rng_step)
+
+
+class Outcome:
+    """Результат действия: данные для ответа и события для журнала GameEvent"""
+
+    __slots__ = ('data', 'events')
+
+    def __init__(self, data: dict, events: list = None):
+        self.data = data
+        self.events = events or []
+
+
+def _event(event_type, title, description, day, **changes) -> dict:
+    return {
+        'event_type': event_type,
+        'title': title,
+        'description': description,
+        'day_occurred': day,
+        'money_change': changes.get('money_change', 0),
+        'reputation_change': changes.get('reputation_change', 0),
+        'employees_change': changes.get('employees_change', 0),
+        'customers_change': changes.get('customers_change', 0),
+    }
+
+
+def _spend(state, cost):
+    if state.money < cost:
+        raise ActionError('Недостаточно денег')
+    state.money -= cost
+
+
+def random_event(state, rng):
+    """Случайное событие дня; возвращает данные события для клиента"""
+    kind = rng.randrange(3)
+    if kind == 0:
+        event_data = {
+            'type': 'opportunity',
+            'title': 'Крупный клиент',
+            'description': 'К вам обратился крупный клиент с выгодным предложением!',
+            'money_change': rng.randint(200, 500),
+            'customers_change': rng.randint(2, 5),
+        }
+    elif kind == 1:
+        event_data = {
+            'type': 'challenge',
+            'title': 'Конкуренты',
+            'description': 'Конкуренты запустили агрессивную маркетинговую кампанию.',
+            'customers_change': -rng.randint(1, 3),
+            'reputation_change': -rng.randint(1, 2),
+        }
+    else:
+        event_data = {
+            'type': 'news',
+            'title': 'Положительные отзывы',
+            'description': 'В прессе появились положительные отзывы о вашей компании!',
+            'reputation_change': rng.randint(2, 4),
+            'customers_change': rng.randint(1, 3),
+        }
+
+    state.money += event_data.get('money_change', 0)
+    state.reputation += event_data.get('reputation_change', 0)
+    state.customers += event_data.get('customers_change', 0)
+    state.employees += event_data.get('employees_change', 0)
+    return event_data
+
+
+def next_day(state, rng) -> Outcome:
+    """Переход к следующему дню: доход, зарплаты, случайное событие"""
+    state.day += 1
+
+    daily_income = state.customers * CUSTOMER_INCOME + rng.randint(0, 100)
+    state.money += daily_income
+    daily_expenses = state.employees * EMPLOYEE_SALARY
+    state.money -= daily_expenses
+
+    data = {
+        'daily_income': daily_income,
+        'daily_expenses': daily_expenses,
+    }
+    events = []
+    if rng.random() < RANDOM_EVENT_CHANCE:
+        event_data = random_event(state, rng)
+        data['event'] = event_data
+        events.append(_event(
+            event_data['type'], event_data['title'], event_data['description'], state.day,
+            **{key: value for key, value in event_data.items() if key.endswith('_change')}
+        ))
+
+    data.update(
+        day=state.day,
+        money=state.money,
+        reputation=state.reputation,
+        employees=state.employees,
+        customers=state.customers,
+    )
+    return Outcome(data, events)
+
+
+def hire_employee(state, rng) -> Outcome:
+    """Найм сотрудника; стоимость растет с размером команды"""
+    cost = 200 + state.employees * EMPLOYEE_SALARY
+    _spend(state, cost)
+    state.employees += 1
+
+    return Outcome({
+        'money': state.money,
+        'employees': state.employees,
+        'message': f'Нанят новый сотрудник! Стоимость: {cost}$'
+    }, [_event(
+        'decision', 'Нанят новый сотрудник',
+        f'Вы наняли нового сотрудника за {cost}$. Теперь у вас {state.employees} сотрудников.',
+        state.day, money_change=-cost, employees_change=1
+    )])
+
+
+def marketing_campaign(state, rng) -> Outcome:
+    """Маркетинговая кампания: клиенты и репутация"""
+    _spend(state, MARKETING_COST)
+    new_customers = rng.randint(5, 15)
+    reputation_gain = rng.randint(1, 3)
+    state.customers += new_customers
+    state.reputation += reputation_gain
+
+    return Outcome({
+        'money': state.money,
+        'customers': state.customers,
+        'reputation': state.reputation,
+        'message': f'Кампания успешна! +{new_customers} клиентов, +{reputation_gain} репутации'
+    }, [_event(
+        'decision', 'Маркетинговая кампания',
+        f'Ваша маркетинговая кампания привлекла {new_customers} новых клиентов и повысила репутацию на {reputation_gain}.',
+        state.day, money_change=-MARKETING_COST, customers_change=new_customers, reputation_change=reputation_gain
+    )])
+
+
+def upgrade_office(state, rng) -> Outcome:
+    """Улучшение офиса: репутация"""
+    _spend(state, OFFICE_UPGRADE_COST)
+    reputation_gain = rng.randint(2, 5)
+    state.reputation += reputation_gain
+
+    return Outcome({
+        'money': state.money,
+        'reputation': state.reputation,
+        'message': f'Офис улучшен! +{reputation_gain} репутации'
+    }, [_event(
+        'decision', 'Улучшение офиса',
+        f'Вы улучшили офис, что повысило репутацию компании на {reputation_gain}.',
+        state.day, money_change=-OFFICE_UPGRADE_COST, reputation_change=reputation_gain
+    )])
+
+
+ACTIONS = {
+    'next_day': next_day,
+    'hire_employee': hire_employee,
+    'marketing_campaign': marketing_campaign,
+    'upgrade_office': upgrade_office,
+}
+
+
+def apply_action(state: GameState, action: str) -> Outcome:
+    """
+    Применить действие к состоянию
+
+    action должно быть ключом ACTIONS (вызывающий проверяет заранее).
+    ActionError — действие невозможно, состояние при этом не меняется.
+    """
+    handler = ACTIONS[action]
+    trial = state.copy()
+    outcome = handler(trial, trial.rng())
+    trial.rng_step += 1
+    for field in STATE_FIELDS:
+        setattr(state, field, getattr(trial, field))
+    return outcome
+
+
+def replay(state: GameState, actions) -> GameState:
+    """Проиграть последовательность действий (невозможные пропускаются)"""
+    for action in actions:
+        try:
+            apply_action(state, action)
+        except ActionError:
+            continue
+    return state
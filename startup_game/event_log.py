@@ -0,0 +1,192 @@
+"""
+Журнал игровых событий (GameEvent)
+
+События действий игры пишутся с задержкой: после фиксации транзакции
+действия они попадают в буфер процесса game_event_log, и фоновый поток
+раз в EVENT_FLUSH_INTERVAL секунд вставляет события всех сессий одним
+bulk_create (или раньше, если набралась пачка INSERT_BATCH_SIZE). Буфер
+сбрасывается и при завершении процесса; при аварийном падении теряется не
+более EVENT_FLUSH_INTERVAL секунд журнала — состояние сессии при этом уже
+сохранено.
+
+Журнал не важнее доступности игры: если вставка не удалась
+EVENT_FLUSH_ATTEMPTS раз подряд (битая строка, расхождение схемы, долгий
+простой БД), накопленные события отбрасываются с записью в лог, а буфер
+не растет больше MAX_PENDING_EVENTS — лишние старые события тоже
+отбрасываются.
+
+Старые записи сворачиваются в дневные итоги GameEventDailyAggregate
+командой rollup_game_events, чтобы таблица событий не росла бесконечно:
+детальные события хранятся GAME_EVENT_RETENTION_DAYS дней, дальше остаются
+только суммы по (сессия, игровой день, тип события).
+"""
+import atexit
+import logging
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+from .flusher import BackgroundFlusher
+from .models import GameEvent, GameEventDailyAggregate, GameSession
+
+logger = logging.getLogger(__name__)
+
+# Сколько дней хранятся детальные записи событий
+GAME_EVENT_RETENTION_DAYS = 30
+
+# Период фонового сброса журнала, секунд
+EVENT_FLUSH_INTERVAL = 15
+
+INSERT_BATCH_SIZE = 500
+
+# Сколько раз подряд повторять неудачную вставку, прежде чем отбросить события
+EVENT_FLUSH_ATTEMPTS = 3
+
+# Предел буфера: при переполнении отбрасываются самые старые события
+MAX_PENDING_EVENTS = 50000
+
+CHANGE_FIELDS = ('money_change', 'reputation_change', 'employees_change', 'customers_change')
+
+
+class EventLogWriter(BackgroundFlusher):
+    """Буфер записей GameEvent процесса: события всех сессий вставляются пакетно"""
+
+    thread_name = 'game-event-flusher'
+    flushed_message = 'Записано игровых событий: %d'
+    error_message = 'Ошибка записи журнала игровых событий'
+
+    def __init__(self, interval: float = EVENT_FLUSH_INTERVAL, batch_size: int = INSERT_BATCH_SIZE,
+                 attempts: int = EVENT_FLUSH_ATTEMPTS, max_pending: int = MAX_PENDING_EVENTS):
+        super().__init__(interval)
+        self.batch_size = batch_size
+        self.attempts = attempts
+        self.max_pending = max_pending
+        self._events = []
+        self._failures = 0  # неудачных вставок подряд
+
+    def add(self, session, events):
+        """Поставить события сессии в очередь записи после фиксации текущей транзакции"""
+        rows = [GameEvent(session_id=session.pk, **fields) for fields in events]
+        if rows:
+            transaction.on_commit(lambda: self._enqueue(rows))
+
+    def pending(self) -> int:
+        """Число событий, еще не записанных в БД"""
+        with self._lock:
+            return len(self._events)
+
+    def _enqueue(self, rows):
+        with self._lock:
+            self._events.extend(rows)
+            self._trim()
+            # После неудачной вставки повторы идут только из фонового потока, раз в интервал
+            full = len(self._events) >= self.batch_size and not self._failures
+            self._ensure_flusher()
+        if full:
+            try:
+                self.flush()
+            except Exception:
+                logger.exception(self.error_message)
+
+    def _trim(self):
+        """Отбросить самые старые события сверх max_pending (вызывается под self._lock)"""
+        overflow = len(self._events) - self.max_pending
+        if overflow > 0:
+            del self._events[:overflow]
+            logger.error('Буфер журнала игровых событий переполнен, отброшено событий: %d', overflow)
+
+    def flush(self) -> int:
+        """Вставить накопленные события одним bulk_create; возвращает их число"""
+        with self._lock:
+            events, self._events = self._events, []
+        if not events:
+            return 0
+
+        try:
+            # События удаленных за время ожидания сессий не вставляем
+            existing = set(
+                GameSession.objects.filter(pk__in={event.session_id for event in events}).values_list('pk', flat=True)
+            )
+            events = [event for event in events if event.session_id in existing]
+            GameEvent.objects.bulk_create(events, batch_size=self.batch_size)
+        except Exception:
+            with self._lock:
+                self._failures += 1
+                dropped = self._failures >= self.attempts
+                if dropped:
+                    self._failures = 0
+                else:
+                    self._events[:0] = events
+                    self._trim()
+            if dropped:
+                logger.error(
+                    'Журнал игровых событий не записан за %d попыток, отброшено событий: %d',
+                    self.attempts, len(events)
+                )
+            raise
+        with self._lock:
+            self._failures = 0
+        return len(events)
+
+
+game_event_log = EventLogWriter()
+atexit.register(game_event_log.shutdown)
+
+
+def rollup_old_events(older_than_days: int = GAME_EVENT_RETENTION_DAYS, sessions_per_batch: int = 500,
+                      dry_run: bool = False):
+    """
+    Свернуть события старше older_than_days дней в дневные итоги
+
+    Обрабатывает сессии пачками, каждая пачка — отдельная транзакция.
+    Возвращает (число свернутых событий, число затронутых итогов).
+    """
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    old_events = GameEvent.objects.filter(created_at__lt=cutoff)
+    if dry_run:
+        rows = old_events.values('session_id', 'day_occurred', 'event_type').distinct().count()
+        return old_events.count(), rows
+
+    rolled_events = touched_aggregates = 0
+    last_session_id = 0
+    while True:
+        session_ids = list(
+            old_events.filter(session_id__gt=last_session_id)
+            .order_by('session_id').values_list('session_id', flat=True).distinct()[:sessions_per_batch]
+        )
+        if not session_ids:
+            break
+        last_session_id = session_ids[-1]
+
+        with transaction.atomic():
+            batch = old_events.filter(session_id__in=session_ids)
+            totals = batch.order_by().values('session_id', 'day_occurred', 'event_type').annotate(
+                events_count=Count('id'), **{field: Sum(field) for field in CHANGE_FIELDS}
+            )
+            existing = {
+                (aggregate.session_id, aggregate.day_occurred, aggregate.event_type): aggregate
+                for aggregate in GameEventDailyAggregate.objects.select_for_update().filter(session_id__in=session_ids)
+            }
+
+            to_create, to_update = [], []
+            for row in totals:
+                key = (row['session_id'], row['day_occurred'], row['event_type'])
+                aggregate = existing.get(key)
+                if aggregate is None:
+                    to_create.append(GameEventDailyAggregate(**row))
+                    continue
+                aggregate.events_count += row['events_count']
+                for field in CHANGE_FIELDS:
+                    setattr(aggregate, field, getattr(aggregate, field) + row[field])
+                to_update.append(aggregate)
+
+            GameEventDailyAggregate.objects.bulk_create(to_create, batch_size=INSERT_BATCH_SIZE)
+            GameEventDailyAggregate.objects.bulk_update(
+                to_update, ['events_count', *CHANGE_FIELDS], batch_size=INSERT_BATCH_SIZE
+            )
+            deleted, _ = batch.delete()
+
+        rolled_events += deleted
+        touched_aggregates += len(to_create) + len(to_update)
+
+    return rolled_events, touched_aggregates
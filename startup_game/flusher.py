@@ -0,0 +1,59 @@
+"""
+Фоновый сброс буферов процесса
+
+Буфер игрового времени (time_buffer) и журнал событий (event_log) копят
+записи в процессе и пишут их в БД пакетами. Общая часть — поток, который
+раз в interval секунд вызывает flush(), и сброс остатка при завершении
+процесса — находится в BackgroundFlusher.
+
+Поток запускается при первой записи в буфер, то есть уже после fork
+воркера gunicorn, а не при импорте модуля в мастер-процессе.
+"""
+import logging
+import threading
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundFlusher:
+    """Основа буфера с фоновым сбросом: наследник реализует flush() -> число записей"""
+
+    thread_name = 'buffer-flusher'
+    flushed_message = 'Сброшено записей: %d'
+    error_message = 'Ошибка сброса буфера'
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def flush(self) -> int:
+        raise NotImplementedError
+
+    def _ensure_flusher(self):
+        """Запустить фоновый поток, если он еще не работает (вызывается под self._lock)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                flushed = self.flush()
+                if flushed:
+                    logger.debug(self.flushed_message, flushed)
+            except Exception:
+                logger.exception(self.error_message)
+            finally:
+                close_old_connections()
+
+    def shutdown(self):
+        """Остановить фоновый поток и сбросить остаток буфера"""
+        self._stop.set()
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('%s при завершении', self.error_message)
@@ -0,0 +1,119 @@
+"""
+Глобальный рейтинг игры
+
+Показатели каждой сессии копируются в LeaderboardEntry при сохранении
+сессии (post_save GameSession, подключается в StartupGameConfig.ready) и
+при сбросе буфера игрового времени. Топ-N читается по индексу
+(-метрика, id) без сортировки всех сессий.
+
+Место игрока — число строк перед его лучшей строкой в том же порядке
+(-метрика, id): два подсчета по диапазонам того же индекса (строки с
+большим значением и строки с тем же значением и меньшим id), без
+сортировки и загрузки значений в память; место всегда согласовано с топом
+на странице. Стоимость подсчета — O(место), а не O(log n): индекс B-tree
+не хранит размеры поддеревьев, и для игроков в конце рейтинга это почти
+O(n) записей индекса (без чтения таблицы). Общее число строк кэшируется
+на LEADERBOARD_TOTAL_TIMEOUT секунд.
+"""
+from django.core.cache import cache
+from django.db.models import Case, Value, When
+from .models import LeaderboardEntry
+
+# Метрики рейтинга: поле -> название
+LEADERBOARD_METRICS = {
+    'money': 'Деньги',
+    'reputation': 'Репутация',
+    'day': 'Дней прожито',
+}
+
+# Поля сессии, изменение которых обновляет строку рейтинга
+TRACKED_FIELDS = frozenset(('company_name', 'money', 'reputation', 'day'))
+
+TOTAL_KEY = 'startup_game:leaderboard:total'
+
+# Время жизни кэша общего числа строк рейтинга, секунд
+LEADERBOARD_TOTAL_TIMEOUT = 60
+
+LEADERBOARD_MAX_LIMIT = 100
+
+
+def update_leaderboard(sender, instance, created=False, update_fields=None, **kwargs):
+    """Обработчик post_save GameSession: upsert строки рейтинга одним запросом"""
+    if update_fields is not None and not TRACKED_FIELDS.intersection(update_fields):
+        return
+    LeaderboardEntry.objects.bulk_create([
+        LeaderboardEntry(
+            session_id=instance.pk,
+            user_id=instance.user_id,
+            company_name=instance.company_name,
+            money=instance.money,
+            reputation=instance.reputation,
+            day=instance.day,
+        )
+    ], update_conflicts=True, unique_fields=['session'],
+        update_fields=['company_name', 'money', 'reputation', 'day', 'updated_at'])
+
+
+def update_leaderboard_days(days: dict):
+    """Обновить дни сессий {session_id: day} одним UPDATE (после пакетной записи игрового времени)"""
+    if not days:
+        return
+    day = Case(*[When(session_id=session_id, then=Value(value)) for session_id, value in days.items()])
+    # День только растет: строку могло уже обновить сохранение сессии с более новым днем
+    LeaderboardEntry.objects.filter(session_id__in=days, day__lt=day).update(day=day)
+
+
+def get_rank(metric: str, entry) -> int:
+    """
+    Место строки в рейтинге по метрике: 1 + число строк перед ней в порядке (-метрика, id)
+
+    Два подсчета по диапазонам индекса (-метрика, id), каждый O(место).
+    """
+    value = getattr(entry, metric)
+    higher = LeaderboardEntry.objects.filter(**{f'{metric}__gt': value}).count()
+    tied_ahead = LeaderboardEntry.objects.filter(**{metric: value, 'id__lt': entry.id}).count()
+    return higher + tied_ahead + 1
+
+
+def get_total() -> int:
+    """Число строк рейтинга (кэшируется)"""
+    total = cache.get(TOTAL_KEY)
+    if total is None:
+        total = LeaderboardEntry.objects.count()
+        cache.set(TOTAL_KEY, total, LEADERBOARD_TOTAL_TIMEOUT)
+    return total
+
+
+def _entry_data(entry, metric) -> dict:
+    return {
+        'company_name': entry.company_name,
+        'username': entry.user.username,
+        'value': getattr(entry, metric),
+        'money': entry.money,
+        'reputation': entry.reputation,
+        'day': entry.day,
+    }
+
+
+def get_leaderboard(metric: str, limit: int = 20, user=None) -> dict:
+    """Топ-N по метрике и лучшее место пользователя"""
+    if metric not in LEADERBOARD_METRICS:
+        raise ValueError(f'Неизвестная метрика рейтинга: {metric}')
+    limit = max(1, min(limit, LEADERBOARD_MAX_LIMIT))
+
+    top = LeaderboardEntry.objects.select_related('user').order_by(f'-{metric}', 'id')[:limit]
+    result = {
+        'metric': metric,
+        'title': LEADERBOARD_METRICS[metric],
+        'top': [dict(_entry_data(entry, metric), rank=position) for position, entry in enumerate(top, 1)],
+        'me': None,
+    }
+
+    if user is not None and user.is_authenticated:
+        best = LeaderboardEntry.objects.select_related('user').filter(user=user).order_by(f'-{metric}', 'id').first()
+        if best is not None:
+            rank = get_rank(metric, best)
+            # Строка могла появиться после кэширования общего числа
+            result['me'] = dict(_entry_data(best, metric), rank=rank, total=max(get_total(), rank))
+
+    return result
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+from startup_game.event_log import GAME_EVENT_RETENTION_DAYS, rollup_old_events
+
+
+class Command(BaseCommand):
+    """Свертка старых GameEvent в дневные итоги (запускать по cron)"""
+    help = 'Сворачивает старые игровые события в дневные итоги по сессиям и удаляет детальные записи'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int, default=GAME_EVENT_RETENTION_DAYS,
+                            help=f'Сворачивать события старше N дней (по умолчанию {GAME_EVENT_RETENTION_DAYS})')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Сессий в одной транзакции (по умолчанию 500)')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Только показать, сколько событий будет свернуто')
+
+    def handle(self, *args, **options):
+        if options['older_than_days'] < 0 or options['batch_size'] < 1:
+            raise CommandError('--older-than-days и --batch-size должны быть положительными')
+
+        events, aggregates = rollup_old_events(
+            options['older_than_days'], options['batch_size'], dry_run=options['dry_run']
+        )
+
+        if options['dry_run']:
+            self.stdout.write(f'Будет свернуто событий: {events} в {aggregates} дневных итогов')
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Свернуто событий: {events}, обновлено итогов: {aggregates}'))
@@ -0,0 +1,121 @@
+import os
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Prefetch
+from startup_game.models import EventTemplate, EventChoice
+
+
+class Command(BaseCommand):
+    """Монте-Карло симуляция баланса событий и вариантов выбора"""
+    help = 'Симулирует десятки тысяч игр по событиям из БД и показывает банкротства, дни до победы и частоту событий'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sessions', type=int, default=20000,
+                            help='Количество симулируемых игр (по умолчанию 20000)')
+        parser.add_argument('--days', type=int, default=120,
+                            help='Максимальная длина игры в днях (по умолчанию 120)')
+        parser.add_argument('--victory-money', type=int, default=10000,
+                            help='Сумма денег, которая считается победой (по умолчанию 10000)')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Количество процессов (по умолчанию число CPU, 1 — без multiprocessing)')
+        parser.add_argument('--seed', type=int, help='Seed для воспроизводимого результата')
+        parser.add_argument('--top', type=int, default=20,
+                            help='Сколько событий и вариантов показать в частотах (по умолчанию 20)')
+
+    def handle(self, *args, **options):
+        try:
+            from startup_game import balance
+        except ImportError:
+            raise CommandError('Для симуляции нужен NumPy: pip install numpy')
+
+        if options['sessions'] < 1 or options['days'] < 1:
+            raise CommandError('--sessions и --days должны быть положительными')
+
+        catalogue, event_keys, choice_labels = self.load_catalogue(balance.STATS)
+        if not event_keys:
+            raise CommandError('Нет активных событий (EventTemplate)')
+
+        self.stdout.write(
+            f'Событий: {len(event_keys)}, вариантов: {len(choice_labels)}; '
+            f'игр: {options["sessions"]}, дней: {options["days"]}, процессов: {options["workers"]}'
+        )
+        started = time.perf_counter()
+        result = balance.run_simulation(
+            catalogue, options['sessions'], options['seed'], options['days'],
+            options['victory_money'], workers=options['workers']
+        )
+        elapsed = time.perf_counter() - started
+
+        self.report(balance, result, event_keys, choice_labels, options)
+        self.stdout.write(self.style.SUCCESS(f'Симуляция заняла {elapsed:.1f}с'))
+
+    def load_catalogue(self, stats):
+        """Каталог событий в виде списков для balance.simulate_chunk"""
+        events = list(EventTemplate.objects.filter(is_active=True).order_by('order').prefetch_related(
+            Prefetch('choices', queryset=EventChoice.objects.order_by('order'))
+        ))
+        index = {event.key: i for i, event in enumerate(events)}
+
+        catalogue = {
+            'trigger_type': [], 'random_chance': [], 'min_day': [], 'max_day': [],
+            'choice_event': [], 'money_cost': [], 'time_cost': [], 'next_event_delay': [],
+            'effects': [], 'next_events': [],
+        }
+        choice_labels = []
+        for i, event in enumerate(events):
+            catalogue['trigger_type'].append(event.trigger_type)
+            catalogue['random_chance'].append(event.random_chance)
+            catalogue['min_day'].append(event.min_day)
+            catalogue['max_day'].append(event.max_day or 0)
+            for choice in event.choices.all():
+                catalogue['choice_event'].append(i)
+                catalogue['money_cost'].append(choice.money_cost)
+                catalogue['time_cost'].append(choice.time_cost)
+                catalogue['next_event_delay'].append(choice.next_event_delay)
+                catalogue['effects'].append([getattr(choice, f'{stat}_effect') for stat in stats])
+                # Связанные события, которых нет среди активных, не появятся и в игре
+                catalogue['next_events'].append([
+                    index[key.strip()] for key in choice.next_events.split(',') if key.strip() in index
+                ])
+                choice_labels.append(f'{event.key}/{choice.choice_id}')
+
+        return catalogue, [event.key for event in events], choice_labels
+
+    def report(self, balance, result, event_keys, choice_labels, options):
+        import numpy as np
+
+        sessions = result['sessions']
+        bankrupt_days = result['bankrupt_days']
+        victory_days = result['victory_days']
+
+        self.stdout.write('')
+        self.stdout.write(f'Банкротства: {len(bankrupt_days) / sessions:.1%}'
+                          + (f' (медиана — день {np.median(bankrupt_days):.0f})' if len(bankrupt_days) else ''))
+        if len(victory_days):
+            p25, p50, p75 = np.percentile(victory_days, [25, 50, 75])
+            self.stdout.write(f'Победы (>= {options["victory_money"]}$): {len(victory_days) / sessions:.1%}, '
+                              f'дней до победы: медиана {p50:.0f} (p25 {p25:.0f}, p75 {p75:.0f})')
+        else:
+            self.stdout.write(f'Победы (>= {options["victory_money"]}$): 0%')
+        unfinished = sessions - len(bankrupt_days) - len(victory_days)
+        self.stdout.write(f'Не закончили за {options["days"]} дней: {unfinished / sessions:.1%}')
+
+        averages = ', '.join(
+            f'{stat}={total / sessions:.1f}' for stat, total in zip(balance.STATS, result['final_state'])
+        )
+        self.stdout.write(f'Средние итоговые значения: {averages}')
+
+        self.stdout.write('')
+        self.stdout.write('Частота событий (на 100 игр):')
+        event_counts = result['event_counts']
+        for i in np.argsort(-event_counts)[:options['top']]:
+            self.stdout.write(f'  {event_keys[i]:<40} {event_counts[i] * 100 / sessions:8.1f}')
+        never = [event_keys[i] for i in np.flatnonzero(event_counts == 0)]
+        if never:
+            self.stdout.write(self.style.WARNING(f'Ни разу не произошли: {", ".join(never)}'))
+
+        self.stdout.write('')
+        self.stdout.write('Частота вариантов (на 100 игр):')
+        choice_counts = result['choice_counts']
+        for i in np.argsort(-choice_counts)[:options['top']]:
+            self.stdout.write(f'  {choice_labels[i]:<40} {choice_counts[i] * 100 / sessions:8.1f}')
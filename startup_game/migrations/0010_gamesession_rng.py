@@ -0,0 +1,34 @@
+# Generated manually on 2026-10-19
+
+from django.db import migrations, models
+import startup_game.engine
+
+
+def seed_existing_sessions(apps, schema_editor):
+    """У каждой существующей сессии свой seed"""
+    GameSession = apps.get_model('startup_game', 'GameSession')
+    sessions = list(GameSession.objects.only('id'))
+    for session in sessions:
+        session.rng_seed = startup_game.engine.new_rng_seed()
+    GameSession.objects.bulk_update(sessions, ['rng_seed'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('startup_game', '0009_add_event_chains_and_random_events'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gamesession',
+            name='rng_seed',
+            field=models.BigIntegerField(default=startup_game.engine.new_rng_seed),
+        ),
+        migrations.AddField(
+            model_name='gamesession',
+            name='rng_step',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(seed_existing_sessions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated manually on 2026-10-19
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('startup_game', '0010_gamesession_rng'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='gameevent',
+            index=models.Index(fields=['created_at'], name='startup_gameevent_created_idx'),
+        ),
+        migrations.CreateModel(
+            name='GameEventDailyAggregate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day_occurred', models.IntegerField()),
+                ('event_type', models.CharField(choices=[('opportunity', 'Возможность'), ('challenge', 'Вызов'), ('news', 'Новость'), ('decision', 'Решение')], max_length=20)),
+                ('events_count', models.PositiveIntegerField(default=0)),
+                ('money_change', models.IntegerField(default=0)),
+                ('reputation_change', models.IntegerField(default=0)),
+                ('employees_change', models.IntegerField(default=0)),
+                ('customers_change', models.IntegerField(default=0)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='event_aggregates', to='startup_game.gamesession')),
+            ],
+            options={
+                'verbose_name': 'Game Event Daily Aggregate',
+                'verbose_name_plural': 'Game Event Daily Aggregates',
+                'ordering': ['-day_occurred'],
+                'unique_together': {('session', 'day_occurred', 'event_type')},
+            },
+        ),
+    ]
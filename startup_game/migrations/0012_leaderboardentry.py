@@ -0,0 +1,51 @@
+# Generated manually on 2026-10-19
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_leaderboard(apps, schema_editor):
+    """Строки рейтинга для уже существующих сессий"""
+    GameSession = apps.get_model('startup_game', 'GameSession')
+    LeaderboardEntry = apps.get_model('startup_game', 'LeaderboardEntry')
+    sessions = GameSession.objects.values_list('id', 'user_id', 'company_name', 'money', 'reputation', 'day')
+    LeaderboardEntry.objects.bulk_create([
+        LeaderboardEntry(session_id=session_id, user_id=user_id, company_name=company_name,
+                         money=money, reputation=reputation, day=day)
+        for session_id, user_id, company_name, money, reputation, day in sessions.iterator()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('startup_game', '0011_gameevent_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('company_name', models.CharField(max_length=100)),
+                ('money', models.IntegerField(default=0)),
+                ('reputation', models.IntegerField(default=0)),
+                ('day', models.IntegerField(default=1)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('session', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entry', to='startup_game.gamesession')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Leaderboard Entry',
+                'verbose_name_plural': 'Leaderboard Entries',
+                'indexes': [
+                    models.Index(fields=['-money', 'id'], name='startup_lb_money_idx'),
+                    models.Index(fields=['-reputation', 'id'], name='startup_lb_reputation_idx'),
+                    models.Index(fields=['-day', 'id'], name='startup_lb_day_idx'),
+                ],
+            },
+        ),
+        migrations.RunPython(fill_leaderboard, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated manually on 2026-10-19
+
+from django.db import migrations, models
+
+
+def deactivate_duplicate_sessions(apps, schema_editor):
+    """Оставить активной только последнюю обновленную сессию каждого пользователя"""
+    GameSession = apps.get_model('startup_game', 'GameSession')
+    keep = set()
+    stale = []
+    sessions = GameSession.objects.filter(is_active=True).order_by('user_id', '-updated_at', '-id')
+    for session_id, user_id in sessions.values_list('id', 'user_id').iterator():
+        if user_id in keep:
+            stale.append(session_id)
+        else:
+            keep.add(user_id)
+    for start in range(0, len(stale), 500):
+        GameSession.objects.filter(id__in=stale[start:start + 500]).update(is_active=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('startup_game', '0012_leaderboardentry'),
+    ]
+
+    operations = [
+        migrations.RunPython(deactivate_duplicate_sessions, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='gamesession',
+            constraint=models.UniqueConstraint(
+                condition=models.Q(('is_active', True)),
+                fields=('user',),
+                name='startup_game_one_active_session_per_user',
+            ),
+        ),
+    ]
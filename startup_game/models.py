@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
+from .engine import new_rng_seed
 
 
 class GameSession(models.Model):
@@ -53,10 +54,22 @@ class GameSession(models.Model):
     victory = models.BooleanField(default=False)
     game_paused = models.BooleanField(default=False)  # Пауза для событий
     
+    # Генератор случайных чисел движка (engine.py): seed сессии и номер шага
+    rng_seed = models.BigIntegerField(default=new_rng_seed)
+    rng_step = models.PositiveIntegerField(default=0)
+    
     class Meta:
         verbose_name = 'Game Session'
         verbose_name_plural = 'Game Sessions'
         ordering = ['-updated_at']
+        constraints = [
+            # Не больше одной активной сессии на пользователя
+            models.UniqueConstraint(
+                fields=['user'],
+                condition=models.Q(is_active=True),
+                name='startup_game_one_active_session_per_user',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.company_name} (Day {self.day})"
@@ -88,11 +101,62 @@ class GameEvent(models.Model):
         verbose_name = 'Game Event'
         verbose_name_plural = 'Game Events'
         ordering = ['-day_occurred']
+        indexes = [
+            # Поиск старых событий для свертки (rollup_game_events)
+            models.Index(fields=['created_at'], name='startup_gameevent_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} (Day {self.day_occurred})"
 
 
+class LeaderboardEntry(models.Model):
+    """Строка рейтинга: копия показателей сессии, поддерживается при сохранении сессии"""
+    session = models.OneToOneField(GameSession, on_delete=models.CASCADE, related_name='leaderboard_entry')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='leaderboard_entries')
+    company_name = models.CharField(max_length=100)
+    money = models.IntegerField(default=0)
+    reputation = models.IntegerField(default=0)
+    day = models.IntegerField(default=1)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Leaderboard Entry'
+        verbose_name_plural = 'Leaderboard Entries'
+        indexes = [
+            # Топ-N по каждой метрике читается по индексу без сортировки
+            models.Index(fields=['-money', 'id'], name='startup_lb_money_idx'),
+            models.Index(fields=['-reputation', 'id'], name='startup_lb_reputation_idx'),
+            models.Index(fields=['-day', 'id'], name='startup_lb_day_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.company_name}: {self.money}$ (Day {self.day})"
+
+
+class GameEventDailyAggregate(models.Model):
+    """Свернутые старые события: итоги за игровой день сессии по типу события"""
+    session = models.ForeignKey(GameSession, on_delete=models.CASCADE, related_name='event_aggregates')
+    day_occurred = models.IntegerField()
+    event_type = models.CharField(max_length=20, choices=GameEvent.EVENT_TYPES)
+    events_count = models.PositiveIntegerField(default=0)
+    
+    # Суммарное влияние событий дня
+    money_change = models.IntegerField(default=0)
+    reputation_change = models.IntegerField(default=0)
+    employees_change = models.IntegerField(default=0)
+    customers_change = models.IntegerField(default=0)
+    
+    class Meta:
+        verbose_name = 'Game Event Daily Aggregate'
+        verbose_name_plural = 'Game Event Daily Aggregates'
+        unique_together = ['session', 'day_occurred', 'event_type']
+        ordering = ['-day_occurred']
+    
+    def __str__(self):
+        return f"{self.session_id}: {self.event_type} x{self.events_count} (Day {self.day_occurred})"
+
+
 class Achievement(models.Model):
     """Достижения"""
     name = models.CharField(max_length=100, unique=True)
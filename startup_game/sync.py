@@ -0,0 +1,214 @@
+"""
+Пакетная синхронизация состояния игры
+
+Клиент копит действия (ход времени, выбор, изменение навыка, завершение
+события) и раз в несколько секунд отправляет их одним запросом в
+/game/api/sync/. Действия применяются по порядку в одной транзакции: сессия
+выбирается один раз с блокировкой строки, сохраняются только изменившиеся
+поля, завершенные события записываются одним INSERT (completed_events).
+В ответ уходит состояние сессии после применения — клиент берет из него
+деньги и навыки.
+
+Деньги и навыки клиент не присылает: действие выбора содержит только ключ
+события и id варианта, затраты и эффекты берутся из EventChoice; кружочек
+навыка дает +1; смена дня списывает DAILY_EXPENSES.
+
+Пакет только из тиков времени внутри одного дня не пишет в БД: время уходит
+в буфер time_buffer и сбрасывается пакетно. Если в пакете есть другие
+изменения (в том числе смена дня), время из буфера сохраняется вместе с
+ними. После применения пакета проверяются достижения.
+"""
+from django.db import transaction
+from .models import GameSession, EventChoice
+from .active_session import get_active_session
+from .completed_events import record_completed_events
+from .time_buffer import game_time_buffer
+from .achievements import achievement_evaluator, achievements_payload
+
+# Максимум действий в одном пакете
+SYNC_MAX_ACTIONS = 200
+
+# Максимум очков навыков (кружочков) в одном пакете, лишние не засчитываются
+SYNC_MAX_SKILL_POINTS = 5
+
+MINUTES_PER_DAY = 1440
+
+# Ежедневные расходы компании, списываются при смене дня
+DAILY_EXPENSES = 50
+
+# Эффекты EventChoice -> поле сессии
+CHOICE_EFFECTS = (
+    ('money_effect', 'money'),
+    ('reputation_effect', 'reputation'),
+    ('employees_effect', 'employees'),
+    ('customers_effect', 'customers'),
+    ('prototype_skill_effect', 'prototype_skill'),
+    ('presentation_skill_effect', 'presentation_skill'),
+    ('pitching_skill_effect', 'pitching_skill'),
+    ('team_skill_effect', 'team_skill'),
+    ('marketing_skill_effect', 'marketing_skill'),
+)
+
+SKILL_FIELDS = ('prototype_skill', 'presentation_skill', 'pitching_skill', 'team_skill', 'marketing_skill')
+
+
+class SyncError(ValueError):
+    """Некорректный пакет действий"""
+
+
+def _int(action, name, default=None):
+    value = action.get(name, default)
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise SyncError(f'{action.get("type")}: поле {name} должно быть целым числом')
+    return value
+
+
+def _skill_field(skill_type) -> str:
+    """Поле сессии для навыка ('prototype' и 'prototype_skill' равнозначны)"""
+    field = skill_type if str(skill_type).endswith('_skill') else f'{skill_type}_skill'
+    if field not in SKILL_FIELDS:
+        raise SyncError(f'skill: неизвестный навык {skill_type}')
+    return field
+
+
+def _apply_time(session, action, changed):
+    game_time = _int(action, 'game_time')
+    day = _int(action, 'day')
+    if not 0 <= game_time < MINUTES_PER_DAY or day < 1:
+        raise SyncError('time: некорректное игровое время')
+    # Время не идет назад: устаревшие тики (повтор пакета, вторая вкладка) пропускаем
+    if (day, game_time) <= (session.day, session.game_time):
+        return
+    if day > session.day:
+        session.money -= DAILY_EXPENSES * (day - session.day)
+        changed.add('money')
+    session.day = day
+    session.game_time = game_time
+    changed.update(('day', 'game_time'))
+
+
+def _crosses_day(session, actions: list) -> bool:
+    """Есть ли в пакете тик следующего дня (со списанием расходов)"""
+    return any(isinstance(action.get('day'), int) and action['day'] > session.day for action in actions)
+
+
+def _apply_choice(session, action, changed):
+    """
+    Выбор варианта события: затраты и эффекты из EventChoice
+
+    Неизвестный вариант (событие не из каталога) или вариант, на который не
+    хватает денег, эффектов не дает — только снимает паузу.
+    """
+    choice_id = str(action.get('choice', ''))
+    session.last_decision = choice_id[:GameSession._meta.get_field('last_decision').max_length]
+    session.game_paused = False
+    changed.update(('last_decision', 'game_paused'))
+
+    choice = EventChoice.objects.filter(
+        event_template__key=str(action.get('event_key', '')), choice_id=choice_id
+    ).only('money_cost', *(effect for effect, field in CHOICE_EFFECTS)).first()
+    if choice is None or choice.money_cost > session.money:
+        return
+    session.money -= choice.money_cost
+    changed.add('money')
+    for effect, field in CHOICE_EFFECTS:
+        value = getattr(choice, effect)
+        if value:
+            setattr(session, field, getattr(session, field) + value)
+            changed.add(field)
+
+
+def _apply_skill(session, action, changed, skill_points: int) -> int:
+    """Кружочек навыка: +1 к навыку, не больше SYNC_MAX_SKILL_POINTS за пакет"""
+    field = _skill_field(action.get('skill_type'))
+    if skill_points >= SYNC_MAX_SKILL_POINTS:
+        return skill_points
+    setattr(session, field, getattr(session, field) + 1)
+    changed.add(field)
+    return skill_points + 1
+
+
+def _result(session, applied: int, new_keys: list) -> dict:
+    return {
+        'applied': applied,
+        'completed_events': new_keys,
+        'achievements': achievements_payload(achievement_evaluator.evaluate(session)),
+        'state': {
+            'day': session.day,
+            'game_time': session.game_time,
+            'money': session.money,
+            'skills': {field: getattr(session, field) for field in SKILL_FIELDS},
+        }
+    }
+
+
+def _apply_time_only(session, actions: list):
+    """Пакет из одних тиков времени внутри дня: без блокировки и записи, только буфер"""
+    changed = set()
+    for action in actions:
+        _apply_time(session, action, changed)
+    if changed:
+        game_time_buffer.record(session.pk, session.day, session.game_time)
+    return _result(session, len(actions), [])
+
+
+def apply_sync_actions(request, actions: list):
+    """
+    Применить пакет действий к активной сессии пользователя запроса
+
+    Возвращает словарь с результатом или None, если активной сессии нет.
+    При некорректном действии выбрасывает SyncError, изменения откатываются.
+    """
+    if not isinstance(actions, list):
+        raise SyncError('actions должен быть списком')
+    if len(actions) > SYNC_MAX_ACTIONS:
+        raise SyncError(f'Слишком много действий в пакете (максимум {SYNC_MAX_ACTIONS})')
+
+    if actions and all(isinstance(action, dict) and action.get('type') == 'time' for action in actions):
+        session = get_active_session(request)
+        if session is None:
+            return None
+        game_time_buffer.overlay(session)
+        if not _crosses_day(session, actions):
+            return _apply_time_only(session, actions)
+
+    with transaction.atomic():
+        session = get_active_session(request, GameSession.objects.select_for_update())
+        if session is None:
+            return None
+        game_time_buffer.overlay(session)
+
+        changed = set()
+        skill_points = 0
+        completed = {}  # event_key -> (choice_id, game_day) в порядке завершения
+        for action in actions:
+            if not isinstance(action, dict):
+                raise SyncError('Действие должно быть объектом')
+            action_type = action.get('type')
+            if action_type == 'time':
+                _apply_time(session, action, changed)
+            elif action_type == 'choice':
+                _apply_choice(session, action, changed)
+            elif action_type == 'skill':
+                skill_points = _apply_skill(session, action, changed, skill_points)
+            elif action_type == 'complete_event':
+                event_key = action.get('event_key')
+                if not event_key:
+                    raise SyncError('complete_event: event_key обязателен')
+                completed.setdefault(str(event_key), (str(action.get('choice_id', '')), session.day))
+            else:
+                raise SyncError(f'Неизвестный тип действия: {action_type}')
+
+        new_keys = record_completed_events(
+            session.pk, [(key, choice_id, game_day) for key, (choice_id, game_day) in completed.items()]
+        )
+
+        if changed - {'day', 'game_time'}:
+            # Важный переход: время из буфера сохраняется вместе с остальными полями
+            changed.update(('day', 'game_time', 'updated_at'))
+            session.save(update_fields=changed)
+            transaction.on_commit(lambda: game_time_buffer.discard(session.pk))
+        elif changed:
+            game_time_buffer.record(session.pk, session.day, session.game_time)
+
+    return _result(session, len(actions), new_keys)
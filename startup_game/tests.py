@@ -1,3 +1,400 @@
-from django.test import TestCase
+import json
+import time
+from unittest import mock
 
-# Create your tests here.
\ No newline at end of file
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import DatabaseError, connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .achievements import AchievementEvaluator
+from .completed_events import record_completed_events
+from .event_log import EventLogWriter
+from .leaderboard import get_leaderboard
+from .models import (
+    Achievement, CompletedEvent, EventChoice, EventTemplate, GameEvent, GameSession, LeaderboardEntry,
+    UserAchievement,
+)
+from .time_buffer import GameTimeBuffer
+
+
+class GameTimeBufferTests(TestCase):
+    """Буфер игрового времени: запись, подстановка, сброс в БД"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('player')
+        self.session = GameSession.objects.create(user=self.user, day=1, game_time=480)
+        # Интервал больше времени теста: сбрасываем только явно
+        self.buffer = GameTimeBuffer(interval=3600)
+
+    def tearDown(self):
+        self.buffer._stop.set()
+
+    def assertStoredTime(self, session, day, game_time):
+        session.refresh_from_db(fields=['day', 'game_time'])
+        self.assertEqual((session.day, session.game_time), (day, game_time))
+
+    def test_record_refuses_to_move_time_backwards(self):
+        self.assertTrue(self.buffer.record(self.session.pk, 2, 600))
+        self.assertFalse(self.buffer.record(self.session.pk, 2, 500))
+        self.assertFalse(self.buffer.record(self.session.pk, 1, 900))
+        self.assertFalse(self.buffer.record(self.session.pk, 2, 600))
+        self.assertEqual(self.buffer.get(self.session.pk), (2, 600))
+
+    def test_record_compares_with_loaded_time_when_buffer_is_empty(self):
+        self.assertFalse(self.buffer.record(self.session.pk, 1, 400, current=(1, 480)))
+        self.assertIsNone(self.buffer.get(self.session.pk))
+        self.assertTrue(self.buffer.record(self.session.pk, 1, 490, current=(1, 480)))
+
+    def test_overlay_applies_only_newer_time(self):
+        self.buffer.record(self.session.pk, 3, 100)
+        session = self.buffer.overlay(GameSession.objects.get(pk=self.session.pk))
+        self.assertEqual((session.day, session.game_time), (3, 100))
+
+        GameSession.objects.filter(pk=self.session.pk).update(day=4, game_time=50)
+        session = self.buffer.overlay(GameSession.objects.get(pk=self.session.pk))
+        self.assertEqual((session.day, session.game_time), (4, 50))
+
+    def test_discard_drops_pending_time(self):
+        self.buffer.record(self.session.pk, 2, 600)
+        self.buffer.discard(self.session.pk)
+
+        self.assertIsNone(self.buffer.get(self.session.pk))
+        self.assertEqual(self.buffer.flush(), 0)
+        self.assertStoredTime(self.session, 1, 480)
+
+    def test_flush_writes_all_sessions_in_one_update(self):
+        other = GameSession.objects.create(user=User.objects.create_user('other'), day=5, game_time=100)
+        self.buffer.record(self.session.pk, 2, 600)
+        self.buffer.record(other.pk, 6, 30)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.buffer.flush(), 2)
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE')]
+        # Одна запись сессий и одна строк рейтинга
+        self.assertEqual(len(updates), 2)
+
+        self.assertStoredTime(self.session, 2, 600)
+        self.assertStoredTime(other, 6, 30)
+        self.assertEqual(
+            dict(LeaderboardEntry.objects.values_list('session_id', 'day')),
+            {self.session.pk: 2, other.pk: 6},
+        )
+        self.assertEqual(self.buffer.flush(), 0)
+
+    def test_flush_only_selected_sessions(self):
+        other = GameSession.objects.create(user=User.objects.create_user('other'), day=5, game_time=100)
+        self.buffer.record(self.session.pk, 2, 600)
+        self.buffer.record(other.pk, 6, 30)
+
+        self.assertEqual(self.buffer.flush([self.session.pk]), 1)
+        self.assertStoredTime(self.session, 2, 600)
+        self.assertStoredTime(other, 5, 100)
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertStoredTime(other, 6, 30)
+
+    def test_flush_requeues_sessions_after_failure(self):
+        self.buffer.record(self.session.pk, 2, 600)
+
+        with mock.patch('startup_game.leaderboard.update_leaderboard_days', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                self.buffer.flush()
+
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertStoredTime(self.session, 2, 600)
+        self.assertEqual(LeaderboardEntry.objects.get(session=self.session).day, 2)
+
+    def test_flush_does_not_overwrite_newer_saved_time(self):
+        self.buffer.record(self.session.pk, 2, 600)
+        # Выбор в событии сохранил сессию с более новым временем после записи в буфер
+        self.session.day, self.session.game_time = 3, 60
+        self.session.save()
+
+        self.buffer.flush()
+
+        self.assertStoredTime(self.session, 3, 60)
+        self.assertEqual(LeaderboardEntry.objects.get(session=self.session).day, 3)
+
+    def test_shutdown_flushes_pending_time(self):
+        self.buffer.record(self.session.pk, 2, 600)
+        self.buffer.shutdown()
+        self.assertStoredTime(self.session, 2, 600)
+
+
+class GameTimeBufferFlusherTests(TransactionTestCase):
+    """Фоновый поток сбрасывает время не позже чем через интервал"""
+
+    def setUp(self):
+        cache.clear()
+        self.session = GameSession.objects.create(user=User.objects.create_user('player'), day=1, game_time=480)
+        self.buffer = GameTimeBuffer(interval=0.05)
+
+    def tearDown(self):
+        self.buffer._stop.set()
+        if self.buffer._thread is not None:
+            self.buffer._thread.join()
+
+    def test_background_flush_within_interval(self):
+        self.buffer.record(self.session.pk, 2, 600)
+
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            self.session.refresh_from_db(fields=['day', 'game_time'])
+            if (self.session.day, self.session.game_time) == (2, 600):
+                break
+            time.sleep(0.05)
+        self.assertEqual((self.session.day, self.session.game_time), (2, 600))
+
+
+class EventLogWriterTests(TestCase):
+    """Буфер журнала событий: запись после фиксации, пакетная вставка"""
+
+    def setUp(self):
+        self.session = GameSession.objects.create(user=User.objects.create_user('player'))
+        self.writer = EventLogWriter(interval=3600, batch_size=3)
+
+    def tearDown(self):
+        self.writer._stop.set()
+
+    def event(self, title='Найм', day=1):
+        return {'event_type': 'decision', 'title': title, 'description': '', 'day_occurred': day}
+
+    def test_events_are_queued_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.writer.add(self.session, [self.event()])
+            self.assertEqual(self.writer.pending(), 0)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.writer.pending(), 1)
+        self.assertFalse(GameEvent.objects.exists())
+
+    def test_flush_inserts_events_of_many_requests_at_once(self):
+        other = GameSession.objects.create(user=User.objects.create_user('other'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.writer.add(self.session, [self.event(day=1)])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.writer.add(other, [self.event(day=2)])
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.writer.flush(), 2)
+        inserts = [query['sql'] for query in queries if query['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(GameEvent.objects.count(), 2)
+        self.assertEqual(self.writer.flush(), 0)
+
+    def test_full_batch_is_flushed_immediately(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.writer.add(self.session, [self.event(str(n)) for n in range(3)])
+        self.assertEqual(self.writer.pending(), 0)
+        self.assertEqual(GameEvent.objects.count(), 3)
+
+    def test_failed_events_are_dropped_after_attempts(self):
+        writer = EventLogWriter(interval=3600, attempts=2)
+        self.addCleanup(writer._stop.set)
+        with self.captureOnCommitCallbacks(execute=True):
+            writer.add(self.session, [self.event()])
+
+        with mock.patch.object(GameEvent.objects, 'bulk_create', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                writer.flush()
+            self.assertEqual(writer.pending(), 1)
+            with self.assertRaises(DatabaseError), self.assertLogs('startup_game.event_log', 'ERROR'):
+                writer.flush()
+
+        self.assertEqual(writer.pending(), 0)
+        self.assertFalse(GameEvent.objects.exists())
+
+    def test_buffer_keeps_at_most_max_pending_events(self):
+        writer = EventLogWriter(interval=3600, max_pending=2)
+        self.addCleanup(writer._stop.set)
+        with self.assertLogs('startup_game.event_log', 'ERROR'), self.captureOnCommitCallbacks(execute=True):
+            writer.add(self.session, [self.event(str(n)) for n in range(3)])
+
+        self.assertEqual(writer.flush(), 2)
+        self.assertEqual(sorted(GameEvent.objects.values_list('title', flat=True)), ['1', '2'])
+
+    def test_events_of_deleted_session_are_dropped(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.writer.add(self.session, [self.event()])
+        self.session.delete()
+
+        self.assertEqual(self.writer.flush(), 0)
+        self.assertEqual(self.writer.pending(), 0)
+
+
+class AchievementEvaluatorTests(TestCase):
+    """Выдача достижений по пройденным порогам"""
+
+    def setUp(self):
+        cache.clear()
+        self.rich = Achievement.objects.create(name='Богач', description='', required_money=1000)
+        self.veteran = Achievement.objects.create(
+            name='Ветеран', description='', required_money=500, required_day=10
+        )
+        self.session = GameSession.objects.create(user=User.objects.create_user('player'), money=100, day=1)
+        self.evaluator = AchievementEvaluator()
+
+    def evaluate(self, **values):
+        for field, value in values.items():
+            setattr(self.session, field, value)
+        return self.evaluator.evaluate(self.session)
+
+    def test_awards_when_all_requirements_are_met(self):
+        self.assertEqual(self.evaluate(money=600), [])
+        self.assertEqual(self.evaluate(day=10), [self.veteran])
+        self.assertEqual(self.evaluate(money=2000), [self.rich])
+        self.assertEqual(
+            set(UserAchievement.objects.values_list('achievement_id', flat=True)), {self.rich.pk, self.veteran.pk}
+        )
+
+    def test_first_check_awards_already_reached_thresholds(self):
+        self.assertEqual(self.evaluate(money=2000, day=10), [self.rich, self.veteran])
+
+    def test_threshold_crossed_again_after_drop(self):
+        self.evaluate(day=10)
+        self.assertEqual(self.evaluate(money=600), [self.veteran])
+        self.evaluate(money=100)
+        self.assertEqual(self.evaluate(money=1500), [self.rich])
+
+    def test_no_queries_without_crossed_thresholds(self):
+        self.evaluate(money=600)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.evaluate(money=700), [])
+
+
+class LeaderboardTests(TestCase):
+    """Топ-N и место игрока по строкам рейтинга"""
+
+    def setUp(self):
+        cache.clear()
+        self.players = [User.objects.create_user(f'player{n}') for n in range(4)]
+        for user, money in zip(self.players, (300, 900, 300, 100)):
+            GameSession.objects.create(user=user, company_name=user.username, money=money)
+
+    def test_rank_matches_top_order_with_ties(self):
+        board = get_leaderboard('money', limit=10)
+        top = [(entry['company_name'], entry['rank']) for entry in board['top']]
+        self.assertEqual(top, [('player1', 1), ('player0', 2), ('player2', 3), ('player3', 4)])
+
+        for name, rank in top:
+            me = get_leaderboard('money', limit=1, user=User.objects.get(username=name))['me']
+            self.assertEqual((me['rank'], me['total']), (rank, 4))
+
+    def test_rank_reflects_session_update_immediately(self):
+        session = GameSession.objects.get(user=self.players[3])
+        session.money = 1000
+        session.save(update_fields=['money'])
+
+        me = get_leaderboard('money', user=self.players[3])['me']
+        self.assertEqual(me['rank'], 1)
+        self.assertEqual(get_leaderboard('money')['top'][0]['company_name'], 'player3')
+
+
+class CompletedEventsTests(TestCase):
+    """Запись завершенных событий с id шаблона из соответствия в памяти"""
+
+    def setUp(self):
+        cache.clear()
+        self.session = GameSession.objects.create(user=User.objects.create_user('player'))
+
+    def test_template_created_after_map_was_loaded(self):
+        record_completed_events(self.session.pk, [('unknown', 'a', 1)])
+        # bulk_create не отправляет post_save: версия каталога не сменилась
+        EventTemplate.objects.bulk_create([EventTemplate(key='investor', title='Инвестор', description='')])
+        template = EventTemplate.objects.get(key='investor')
+
+        record_completed_events(self.session.pk, [('investor', 'accept', 2)])
+
+        self.assertEqual(CompletedEvent.objects.get(event_key='investor').event_template_id, template.pk)
+        self.assertIsNone(CompletedEvent.objects.get(event_key='unknown').event_template_id)
+
+    def test_duplicate_is_not_reported_as_new_with_cold_cache(self):
+        self.assertEqual(record_completed_events(self.session.pk, [('investor', 'accept', 1)]), ['investor'])
+        cache.clear()
+
+        keys = record_completed_events(self.session.pk, [('investor', 'decline', 2), ('launch', 'beta', 2)])
+
+        self.assertEqual(keys, ['launch'])
+        self.assertEqual(CompletedEvent.objects.get(event_key='investor').choice_id, 'accept')
+
+    def test_api_reports_already_completed_event(self):
+        self.client.force_login(self.session.user)
+        url = reverse('startup_game:complete_event')
+        for expected in ('Event investor marked as completed', 'Event already completed'):
+            cache.clear()
+            response = self.client.post(url, json.dumps({'event_key': 'investor'}), content_type='application/json')
+            self.assertEqual(response.json()['message'], expected)
+
+
+class SyncActionsTests(TestCase):
+    """Пакетная синхронизация: деньги и навыки считает сервер"""
+
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user('player')
+        self.client.force_login(user)
+        self.session = GameSession.objects.create(user=user, money=500, day=1, game_time=480)
+        template = EventTemplate.objects.create(key='investor', title='Инвестор', description='')
+        EventChoice.objects.create(
+            event_template=template, choice_id='pitch', title='Питч', description='',
+            money_cost=100, money_effect=300, pitching_skill_effect=2,
+        )
+
+    def sync(self, *actions):
+        response = self.client.post(
+            reverse('startup_game:sync_game_state'), json.dumps({'actions': list(actions)}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.session.refresh_from_db()
+        return response.json()['state']
+
+    def test_choice_effects_come_from_event_choice(self):
+        state = self.sync({'type': 'choice', 'event_key': 'investor', 'choice': 'pitch', 'money': 10 ** 9})
+        self.assertEqual((self.session.money, self.session.pitching_skill), (700, 2))
+        self.assertEqual(state['money'], 700)
+
+    def test_unknown_or_unaffordable_choice_has_no_effects(self):
+        self.sync({'type': 'choice', 'event_key': 'investor', 'choice': 'bribe'})
+        GameSession.objects.filter(pk=self.session.pk).update(money=50)
+        self.sync({'type': 'choice', 'event_key': 'investor', 'choice': 'pitch'})
+        self.assertEqual((self.session.money, self.session.pitching_skill), (50, 0))
+
+    def test_skill_orb_adds_one_point_and_is_capped_per_batch(self):
+        self.sync({'type': 'skill', 'skill_type': 'team', 'value': 1000})
+        self.assertEqual(self.session.team_skill, 1)
+        self.sync(*[{'type': 'skill', 'skill_type': 'team'}] * 50)
+        self.assertEqual(self.session.team_skill, 6)
+
+    def test_new_day_charges_daily_expenses(self):
+        self.sync({'type': 'time', 'day': 1, 'game_time': 900})
+        self.assertEqual(self.session.money, 500)
+        state = self.sync({'type': 'time', 'day': 3, 'game_time': 24})
+        self.assertEqual((self.session.day, self.session.money), (3, 400))
+        self.assertEqual(state['money'], 400)
+
+
+class GameActionTests(TestCase):
+    """API игровых действий: неизвестное действие и ошибки движка"""
+
+    def setUp(self):
+        user = User.objects.create_user('player')
+        self.client.force_login(user)
+        GameSession.objects.create(user=user)
+
+    def post(self, action):
+        return self.client.post(
+            reverse('startup_game:game_action'), json.dumps({'action': action}), content_type='application/json',
+        )
+
+    def test_unknown_action_is_rejected(self):
+        self.assertEqual(self.post('buy_island').status_code, 400)
+        self.assertEqual(self.post(['next_day']).status_code, 400)
+
+    def test_key_error_inside_engine_is_not_an_unknown_action(self):
+        with mock.patch.dict('startup_game.engine.ACTIONS', {'next_day': mock.Mock(side_effect=KeyError('money'))}):
+            with self.assertRaises(KeyError):
+                self.post('next_day')
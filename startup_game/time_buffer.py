@@ -0,0 +1,128 @@
+"""
+Отложенная запись игрового времени
+
+Клиентский таймер присылает время каждые несколько секунд от каждого
+игрока, и запись в GameSession на каждый тик растет линейно с числом
+игроков. Поэтому время (day, game_time) сначала пишется в кэш Django
+(последнее значение на сессию, время не идет назад), а в БД попадает
+пакетно: фоновый поток процесса раз в TIME_FLUSH_INTERVAL секунд делает
+пакетный UPDATE всех изменившихся сессий и их строк рейтинга. Буфер также
+сбрасывается на важных переходах (выбор в событии, новая игра) и при
+завершении процесса.
+
+Потеря данных: при аварийном завершении процесса (kill -9, падение
+сервера) теряется не более TIME_FLUSH_INTERVAL секунд игрового времени —
+после перезагрузки игрок продолжит с последнего сброшенного значения.
+При нормальной остановке (SIGTERM gunicorn) буфер сбрасывается через atexit.
+Значение в кэше живет дольше интервала, поэтому страница игры, открытая
+в другом процессе, видит несброшенное время (overlay).
+"""
+import atexit
+from django.core.cache import cache
+from django.db.models import Case, Q, Value, When
+from django.utils import timezone
+from .flusher import BackgroundFlusher
+
+# Максимальная задержка записи времени в БД (и максимальная потеря), секунд
+TIME_FLUSH_INTERVAL = 15
+
+# Время жизни значения в кэше: с запасом больше интервала сброса
+TIME_CACHE_TIMEOUT = TIME_FLUSH_INTERVAL * 20
+
+FLUSH_BATCH_SIZE = 500
+
+
+def _key(session_id) -> str:
+    return f'startup_game:time:{session_id}'
+
+
+class GameTimeBuffer(BackgroundFlusher):
+    """Буфер игрового времени: значения в кэше, список измененных сессий в процессе"""
+
+    thread_name = 'game-time-flusher'
+    flushed_message = 'Сброшено игровое время %d сессий'
+    error_message = 'Ошибка сброса игрового времени'
+
+    def __init__(self, interval: float = TIME_FLUSH_INTERVAL):
+        super().__init__(interval)
+        self._dirty = set()
+
+    def record(self, session_id, day: int, game_time: int, current=None) -> bool:
+        """
+        Принять время сессии; current — (day, game_time) из БД, если уже загружено
+
+        Возвращает False для устаревшего значения (время не идет назад).
+        """
+        latest = self.get(session_id)
+        if latest is None:
+            latest = current
+        if latest is not None and (day, game_time) <= tuple(latest):
+            return False
+
+        cache.set(_key(session_id), (day, game_time), TIME_CACHE_TIMEOUT)
+        with self._lock:
+            self._dirty.add(session_id)
+            self._ensure_flusher()
+        return True
+
+    def get(self, session_id):
+        """Несброшенное (day, game_time) сессии или None"""
+        return cache.get(_key(session_id))
+
+    def overlay(self, session):
+        """Подставить в загруженную сессию более новое время из буфера"""
+        buffered = self.get(session.pk)
+        if buffered is not None and tuple(buffered) > (session.day, session.game_time):
+            session.day, session.game_time = buffered
+        return session
+
+    def discard(self, session_id):
+        """Сессия сохранена вместе со временем — сбрасывать нечего"""
+        with self._lock:
+            self._dirty.discard(session_id)
+        cache.delete(_key(session_id))
+
+    def flush(self, session_ids=None) -> int:
+        """Записать буфер в БД пакетными UPDATE; возвращает число сессий"""
+        from .models import GameSession
+        from .leaderboard import update_leaderboard_days
+
+        with self._lock:
+            if session_ids is None:
+                pending, self._dirty = self._dirty, set()
+            else:
+                pending = self._dirty.intersection(session_ids)
+                self._dirty.difference_update(pending)
+        if not pending:
+            return 0
+
+        values = cache.get_many([_key(session_id) for session_id in pending])
+        times = {
+            session_id: tuple(values[_key(session_id)])
+            for session_id in pending if _key(session_id) in values
+        }
+        batches = list(times.items())
+
+        try:
+            for start in range(0, len(batches), FLUSH_BATCH_SIZE):
+                batch = dict(batches[start:start + FLUSH_BATCH_SIZE])
+                day = Case(*[When(pk=session_id, then=Value(day)) for session_id, (day, _) in batch.items()])
+                game_time = Case(*[
+                    When(pk=session_id, then=Value(game_time)) for session_id, (_, game_time) in batch.items()
+                ])
+                # Пишем только строки, которые в БД старше буфера: между чтением кэша и
+                # UPDATE сессию мог сохранить выбор в событии или sync с более новым временем
+                GameSession.objects.filter(pk__in=batch).filter(
+                    Q(day__lt=day) | Q(day=day, game_time__lt=game_time)
+                ).update(day=day, game_time=game_time, updated_at=timezone.now())
+                update_leaderboard_days({session_id: day for session_id, (day, _) in batch.items()})
+        except Exception:
+            # Вернем сессии в очередь, повторим на следующем сбросе
+            with self._lock:
+                self._dirty.update(pending)
+            raise
+        return len(times)
+
+
+game_time_buffer = GameTimeBuffer()
+atexit.register(game_time_buffer.shutdown)
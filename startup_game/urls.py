@@ -10,10 +10,13 @@ urlpatterns = [
     path('play/', views.game_play, name='play'),
     path('new-game/', views.new_game, name='new_game'),
     path('stats/', views.game_stats, name='stats'),
+    path('leaderboard/', views.leaderboard, name='leaderboard'),
     path('api/action/', views.game_action, name='game_action'),
+    path('api/sync/', views.sync_game_state, name='sync_game_state'),
     path('api/sync-time/', views.sync_time, name='sync_time'),
     path('api/choice/', views.process_choice, name='process_choice'),
     path('api/skill/', views.game_skill_api, name='game_skill_api'),
+    path('api/leaderboard/', views.leaderboard_api, name='leaderboard_api'),
     path('api/events/', views.get_events_api, name='get_events_api'),
     path('api/completed-events/', views.check_completed_events_api, name='check_completed_events'),
     path('api/complete-event/', views.complete_event_api, name='complete_event'),
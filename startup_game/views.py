@@ -1,11 +1,23 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
+from django.http import JsonResponse, HttpResponse
+from django.views.decorators.cache import cache_control
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition
 from django.contrib.auth.models import User
+from django.db import transaction
 import json
 import random
 from .models import GameSession, GameEvent, Achievement, UserAchievement, EventTemplate, Skill, CompletedEvent
+from .catalogue import get_catalogue_version, get_event_catalogue_json
+from .sync import apply_sync_actions, SyncError
+from .time_buffer import game_time_buffer
+from .engine import ACTIONS, GameState, ActionError, apply_action
+from .event_log import game_event_log
+from .achievements import achievement_evaluator, achievements_payload
+from .leaderboard import LEADERBOARD_METRICS, get_leaderboard
+from .completed_events import get_completed_events, record_completed_events
+from .active_session import get_active_session, start_new_session
 
 
 def game_home(request):
@@ -44,9 +56,6 @@ def industry_select(request):
     if request.method == 'POST':
         industry = request.POST.get('industry', '').strip()
         if industry:
-            # Завершаем текущие активные сессии
-            GameSession.objects.filter(user=request.user, is_active=True).update(is_active=False)
-            
             # Генерируем случайные характеристики индустрии для реиграбельности
             industry_stats = {
                 'competition': random.randint(1, 10),
@@ -56,9 +65,9 @@ def industry_select(request):
                 'growth_potential': random.randint(1, 10),
             }
             
-            # Создаем новую игровую сессию
-            session = GameSession.objects.create(
-                user=request.user,
+            # Завершаем текущие активные сессии и создаем новую игровую сессию
+            session = start_new_session(
+                request,
                 company_name=company_name,
                 industry=industry,
                 # Характеристики индустрии
@@ -75,7 +84,6 @@ def industry_select(request):
                 day=1,
                 level=1,
                 game_time=480,  # 8:00 утра
-                is_active=True,
                 game_paused=False,
                 # Сбрасываем все навыки в 0 для новой игры
                 prototype_skill=0,
@@ -127,11 +135,9 @@ def game_play(request):
     """Основная игровая страница"""
     try:
         # Проверяем есть ли активная сессия
-        try:
-            session = GameSession.objects.get(user=request.user, is_active=True)
-        except GameSession.DoesNotExist:
-            # Если нет активной сессии, показываем этапы создания компании
-            session = None
+        session = get_active_session(request)
+        if session:
+            game_time_buffer.overlay(session)
         
         # Если это POST запрос для создания новой компании
         if request.method == 'POST':
@@ -140,9 +146,6 @@ def game_play(request):
                 industry = request.POST.get('industry', '').strip()
                 
                 if company_name and industry:
-                    # Завершаем все старые сессии
-                    GameSession.objects.filter(user=request.user, is_active=True).update(is_active=False)
-                    
                     # Создаем новую сессию с базовыми полями
                     defaults = {
                         'company_name': company_name,
@@ -181,7 +184,8 @@ def game_play(request):
                     except:
                         pass  # Игнорируем ошибки с базой данных
                     
-                    session = GameSession.objects.create(user=request.user, is_active=True, **defaults)
+                    # Старые сессии завершаются в start_new_session
+                    session = start_new_session(request, **defaults)
                     
                     return JsonResponse({'success': True, 'redirect': True})
         
@@ -269,12 +273,10 @@ def sync_time(request):
             game_time = data.get('game_time', 480)
             day = data.get('day', 1)
             
-            # Обновляем активную сессию пользователя
-            session = GameSession.objects.filter(user=request.user, is_active=True).first()
+            # Время пишется в буфер и сбрасывается в БД пакетно (time_buffer)
+            session = get_active_session(request, GameSession.objects.only('id', 'day', 'game_time'))
             if session:
-                session.game_time = game_time
-                session.day = day
-                session.save()
+                game_time_buffer.record(session.pk, day, game_time, current=(session.day, session.game_time))
                 
             return JsonResponse({'success': True})
         except Exception as e:
@@ -283,26 +285,41 @@ def sync_time(request):
     return JsonResponse({'success': False, 'error': 'Invalid method'})
 
 
+@login_required
+@csrf_exempt
+def sync_game_state(request):
+    """API пакетной синхронизации: упорядоченный список действий клиента за один запрос"""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+
+    try:
+        data = json.loads(request.body)
+        actions = data.get('actions', []) if isinstance(data, dict) else None
+        result = apply_sync_actions(request, actions)
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+    except SyncError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    if result is None:
+        return JsonResponse({'error': 'No active game session'}, status=400)
+
+    return JsonResponse({'success': True, **result})
+
+
 @login_required
 @csrf_exempt
 def process_choice(request):
-    """API для обработки выборов игрока"""
+    """API для обработки выборов игрока (один выбор через пакетную синхронизацию)"""
     if request.method == 'POST':
         try:
             data = json.loads(request.body)
-            choice = data.get('choice', '')
-            dice_roll = data.get('dice_roll', 1)
-            money = data.get('money', 500)
-            
-            # Обновляем активную сессию пользователя
-            session = GameSession.objects.filter(user=request.user, is_active=True).first()
-            if session:
-                session.last_decision = choice
-                session.dice_roll = dice_roll
-                session.money = money
-                session.game_paused = False
-                session.save()
-                
+            # Затраты и эффекты считаются на сервере по EventChoice
+            apply_sync_actions(request, [{
+                'type': 'choice',
+                'event_key': data.get('event_key', ''),
+                'choice': data.get('choice', ''),
+            }])
             return JsonResponse({'success': True})
         except Exception as e:
             return JsonResponse({'success': False, 'error': str(e)})
@@ -313,14 +330,16 @@ def process_choice(request):
 @login_required
 def new_game(request):
     """Начать новую игру"""
-    # Завершаем текущую активную сессию
-    GameSession.objects.filter(user=request.user, is_active=True).update(is_active=False)
+    # Сохраняем несброшенное время завершаемой сессии
+    game_time_buffer.flush(
+        GameSession.objects.filter(user=request.user, is_active=True).values_list('id', flat=True)
+    )
     
-    # Создаем новую сессию
+    # Завершаем текущую активную сессию и создаем новую
     company_name = request.POST.get('company_name', f"{request.user.username}'s Startup")
     
-    session = GameSession.objects.create(
-        user=request.user,
+    session = start_new_session(
+        request,
         company_name=company_name,
         money=1000,
         reputation=0,
@@ -328,7 +347,6 @@ def new_game(request):
         customers=0,
         day=1,
         level=1,
-        is_active=True,
         # Сбрасываем все навыки в 0 для новой игры
         prototype_skill=0,
         presentation_skill=0,
@@ -348,210 +366,43 @@ def game_action(request):
     
     try:
         data = json.loads(request.body)
-        action = data.get('action')
-        
-        session = get_object_or_404(GameSession, user=request.user, is_active=True)
-        
-        if action == 'next_day':
-            return handle_next_day(session)
-        elif action == 'hire_employee':
-            return handle_hire_employee(session)
-        elif action == 'marketing_campaign':
-            return handle_marketing_campaign(session)
-        elif action == 'upgrade_office':
-            return handle_upgrade_office(session)
-        else:
-            return JsonResponse({'error': 'Unknown action'}, status=400)
-            
-    except Exception as e:
-        return JsonResponse({'error': str(e)}, status=500)
-
-
-def handle_next_day(session):
-    """Обработка перехода к следующему дню"""
-    session.day += 1
-    
-    # Ежедневный доход
-    daily_income = session.customers * 10 + random.randint(0, 100)
-    session.money += daily_income
-    
-    # Расходы на сотрудников
-    daily_expenses = session.employees * 50
-    session.money -= daily_expenses
-    
-    # Случайные события
-    event_chance = random.random()
-    event_data = None
-    
-    if event_chance < 0.3:  # 30% шанс события
-        event_data = generate_random_event(session)
-    
-    session.save()
-    
-    response_data = {
-        'success': True,
-        'day': session.day,
-        'money': session.money,
-        'reputation': session.reputation,
-        'employees': session.employees,
-        'customers': session.customers,
-        'daily_income': daily_income,
-        'daily_expenses': daily_expenses,
-    }
-    
-    if event_data:
-        response_data['event'] = event_data
-    
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+    action = data.get('action') if isinstance(data, dict) else None
+    # Проверяем до вызова движка: KeyError внутри движка — ошибка, а не неизвестное действие
+    if not isinstance(action, str) or action not in ACTIONS:
+        return JsonResponse({'error': 'Unknown action'}, status=400)
+    
+    session = get_active_session(request)
+    if session is None:
+        return JsonResponse({'error': 'No active game session'}, status=404)
+    game_time_buffer.overlay(session)
+    
+    # Правила игры считает движок, здесь только загрузка и сохранение изменений
+    state = GameState.from_session(session)
+    before = state.copy()
+    try:
+        outcome = apply_action(state, action)
+    except ActionError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    changed = state.diff(before)
+    for field, value in changed.items():
+        setattr(session, field, value)
+    # Вместе с днем сохраняем и время из буфера
+    update_fields = [*changed, 'day', 'game_time', 'updated_at']
+    session.save(update_fields=update_fields)
+    # События попадут в журнал после фиксации сохранения сессии
+    game_event_log.add(session, outcome.events)
+    game_time_buffer.discard(session.pk)
+    
+    response_data = {'success': True, **outcome.data}
+    achievements = achievement_evaluator.evaluate(session)
+    if achievements:
+        response_data['achievements'] = achievements_payload(achievements)
     return JsonResponse(response_data)
 
 
-def handle_hire_employee(session):
-    """Найм сотрудника"""
-    cost = 200 + (session.employees * 50)  # Стоимость растет с количеством сотрудников
-    
-    if session.money < cost:
-        return JsonResponse({'error': 'Недостаточно денег'}, status=400)
-    
-    session.money -= cost
-    session.employees += 1
-    session.save()
-    
-    # Создаем событие
-    GameEvent.objects.create(
-        session=session,
-        event_type='decision',
-        title='Нанят новый сотрудник',
-        description=f'Вы наняли нового сотрудника за {cost}$. Теперь у вас {session.employees} сотрудников.',
-        day_occurred=session.day,
-        money_change=-cost,
-        employees_change=1
-    )
-    
-    return JsonResponse({
-        'success': True,
-        'money': session.money,
-        'employees': session.employees,
-        'message': f'Нанят новый сотрудник! Стоимость: {cost}$'
-    })
-
-
-def handle_marketing_campaign(session):
-    """Маркетинговая кампания"""
-    cost = 300
-    
-    if session.money < cost:
-        return JsonResponse({'error': 'Недостаточно денег'}, status=400)
-    
-    session.money -= cost
-    new_customers = random.randint(5, 15)
-    reputation_gain = random.randint(1, 3)
-    
-    session.customers += new_customers
-    session.reputation += reputation_gain
-    session.save()
-    
-    # Создаем событие
-    GameEvent.objects.create(
-        session=session,
-        event_type='decision',
-        title='Маркетинговая кампания',
-        description=f'Ваша маркетинговая кампания привлекла {new_customers} новых клиентов и повысила репутацию на {reputation_gain}.',
-        day_occurred=session.day,
-        money_change=-cost,
-        customers_change=new_customers,
-        reputation_change=reputation_gain
-    )
-    
-    return JsonResponse({
-        'success': True,
-        'money': session.money,
-        'customers': session.customers,
-        'reputation': session.reputation,
-        'message': f'Кампания успешна! +{new_customers} клиентов, +{reputation_gain} репутации'
-    })
-
-
-def handle_upgrade_office(session):
-    """Улучшение офиса"""
-    cost = 500
-    
-    if session.money < cost:
-        return JsonResponse({'error': 'Недостаточно денег'}, status=400)
-    
-    session.money -= cost
-    reputation_gain = random.randint(2, 5)
-    session.reputation += reputation_gain
-    session.save()
-    
-    # Создаем событие
-    GameEvent.objects.create(
-        session=session,
-        event_type='decision',
-        title='Улучшение офиса',
-        description=f'Вы улучшили офис, что повысило репутацию компании на {reputation_gain}.',
-        day_occurred=session.day,
-        money_change=-cost,
-        reputation_change=reputation_gain
-    )
-    
-    return JsonResponse({
-        'success': True,
-        'money': session.money,
-        'reputation': session.reputation,
-        'message': f'Офис улучшен! +{reputation_gain} репутации'
-    })
-
-
-def generate_random_event(session):
-    """Генерация случайного события"""
-    events = [
-        {
-            'type': 'opportunity',
-            'title': 'Крупный клиент',
-            'description': 'К вам обратился крупный клиент с выгодным предложением!',
-            'money_change': random.randint(200, 500),
-            'customers_change': random.randint(2, 5),
-        },
-        {
-            'type': 'challenge',
-            'title': 'Конкуренты',
-            'description': 'Конкуренты запустили агрессивную маркетинговую кампанию.',
-            'customers_change': -random.randint(1, 3),
-            'reputation_change': -random.randint(1, 2),
-        },
-        {
-            'type': 'news',
-            'title': 'Положительные отзывы',
-            'description': 'В прессе появились положительные отзывы о вашей компании!',
-            'reputation_change': random.randint(2, 4),
-            'customers_change': random.randint(1, 3),
-        },
-    ]
-    
-    event_data = random.choice(events)
-    
-    # Применяем изменения
-    session.money += event_data.get('money_change', 0)
-    session.reputation += event_data.get('reputation_change', 0)
-    session.customers += event_data.get('customers_change', 0)
-    session.employees += event_data.get('employees_change', 0)
-    
-    # Создаем запись события
-    GameEvent.objects.create(
-        session=session,
-        event_type=event_data['type'],
-        title=event_data['title'],
-        description=event_data['description'],
-        day_occurred=session.day,
-        money_change=event_data.get('money_change', 0),
-        reputation_change=event_data.get('reputation_change', 0),
-        customers_change=event_data.get('customers_change', 0),
-        employees_change=event_data.get('employees_change', 0),
-    )
-    
-    return event_data
-
-
 @login_required
 @csrf_exempt
 def game_skill_api(request):
@@ -567,7 +418,9 @@ def game_skill_api(request):
         if not skill_type or value is None:
             return JsonResponse({'error': 'Missing skill_type or value'}, status=400)
         
-        session = get_object_or_404(GameSession, user=request.user, is_active=True)
+        session = get_active_session(request)
+        if session is None:
+            return JsonResponse({'error': 'No active game session'}, status=404)
         
         # Обновляем соответствующий навык
         if skill_type == 'prototype':
@@ -581,7 +434,7 @@ def game_skill_api(request):
         else:
             return JsonResponse({'error': 'Invalid skill_type'}, status=400)
         
-        session.save()
+        session.save(update_fields=[f'{skill_type}_skill', 'updated_at'])
         
         return JsonResponse({
             'success': True,
@@ -593,93 +446,19 @@ def game_skill_api(request):
         return JsonResponse({'error': str(e)}, status=500)
 
 
+def _event_catalogue_etag(request):
+    # Тело ответа собирается для той же версии, что ушла в ETag
+    request.catalogue_version = get_catalogue_version()
+    return request.catalogue_version
+
+
 @login_required
 @csrf_exempt  
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_event_catalogue_etag)
 def get_events_api(request):
-    """API для получения событий из базы данных"""
-    from .models import EventTemplate, Skill
-    
-    events = EventTemplate.objects.filter(is_active=True).prefetch_related('choices__skills').order_by('order')
-    
-    events_data = {}
-    for event in events:
-        choices_data = []
-        for choice in event.choices.all().order_by('order'):
-            # Создаем объект эффектов
-            effects = {}
-            if choice.money_effect != 0:
-                effects['money'] = choice.money_effect
-            if choice.reputation_effect != 0:
-                effects['reputation'] = choice.reputation_effect
-            if choice.employees_effect != 0:
-                effects['employees'] = choice.employees_effect
-            if choice.customers_effect != 0:
-                effects['customers'] = choice.customers_effect
-            if choice.prototype_skill_effect != 0:
-                effects['prototype_skill'] = choice.prototype_skill_effect
-            if choice.presentation_skill_effect != 0:
-                effects['presentation_skill'] = choice.presentation_skill_effect
-            if choice.pitching_skill_effect != 0:
-                effects['pitching_skill'] = choice.pitching_skill_effect
-            if choice.team_skill_effect != 0:
-                effects['team_skill'] = choice.team_skill_effect
-            if choice.marketing_skill_effect != 0:
-                effects['marketing_skill'] = choice.marketing_skill_effect
-            
-            # Получаем связанные навыки
-            related_skills = []
-            for skill in choice.skills.filter(is_active=True).order_by('order'):
-                related_skills.append({
-                    'name': skill.name,
-                    'displayName': skill.display_name,
-                    'color': skill.color,
-                    'icon': skill.icon,
-                    'sessionField': skill.session_field
-                })
-            
-            choices_data.append({
-                'id': choice.choice_id,
-                'text': choice.title,
-                'description': choice.description,
-                'timeCost': choice.time_cost,
-                'moneyCost': choice.money_cost,
-                'effects': effects,
-                'buttonStyle': choice.button_style,
-                'skills': related_skills,  # Добавляем информацию о навыках
-                # Новые поля для связанных событий
-                'nextEvents': [event.strip() for event in choice.next_events.split(',') if event.strip()] if choice.next_events else [],
-                'nextEventDelay': choice.next_event_delay
-            })
-        
-        events_data[event.key] = {
-            'title': event.title,
-            'description': event.description,
-            'choices': choices_data,
-            # Новые поля для управления событиями
-            'triggerType': event.trigger_type,
-            'randomChance': event.random_chance,
-            'minDay': event.min_day,
-            'maxDay': event.max_day,
-            'parentChoices': [choice.strip() for choice in event.parent_choices.split(',') if choice.strip()] if event.parent_choices else []
-        }
-    
-    # Получаем все доступные навыки из базы данных
-    all_skills = Skill.objects.filter(is_active=True).order_by('order')
-    skills_data = []
-    for skill in all_skills:
-        skills_data.append({
-            'name': skill.name,
-            'displayName': skill.display_name,
-            'color': skill.color,
-            'icon': skill.icon,
-            'sessionField': skill.session_field,
-            'type': skill.session_field  # Добавляем type для совместимости с JavaScript
-        })
-    
-    return JsonResponse({
-        'events': events_data,
-        'availableSkills': skills_data  # Добавляем список всех доступных навыков
-    })
+    """API для получения событий из базы данных (кэшированный каталог, 304 по ETag)"""
+    return HttpResponse(get_event_catalogue_json(request.catalogue_version), content_type='application/json')
 
 
 @login_required
@@ -696,6 +475,35 @@ def game_stats(request):
     return render(request, 'startup_game/stats.html', context)
 
 
+@login_required
+def leaderboard(request):
+    """Глобальный рейтинг игроков"""
+    metric = request.GET.get('metric', 'money')
+    if metric not in LEADERBOARD_METRICS:
+        metric = 'money'
+    
+    context = {
+        'board': get_leaderboard(metric, 50, request.user),
+        'metrics': LEADERBOARD_METRICS,
+        'page_title': 'Рейтинг стартапов',
+    }
+    return render(request, 'startup_game/leaderboard.html', context)
+
+
+@login_required
+def leaderboard_api(request):
+    """API рейтинга: топ-N по метрике и место текущего пользователя"""
+    metric = request.GET.get('metric', 'money')
+    if metric not in LEADERBOARD_METRICS:
+        return JsonResponse({'error': 'Unknown metric'}, status=400)
+    try:
+        limit = int(request.GET.get('limit', 20))
+    except ValueError:
+        return JsonResponse({'error': 'Invalid limit'}, status=400)
+    
+    return JsonResponse(get_leaderboard(metric, limit, request.user))
+
+
 @login_required
 @csrf_exempt
 def check_completed_events_api(request):
@@ -705,16 +513,15 @@ def check_completed_events_api(request):
     
     try:
         # Получаем активную игровую сессию
-        session = GameSession.objects.filter(user=request.user, is_active=True).first()
+        session = get_active_session(request, GameSession.objects.only('id'))
         if not session:
             return JsonResponse({'completed_events': []})
+        session_id = session.pk
         
-        # Получаем завершенные события для этой сессии
-        completed_events = CompletedEvent.objects.filter(session=session).values('event_key', 'choice_id', 'game_day')
-        
+        # Компактный список [[event_key, choice_id, game_day], ...] из кэша
         return JsonResponse({
-            'completed_events': list(completed_events),
-            'session_id': session.id
+            'completed_events': get_completed_events(session_id),
+            'session_id': session_id
         })
         
     except Exception as e:
@@ -736,35 +543,23 @@ def complete_event_api(request):
         if not event_key:
             return JsonResponse({'error': 'event_key is required'}, status=400)
         
-        # Получаем активную игровую сессию
-        session = GameSession.objects.filter(user=request.user, is_active=True).first()
-        if not session:
-            return JsonResponse({'error': 'No active game session'}, status=400)
-        
-        # Проверяем, не было ли уже завершено это событие
-        existing = CompletedEvent.objects.filter(session=session, event_key=event_key).first()
-        if existing:
-            return JsonResponse({'message': 'Event already completed', 'event_id': existing.id})
-        
-        # Пытаемся найти событие в БД
-        event_template = None
-        try:
-            event_template = EventTemplate.objects.filter(key=event_key, is_active=True).first()
-        except:
-            pass
-        
-        # Создаем запись о завершенном событии
-        completed_event = CompletedEvent.objects.create(
-            session=session,
-            event_template=event_template,
-            event_key=event_key,
-            choice_id=choice_id,
-            game_day=session.day
-        )
+        # Блокировка строки сессии: параллельный повтор события ждет и видит запись
+        with transaction.atomic():
+            session = get_active_session(request, GameSession.objects.select_for_update().only('id', 'day'))
+            if not session:
+                return JsonResponse({'error': 'No active game session'}, status=400)
+            session_id, day = session.pk, session.day
+            buffered = game_time_buffer.get(session_id)
+            if buffered is not None:
+                day = max(day, buffered[0])
+            
+            # Повтор уже завершенного события не записывается
+            new_keys = record_completed_events(session_id, [(event_key, choice_id, day)])
+        if not new_keys:
+            return JsonResponse({'message': 'Event already completed'})
         
         return JsonResponse({
             'success': True,
-            'event_id': completed_event.id,
             'message': f'Event {event_key} marked as completed'
         })
         
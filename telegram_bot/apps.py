@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class TelegramBotConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'telegram_bot'
+
+    def ready(self):
+        from django.db.models.signals import post_save, post_delete
+        from cafes.models import Cafe
+        from telegram_bot.catalogue import cafe_catalogue
+
+        # Сброс кэша каталога кафе для inline-меню бота
+        post_save.connect(cafe_catalogue.invalidate, sender=Cafe, dispatch_uid='telegram_bot_cafe_catalogue_save')
+        post_delete.connect(cafe_catalogue.invalidate, sender=Cafe, dispatch_uid='telegram_bot_cafe_catalogue_delete')
@@ -5,9 +5,12 @@ from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, WebAppI
 from telegram.ext import Application, CommandHandler, CallbackQueryHandler, ContextTypes, PreCheckoutQueryHandler, MessageHandler, filters
 from django.core.management.base import BaseCommand
 from django.conf import settings
-from cafes.models import Cafe
+from asgiref.sync import sync_to_async
 from users.models import TelegramUser
+from orders.models import Order
+from payments.models import Payment
 from orders.telegram_payments import TelegramPaymentService
+from telegram_bot.catalogue import cafe_catalogue
 
 # Настройка логирования
 logging.basicConfig(
@@ -18,12 +21,16 @@ logger = logging.getLogger(__name__)
 
 
 class TelegramBot:
-    def __init__(self):
+    def __init__(self, request=None):
         self.token = settings.TELEGRAM_BOT_TOKEN
         if not self.token:
             raise ValueError("TELEGRAM_BOT_TOKEN не установлен в настройках")
         
-        self.application = Application.builder().token(self.token).build()
+        builder = Application.builder().token(self.token)
+        if request is not None:
+            # Подмена HTTP-транспорта (используется в бенчмарке обработчиков)
+            builder = builder.request(request)
+        self.application = builder.build()
         self.setup_handlers()
     
     def setup_handlers(self):
@@ -40,7 +47,7 @@ class TelegramBot:
         user = update.effective_user
         
         # Сохраняем или обновляем пользователя в базе данных
-        telegram_user, created = TelegramUser.objects.get_or_create(
+        telegram_user, created = await TelegramUser.objects.aget_or_create(
             telegram_id=user.id,
             defaults={
                 'username': user.username or '',
@@ -55,7 +62,7 @@ class TelegramBot:
             telegram_user.username = user.username or ''
             telegram_user.first_name = user.first_name or ''
             telegram_user.last_name = user.last_name or ''
-            telegram_user.save()
+            await telegram_user.asave()
         
         welcome_text = f"""
 🎉 *Добро пожаловать в GreatIdeas!*
@@ -168,93 +175,22 @@ class TelegramBot:
     
     async def show_cafes(self, query):
         """Показать список кафе"""
-        cafes = Cafe.objects.filter(is_active=True).order_by('name')
-        
-        if not cafes.exists():
-            text = """
-😔 *Кафе временно недоступны*
-
-К сожалению, в данный момент все кафе закрыты или проходят обновление.
-
-Попробуйте зайти позже!
-            """
-            keyboard = [
-                [InlineKeyboardButton("🏠 Главное меню", callback_data="main_menu")],
-            ]
-        else:
-            text = f"""
-🏪 *Выберите кафе ({cafes.count()} доступно)*
-
-Каждое кафе имеет уникальное меню и атмосферу:
-            """
-            
-            keyboard = []
-            for cafe in cafes:
-                keyboard.append([
-                    InlineKeyboardButton(
-                        f"☕ {cafe.name}",
-                        callback_data=f"cafe_{cafe.id}"
-                    )
-                ])
-            
-            keyboard.append([InlineKeyboardButton("🏠 Главное меню", callback_data="main_menu")])
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        message = await cafe_catalogue.cafe_list()
         
         await query.edit_message_text(
-            text,
+            message.text,
             parse_mode='Markdown',
-            reply_markup=reply_markup
+            reply_markup=message.reply_markup
         )
     
     async def show_cafe_details(self, query, cafe_id):
         """Показать детали кафе"""
-        try:
-            cafe = Cafe.objects.get(id=cafe_id, is_active=True)
-            
-            text = f"""
-☕ *{cafe.name}*
-
-{cafe.description}
-
-📍 *Адрес:* {cafe.address}
-🕒 *Время работы:* {cafe.working_hours}
-📞 *Телефон:* {cafe.phone}
-"""
-            
-            if cafe.min_order_amount > 0:
-                text += f"💰 *Минимальный заказ:* {cafe.min_order_amount} ₽\n"
-            
-            if cafe.delivery_fee > 0:
-                text += f"🚚 *Доставка:* {cafe.delivery_fee} ₽\n"
-            
-            text += f"""
-
-🍽️ Откройте меню кафе и добавляйте блюда в корзину!
-            """
-            
-            keyboard = [
-                [InlineKeyboardButton(
-                    "🍽️ Открыть меню", 
-                    url=f"http://127.0.0.1:8000/cafe/{cafe.id}/"
-                )],
-                [InlineKeyboardButton("🏪 Другие кафе", callback_data="show_cafes")],
-                [InlineKeyboardButton("🏠 Главное меню", callback_data="main_menu")],
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
-        except Cafe.DoesNotExist:
-            text = "😔 Кафе не найдено или временно недоступно"
-            keyboard = [
-                [InlineKeyboardButton("🏪 Выбрать другое", callback_data="show_cafes")],
-                [InlineKeyboardButton("🏠 Главное меню", callback_data="main_menu")],
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
+        message = await cafe_catalogue.cafe_details(cafe_id)
         
         await query.edit_message_text(
-            text,
+            message.text,
             parse_mode='Markdown',
-            reply_markup=reply_markup
+            reply_markup=message.reply_markup
         )
     
     async def show_about_service(self, query):
@@ -331,24 +267,13 @@ class TelegramBot:
     async def create_order_invoice(self, chat_id: int, telegram_user_id: int, cart_data: dict, context: ContextTypes.DEFAULT_TYPE):
         """Создает инвойс для заказа из корзины"""
         try:
-            payment_service = TelegramPaymentService()
-            telegram_user = TelegramUser.objects.get(telegram_id=telegram_user_id)
-            
-            # Создаем заказ из корзины
-            order = payment_service.create_order_from_cart(
-                telegram_user=telegram_user,
-                cart_data=cart_data,
-                delivery_type='pickup',  # По умолчанию самовывоз
-            )
-            
-            # Создаем платеж
-            payment = payment_service.create_payment(order)
+            telegram_user = await TelegramUser.objects.aget(telegram_id=telegram_user_id)
             
-            # Создаем список цен для инвойса
-            prices = payment_service.create_invoice_prices(order)
+            # Заказ, платеж и цены создаются одной синхронной операцией в пуле потоков
+            order, payment, prices, items_count = await self._prepare_order_invoice(telegram_user, cart_data)
             
             title = f"Заказ #{order.order_number}"
-            description = f"Заказ в {order.cafe.name}\nВсего позиций: {order.items.count()}"
+            description = f"Заказ в {order.cafe.name}\nВсего позиций: {items_count}"
             
             await context.bot.send_invoice(
                 chat_id=chat_id,
@@ -382,8 +307,8 @@ class TelegramBot:
         
         try:
             # Проверяем заказ
-            payment_service = TelegramPaymentService()
-            order = payment_service.get_order_by_payment_payload(query.invoice_payload)
+            payment = await Payment.objects.select_related('order').aget(invoice_payload=query.invoice_payload)
+            order = payment.order
             
             # Проверяем, что заказ еще не оплачен
             if order.status == 'paid':
@@ -408,10 +333,8 @@ class TelegramBot:
         payment_info = update.message.successful_payment
         
         try:
-            payment_service = TelegramPaymentService()
-            
             # Обрабатываем платеж
-            order = payment_service.process_successful_payment({
+            order = await self._process_successful_payment({
                 'invoice_payload': payment_info.invoice_payload,
                 'telegram_payment_charge_id': payment_info.telegram_payment_charge_id,
                 'provider_payment_charge_id': payment_info.provider_payment_charge_id,
@@ -448,6 +371,34 @@ class TelegramBot:
                 "❌ Произошла ошибка при обработке платежа. Обратитесь в поддержку."
             )
     
+    @sync_to_async
+    def _prepare_order_invoice(self, telegram_user, cart_data):
+        """Создать заказ, платеж и список цен для инвойса"""
+        payment_service = TelegramPaymentService()
+        
+        # Создаем заказ из корзины
+        order = payment_service.create_order_from_cart(
+            telegram_user=telegram_user,
+            cart_data=cart_data,
+            delivery_type='pickup',  # По умолчанию самовывоз
+        )
+        
+        # Создаем платеж
+        payment = payment_service.create_payment(order)
+        
+        # Создаем список цен для инвойса
+        prices = payment_service.create_invoice_prices(order)
+        
+        # Позиции уже предзагружены в create_invoice_prices
+        return order, payment, prices, len(order.items.all())
+    
+    @sync_to_async
+    def _process_successful_payment(self, payment_data):
+        """Отметить платеж оплаченным и вернуть заказ с кафе и позициями"""
+        payment_service = TelegramPaymentService()
+        order = payment_service.process_successful_payment(payment_data)
+        return Order.objects.with_details().get(pk=order.pk)
+    
     async def run_polling(self):
         """Запуск бота в режиме polling"""
         logger.info("Запуск Telegram Bot в режиме polling...")
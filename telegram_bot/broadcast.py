@@ -0,0 +1,177 @@
+"""
+Массовая рассылка сообщений пользователям Telegram с учетом лимитов Bot API
+
+Telegram ограничивает бота примерно 30 сообщениями в секунду суммарно и
+одним сообщением в секунду в один чат. BroadcastSender выбирает получателей
+из TelegramUser порциями (keyset-пагинация по id, без загрузки всей таблицы),
+отправляет сообщения через общий token bucket, при ответе 429 приостанавливает
+всю рассылку на retry_after, а пользователей, заблокировавших бота (403),
+деактивирует одним UPDATE на порцию.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from telegram.error import Forbidden, RetryAfter, TelegramError
+from users.models import TelegramUser
+
+logger = logging.getLogger(__name__)
+
+# Лимиты Bot API
+GLOBAL_RATE = 30
+PER_CHAT_INTERVAL = 1.0
+
+# Размер порции получателей и число одновременных отправок
+CHUNK_SIZE = 500
+CONCURRENCY = 20
+MAX_RETRIES = 3
+
+
+def broadcast_recipients():
+    """Пользователи, которым можно писать в личные сообщения"""
+    return TelegramUser.objects.filter(is_active=True, allows_write_to_pm=True)
+
+
+class TokenBucket:
+    """Асинхронный token bucket с возможностью глобальной паузы (для 429)"""
+
+    def __init__(self, rate: float, capacity: float = 1):
+        # Емкость 1 — без начального всплеска, ровно rate отправок в секунду
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Дождаться токена на одну отправку"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        """Остановить выдачу токенов на seconds секунд"""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0
+
+
+@dataclass
+class BroadcastReport:
+    """Итоги рассылки"""
+    sent: int = 0
+    failed: int = 0
+    blocked: int = 0
+    retries: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        """Фактическая скорость отправки, сообщений в секунду"""
+        return self.sent / self.elapsed if self.elapsed else 0.0
+
+
+class BroadcastSender:
+    """Рассылка одного сообщения выборке TelegramUser"""
+
+    def __init__(self, bot, rate: float = GLOBAL_RATE, per_chat_interval: float = PER_CHAT_INTERVAL,
+                 chunk_size: int = CHUNK_SIZE, concurrency: int = CONCURRENCY):
+        self.bot = bot
+        self.bucket = TokenBucket(rate)
+        self.per_chat_interval = per_chat_interval
+        self.chunk_size = chunk_size
+        self.concurrency = concurrency
+        self._last_sent = {}
+
+    async def send(self, text: str, recipients=None, **message_kwargs) -> BroadcastReport:
+        """Отправить text всем получателям (по умолчанию broadcast_recipients())"""
+        recipients = broadcast_recipients() if recipients is None else recipients
+        report = BroadcastReport()
+        started = time.monotonic()
+
+        async for chunk in self._iter_chunks(recipients):
+            blocked = []
+            queue = asyncio.Queue()
+            for recipient in chunk:
+                queue.put_nowait(recipient)
+
+            workers = [
+                asyncio.create_task(self._worker(queue, text, message_kwargs, report, blocked))
+                for _ in range(min(self.concurrency, len(chunk)))
+            ]
+            await asyncio.gather(*workers)
+
+            if blocked:
+                await TelegramUser.objects.filter(id__in=blocked).aupdate(is_active=False)
+                report.blocked += len(blocked)
+            self._prune_chat_limits()
+            logger.info(f"Рассылка: отправлено {report.sent}, заблокировали бота {report.blocked}, ошибок {report.failed}")
+
+        report.elapsed = time.monotonic() - started
+        return report
+
+    async def _iter_chunks(self, recipients):
+        """Порции (id, telegram_id) с keyset-пагинацией по id"""
+        last_id = 0
+        while True:
+            chunk = [
+                row async for row in recipients.filter(id__gt=last_id)
+                .order_by('id').values_list('id', 'telegram_id')[:self.chunk_size]
+            ]
+            if not chunk:
+                return
+            yield chunk
+            last_id = chunk[-1][0]
+
+    async def _worker(self, queue, text, message_kwargs, report, blocked):
+        while not queue.empty():
+            user_id, chat_id = queue.get_nowait()
+            await self._send_one(user_id, chat_id, text, message_kwargs, report, blocked)
+
+    async def _send_one(self, user_id, chat_id, text, message_kwargs, report, blocked):
+        for _ in range(MAX_RETRIES + 1):
+            await self._wait_chat(chat_id)
+            await self.bucket.acquire()
+            try:
+                await self.bot.send_message(chat_id=chat_id, text=text, **message_kwargs)
+                report.sent += 1
+                return
+            except RetryAfter as e:
+                delay = e.retry_after
+                if isinstance(delay, timedelta):
+                    delay = delay.total_seconds()
+                logger.warning(f"Рассылка: Telegram просит подождать {delay} с")
+                self.bucket.pause(delay)
+                report.retries += 1
+            except Forbidden:
+                blocked.append(user_id)
+                return
+            except TelegramError as e:
+                logger.error(f"Рассылка: ошибка отправки в чат {chat_id}: {e}")
+                report.failed += 1
+                return
+
+        logger.error(f"Рассылка: чат {chat_id} пропущен после {MAX_RETRIES} повторов")
+        report.failed += 1
+
+    async def _wait_chat(self, chat_id):
+        """Не чаще одного сообщения в чат за per_chat_interval"""
+        wait = self._last_sent.get(chat_id, 0) + self.per_chat_interval - time.monotonic()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        self._last_sent[chat_id] = time.monotonic()
+
+    def _prune_chat_limits(self):
+        threshold = time.monotonic() - self.per_chat_interval
+        self._last_sent = {chat_id: ts for chat_id, ts in self._last_sent.items() if ts > threshold}
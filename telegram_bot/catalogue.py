@@ -0,0 +1,153 @@
+"""
+Кэш каталога кафе для inline-меню клиентского бота
+
+Тексты сообщений и InlineKeyboardMarkup списка кафе и карточек кафе
+собираются одним запросом и хранятся в памяти процесса, поэтому обработка
+callback'ов "show_cafes" и "cafe_<id>" не обращается к базе данных.
+
+Кэш сбрасывается сигналами post_save/post_delete модели Cafe (в том же
+процессе) и по истечении CATALOGUE_TTL — изменения, сделанные в админке
+другого процесса (gunicorn), боту становятся видны не позже чем через TTL.
+"""
+import logging
+import time
+from dataclasses import dataclass, field
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+from cafes.models import Cafe
+
+logger = logging.getLogger(__name__)
+
+# Время жизни снимка каталога, секунд
+CATALOGUE_TTL = 60
+
+
+@dataclass(frozen=True)
+class CatalogueMessage:
+    """Готовое сообщение бота: текст и клавиатура"""
+    text: str
+    reply_markup: InlineKeyboardMarkup
+
+
+@dataclass(frozen=True)
+class CatalogueSnapshot:
+    """Неизменяемый снимок каталога кафе"""
+    cafe_list: CatalogueMessage
+    cafe_details: dict = field(default_factory=dict)
+    expires_at: float = 0.0
+
+
+CAFE_NOT_FOUND = CatalogueMessage(
+    text="😔 Кафе не найдено или временно недоступно",
+    reply_markup=InlineKeyboardMarkup([
+        [InlineKeyboardButton("🏪 Выбрать другое", callback_data="show_cafes")],
+        [InlineKeyboardButton("🏠 Главное меню", callback_data="main_menu")],
+    ]),
+)
+
+
+def render_cafe_list(cafes) -> CatalogueMessage:
+    """Сообщение со списком кафе"""
+    if not cafes:
+        text = """
+😔 *Кафе временно недоступны*
+
+К сожалению, в данный момент все кафе закрыты или проходят обновление.
+
+Попробуйте зайти позже!
+            """
+        keyboard = [
+            [InlineKeyboardButton("🏠 Главное меню", callback_data="main_menu")],
+        ]
+    else:
+        text = f"""
+🏪 *Выберите кафе ({len(cafes)} доступно)*
+
+Каждое кафе имеет уникальное меню и атмосферу:
+            """
+
+        keyboard = [
+            [InlineKeyboardButton(f"☕ {cafe.name}", callback_data=f"cafe_{cafe.id}")]
+            for cafe in cafes
+        ]
+        keyboard.append([InlineKeyboardButton("🏠 Главное меню", callback_data="main_menu")])
+
+    return CatalogueMessage(text=text, reply_markup=InlineKeyboardMarkup(keyboard))
+
+
+def render_cafe_details(cafe) -> CatalogueMessage:
+    """Карточка кафе"""
+    text = f"""
+☕ *{cafe.name}*
+
+{cafe.description}
+
+📍 *Адрес:* {cafe.address}
+🕒 *Время работы:* {cafe.working_hours}
+📞 *Телефон:* {cafe.phone}
+"""
+
+    if cafe.min_order_amount > 0:
+        text += f"💰 *Минимальный заказ:* {cafe.min_order_amount} ₽\n"
+
+    if cafe.delivery_fee > 0:
+        text += f"🚚 *Доставка:* {cafe.delivery_fee} ₽\n"
+
+    text += f"""
+
+🍽️ Откройте меню кафе и добавляйте блюда в корзину!
+            """
+
+    keyboard = [
+        [InlineKeyboardButton(
+            "🍽️ Открыть меню",
+            url=f"http://127.0.0.1:8000/cafe/{cafe.id}/"
+        )],
+        [InlineKeyboardButton("🏪 Другие кафе", callback_data="show_cafes")],
+        [InlineKeyboardButton("🏠 Главное меню", callback_data="main_menu")],
+    ]
+    return CatalogueMessage(text=text, reply_markup=InlineKeyboardMarkup(keyboard))
+
+
+class CafeCatalogue:
+    """In-process кэш каталога кафе с TTL и сбросом по сигналам"""
+
+    def __init__(self, ttl: float = CATALOGUE_TTL):
+        self.ttl = ttl
+        self._snapshot = None
+
+    async def get_snapshot(self) -> CatalogueSnapshot:
+        """Текущий снимок каталога (перестраивается при сбросе или истечении TTL)"""
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.expires_at <= time.monotonic():
+            snapshot = await self._build()
+            # Присваивание атомарно: параллельные перестроения просто дадут одинаковые снимки
+            self._snapshot = snapshot
+        return snapshot
+
+    async def cafe_list(self) -> CatalogueMessage:
+        """Сообщение со списком активных кафе"""
+        return (await self.get_snapshot()).cafe_list
+
+    async def cafe_details(self, cafe_id) -> CatalogueMessage:
+        """Карточка кафе по id из callback_data"""
+        snapshot = await self.get_snapshot()
+        try:
+            return snapshot.cafe_details.get(int(cafe_id), CAFE_NOT_FOUND)
+        except ValueError:
+            return CAFE_NOT_FOUND
+
+    def invalidate(self, **kwargs):
+        """Сбросить снимок (обработчик сигналов post_save/post_delete модели Cafe)"""
+        self._snapshot = None
+
+    async def _build(self) -> CatalogueSnapshot:
+        cafes = [cafe async for cafe in Cafe.objects.filter(is_active=True).order_by('name')]
+        logger.info(f"Каталог кафе для бота перестроен: {len(cafes)} кафе")
+        return CatalogueSnapshot(
+            cafe_list=render_cafe_list(cafes),
+            cafe_details={cafe.id: render_cafe_details(cafe) for cafe in cafes},
+            expires_at=time.monotonic() + self.ttl,
+        )
+
+
+cafe_catalogue = CafeCatalogue()
@@ -0,0 +1,146 @@
+import asyncio
+import json
+import statistics
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from telegram import Update
+from telegram.request import BaseRequest
+from cafes.models import Cafe
+from users.models import TelegramUser
+from telegram_bot.bot import TelegramBot
+
+# Синтетические пользователи бенчмарка, удаляются после прогона. Диапазон выше
+# синтетических id loadtest_checkout (9_000_000_000 + до 10^9)
+BENCH_TELEGRAM_ID_START = 10_000_000_000
+
+BOT_USER = {'id': 123, 'is_bot': True, 'first_name': 'Bench', 'username': 'bench_bot'}
+
+
+class FakeTelegramRequest(BaseRequest):
+    """HTTP-транспорт без сети: отвечает на вызовы Bot API заготовленным JSON"""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+
+    @property
+    def read_timeout(self):
+        return None
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    async def do_request(self, url, method, request_data=None, read_timeout=None,
+                         write_timeout=None, connect_timeout=None, pool_timeout=None):
+        self.calls += 1
+        if self.latency:
+            # Имитация сетевой задержки Bot API
+            await asyncio.sleep(self.latency)
+
+        endpoint = url.rsplit('/', 1)[-1]
+        if endpoint == 'getMe':
+            result = BOT_USER
+        elif endpoint.startswith('answer'):
+            result = True
+        else:
+            params = request_data.parameters if request_data else {}
+            result = {
+                'message_id': 1,
+                'date': int(time.time()),
+                'chat': {'id': params.get('chat_id', 0), 'type': 'private'},
+                'text': params.get('text', ''),
+            }
+        return 200, json.dumps({'ok': True, 'result': result}).encode()
+
+
+class Command(BaseCommand):
+    """Бенчмарк пропускной способности обработчиков клиентского бота (telegram_bot.bot)"""
+    help = 'Прогон синтетических обновлений через обработчики бота с замером пропускной способности'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--updates', type=int, default=300,
+                            help='Количество синтетических обновлений (по умолчанию 300)')
+        parser.add_argument('--concurrency', type=int, default=50,
+                            help='Сколько обновлений обрабатывается одновременно (по умолчанию 50)')
+        parser.add_argument('--api-latency-ms', type=float, default=50.0,
+                            help='Имитируемая задержка ответа Bot API, мс (по умолчанию 50)')
+        parser.add_argument('--force', action='store_true',
+                            help='Разрешить запуск при DEBUG=False')
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['force']:
+            raise CommandError('Бенчмарк создает пользователей в базе данных. Для запуска при DEBUG=False используйте --force')
+
+        cafe = Cafe.objects.filter(is_active=True).first()
+        if cafe is None:
+            raise CommandError('Нет активных кафе — бенчмарку нечего показывать')
+
+        # Удаляем только пользователей, созданных этим прогоном
+        bench_ids = (BENCH_TELEGRAM_ID_START, BENCH_TELEGRAM_ID_START + options['updates'] - 1)
+        existing = set(TelegramUser.objects.filter(telegram_id__range=bench_ids).values_list('telegram_id', flat=True))
+        try:
+            results, elapsed, api_calls = asyncio.run(self._run(cafe.id, options))
+        finally:
+            TelegramUser.objects.filter(telegram_id__range=bench_ids).exclude(telegram_id__in=existing).delete()
+
+        total = sum(len(latencies) for latencies in results.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано {total} обновлений за {elapsed:.2f} с: '
+            f'{total / elapsed:.1f} обновлений/с, вызовов Bot API: {api_calls}'
+        ))
+        for kind, latencies in results.items():
+            latencies.sort()
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            self.stdout.write(
+                f'  {kind:<14} n={len(latencies):<5} '
+                f'p50={statistics.median(latencies) * 1000:.1f}мс p95={p95 * 1000:.1f}мс'
+            )
+
+    async def _run(self, cafe_id, options):
+        request = FakeTelegramRequest(latency=options['api_latency_ms'] / 1000)
+        bot = TelegramBot(request=request)
+        application = bot.application
+        await application.initialize()
+
+        updates = [self._build_update(i, cafe_id, application.bot) for i in range(options['updates'])]
+        results = {}
+        semaphore = asyncio.Semaphore(options['concurrency'])
+
+        async def process(kind, update):
+            async with semaphore:
+                started = time.perf_counter()
+                await application.process_update(update)
+                results.setdefault(kind, []).append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        try:
+            await asyncio.gather(*(process(kind, update) for kind, update in updates))
+        finally:
+            await application.shutdown()
+        return results, time.perf_counter() - started, request.calls
+
+    def _build_update(self, i, cafe_id, bot):
+        """Синтетическое обновление: /start, список кафе или карточка кафе"""
+        user = {'id': BENCH_TELEGRAM_ID_START + i, 'is_bot': False,
+                'first_name': f'Bench {i}', 'username': f'bench_{i}'}
+        chat = {'id': user['id'], 'type': 'private'}
+        message = {'message_id': i + 1, 'date': int(time.time()), 'chat': chat, 'from': user}
+
+        kind = ('start', 'show_cafes', 'cafe_details')[i % 3]
+        if kind == 'start':
+            data = {'update_id': i, 'message': {
+                **message, 'text': '/start',
+                'entities': [{'type': 'bot_command', 'offset': 0, 'length': 6}],
+            }}
+        else:
+            callback_data = 'show_cafes' if kind == 'show_cafes' else f'cafe_{cafe_id}'
+            data = {'update_id': i, 'callback_query': {
+                'id': str(i), 'from': user, 'chat_instance': str(i),
+                'message': {**message, 'from': BOT_USER, 'text': 'menu'},
+                'data': callback_data,
+            }}
+        return kind, Update.de_json(data, bot)
@@ -0,0 +1,49 @@
+import asyncio
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+from telegram import Bot
+from telegram_bot.broadcast import BroadcastSender, broadcast_recipients, GLOBAL_RATE
+
+
+class Command(BaseCommand):
+    """Массовая рассылка сообщения пользователям клиентского бота"""
+    help = 'Рассылка сообщения всем активным пользователям Telegram с учетом лимитов Bot API'
+
+    def add_arguments(self, parser):
+        parser.add_argument('text', help='Текст сообщения')
+        parser.add_argument('--parse-mode', choices=['Markdown', 'MarkdownV2', 'HTML'],
+                            help='Режим разметки сообщения')
+        parser.add_argument('--rate', type=float, default=GLOBAL_RATE,
+                            help=f'Сообщений в секунду (по умолчанию {GLOBAL_RATE})')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Только посчитать получателей')
+
+    def handle(self, *args, **options):
+        recipients = broadcast_recipients()
+        total = recipients.count()
+        self.stdout.write(f'Получателей: {total}')
+        if options['dry_run'] or not total:
+            return
+
+        if not settings.TELEGRAM_BOT_TOKEN:
+            raise CommandError('TELEGRAM_BOT_TOKEN не установлен в настройках')
+
+        report = asyncio.run(self._broadcast(options))
+        self.stdout.write(self.style.SUCCESS(
+            f'Отправлено {report.sent} из {total} за {report.elapsed:.1f} с ({report.rate:.1f} сообщений/с)'
+        ))
+        if report.blocked:
+            self.stdout.write(self.style.WARNING(f'Заблокировали бота и деактивированы: {report.blocked}'))
+        if report.retries:
+            self.stdout.write(self.style.WARNING(f'Повторов после 429: {report.retries}'))
+        if report.failed:
+            self.stdout.write(self.style.ERROR(f'Ошибок отправки: {report.failed}'))
+
+    async def _broadcast(self, options):
+        message_kwargs = {}
+        if options['parse_mode']:
+            message_kwargs['parse_mode'] = options['parse_mode']
+
+        async with Bot(token=settings.TELEGRAM_BOT_TOKEN) as bot:
+            sender = BroadcastSender(bot, rate=options['rate'])
+            return await sender.send(options['text'], **message_kwargs)
@@ -218,6 +218,13 @@ class Command(BaseCommand):
     help = 'Запуск Telegram Bot'
     
     def handle(self, *args, **options):
+        from telegram_bot.webhook import is_webhook_mode
+        if is_webhook_mode():
+            self.stdout.write(self.style.WARNING(
+                'TELEGRAM_BOT_MODE=webhook: обновления принимает ASGI-приложение, polling не запускается'
+            ))
+            return
+        
         try:
             self.stdout.write("Запуск Telegram Bot...")
             bot = TelegramBot()
@@ -0,0 +1,43 @@
+import asyncio
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+from telegram import Bot
+from telegram_bot.webhook import BOTS, get_webhook_url
+
+
+class Command(BaseCommand):
+    """Регистрация (или удаление) webhook'ов клиентского бота и бота персонала"""
+    help = 'Настройка webhook-режима Telegram ботов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--delete', action='store_true',
+                            help='Удалить webhook\'и (для возврата в режим polling)')
+
+    def handle(self, *args, **options):
+        if not options['delete']:
+            if not settings.TELEGRAM_WEBHOOK_URL:
+                raise CommandError('TELEGRAM_WEBHOOK_URL не установлен в настройках')
+            if not settings.TELEGRAM_WEBHOOK_SECRET:
+                raise CommandError('TELEGRAM_WEBHOOK_SECRET не установлен в настройках')
+
+        asyncio.run(self._configure(options['delete']))
+
+    async def _configure(self, delete):
+        for bot_name, (token_setting, _) in BOTS.items():
+            token = getattr(settings, token_setting)
+            if not token:
+                self.stdout.write(self.style.WARNING(f'{token_setting} не установлен, бот {bot_name} пропущен'))
+                continue
+
+            async with Bot(token=token) as bot:
+                if delete:
+                    await bot.delete_webhook()
+                    self.stdout.write(self.style.SUCCESS(f'Webhook бота {bot_name} удален'))
+                else:
+                    url = get_webhook_url(bot_name)
+                    await bot.set_webhook(
+                        url=url,
+                        secret_token=settings.TELEGRAM_WEBHOOK_SECRET,
+                        drop_pending_updates=True,
+                    )
+                    self.stdout.write(self.style.SUCCESS(f'Webhook бота {bot_name}: {url}'))
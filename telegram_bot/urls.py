@@ -0,0 +1,11 @@
+"""
+URL маршруты для webhook'ов Telegram ботов
+"""
+from django.urls import path
+from . import views
+
+app_name = 'telegram_bot'
+
+urlpatterns = [
+    path('webhook/<str:bot_name>/', views.telegram_webhook, name='webhook'),
+]
@@ -1,3 +1,47 @@
-from django.shortcuts import render
+"""
+Views для приема обновлений Telegram в webhook-режиме
+"""
+import hmac
+import json
+import logging
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseForbidden, HttpResponseNotFound
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from telegram_bot.webhook import BOTS, is_webhook_mode, webhook_applications
 
-# Create your views here.
+logger = logging.getLogger(__name__)
+
+
+@csrf_exempt
+@require_POST
+async def telegram_webhook(request, bot_name):
+    """Прием обновления от Telegram для клиентского бота или бота персонала"""
+    if not is_webhook_mode() or bot_name not in BOTS:
+        return HttpResponseNotFound()
+
+    if not isinstance(request, ASGIRequest):
+        # Application бота работает только в event loop ASGI-процесса.
+        # 503 — Telegram повторит доставку обновления позже
+        logger.error(f"Webhook '{bot_name}': обновление получено не под ASGI")
+        return HttpResponse(status=503)
+
+    # Telegram присылает secret_token, заданный при setWebhook, в этом заголовке
+    secret = request.headers.get('X-Telegram-Bot-Api-Secret-Token', '')
+    if not settings.TELEGRAM_WEBHOOK_SECRET or not hmac.compare_digest(secret, settings.TELEGRAM_WEBHOOK_SECRET):
+        logger.warning(f"Webhook '{bot_name}': неверный secret token")
+        return HttpResponseForbidden()
+
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return HttpResponseBadRequest("Invalid JSON")
+
+    try:
+        await webhook_applications.feed_update(bot_name, data)
+    except Exception as e:
+        # Отвечаем 200, чтобы Telegram не повторял доставку сломанного обновления
+        logger.error(f"Ошибка обработки обновления webhook '{bot_name}': {e}")
+
+    return HttpResponse("OK")
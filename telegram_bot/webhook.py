@@ -0,0 +1,81 @@
+"""
+Webhook-режим Telegram ботов
+
+В webhook-режиме обновления обоих ботов (клиентского и бота персонала)
+принимаются async view под greatideas.asgi и передаются в очередь
+обновлений соответствующего telegram.ext.Application. Отдельные процессы
+run_bot / run_staff_bot с long polling в этом режиме не нужны.
+
+Application живет в event loop ASGI-процесса. Под WSGI у каждого запроса
+свой временный event loop, поэтому там обновления не принимаются.
+"""
+import asyncio
+import logging
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _build_customer_application():
+    from telegram_bot.management.commands.run_bot import TelegramBot
+    return TelegramBot().application
+
+
+def _build_staff_application():
+    from orders.management.commands.run_staff_bot import StaffBot
+    return StaffBot().application
+
+
+# Имя бота в URL webhook'а -> (настройка с токеном, фабрика Application)
+BOTS = {
+    'customer': ('TELEGRAM_BOT_TOKEN', _build_customer_application),
+    'staff': ('STAFF_BOT_TOKEN', _build_staff_application),
+}
+
+
+def is_webhook_mode() -> bool:
+    """Включен ли webhook-режим для ботов"""
+    return settings.TELEGRAM_BOT_MODE == 'webhook'
+
+
+def get_webhook_url(bot_name: str) -> str:
+    """Публичный URL webhook'а для бота"""
+    return f"{settings.TELEGRAM_WEBHOOK_URL.rstrip('/')}/{bot_name}/"
+
+
+class WebhookApplications:
+    """Лениво создает и запускает Application для каждого бота в event loop ASGI-процесса"""
+
+    def __init__(self):
+        self._applications = {}
+        self._lock = None
+
+    async def get(self, bot_name: str):
+        """Получить запущенный Application бота"""
+        application = self._applications.get(bot_name)
+        if application is not None:
+            return application
+
+        # Блокировка создается в event loop ASGI-процесса, а не при импорте модуля
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            application = self._applications.get(bot_name)
+            if application is None:
+                _, factory = BOTS[bot_name]
+                application = factory()
+                await application.initialize()
+                await application.start()
+                self._applications[bot_name] = application
+                logger.info(f"Telegram бот '{bot_name}' запущен в webhook-режиме")
+        return application
+
+    async def feed_update(self, bot_name: str, data: dict):
+        """Передать обновление от Telegram в очередь Application"""
+        from telegram import Update
+
+        application = await self.get(bot_name)
+        await application.update_queue.put(Update.de_json(data, application.bot))
+
+
+webhook_applications = WebhookApplications()
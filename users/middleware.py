@@ -2,6 +2,7 @@
 Middleware для автоматической авторизации через Telegram WebApp
 """
 import json
+import logging
 import urllib.parse
 from django.contrib.auth import login
 from django.contrib.auth.models import User
@@ -9,6 +10,8 @@ from django.http import JsonResponse
 from users.models import TelegramUser
 from users.telegram_auth import get_telegram_auth
 
+logger = logging.getLogger(__name__)
+
 
 class TelegramWebAppAuthMiddleware:
     """
@@ -122,5 +125,5 @@ class TelegramWebAppAuthMiddleware:
         except Exception as e:
             # В случае ошибки просто не авторизуем пользователя
             # Логируем ошибку для отладки
-            print(f"Ошибка автоавторизации Telegram: {e}")
+            logger.exception("Ошибка автоавторизации Telegram: %s", e)
             pass
\ No newline at end of file
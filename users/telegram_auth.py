@@ -1,11 +1,14 @@
 import hashlib
 import hmac
 import json
+import logging
 import urllib.parse
 from datetime import datetime, timedelta
 from django.conf import settings
 from typing import Dict, Optional
 
+logger = logging.getLogger(__name__)
+
 
 class TelegramWebAppAuth:
     """Класс для работы с авторизацией через Telegram Web App"""
@@ -81,7 +84,7 @@ class TelegramWebAppAuth:
             return {}
             
         except Exception as e:
-            print(f"Ошибка валидации Telegram Web App данных: {e}")
+            logger.warning("Ошибка валидации Telegram Web App данных: %s", e)
             return None
     
     def create_auth_url(self, webapp_url: str) -> str:
@@ -1,4 +1,5 @@
 import json
+import logging
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse
@@ -10,6 +11,8 @@ from orders.models import Order
 from users.models import TelegramUser
 from .telegram_auth import get_telegram_auth
 
+logger = logging.getLogger(__name__)
+
 def profile(request):
     """
     Страница профиля пользователя с историей заказов
@@ -33,10 +36,10 @@ def profile(request):
             telegram_user = TelegramUser.objects.filter(user=request.user).first()
             
             if telegram_user:
-                orders = Order.objects.filter(user=telegram_user).order_by('-created_at')[:10]
+                orders = Order.objects.filter(user=telegram_user).select_related('cafe').order_by('-created_at')[:10]
         except Exception as e:
             # Если возникла ошибка, просто не показываем заказы
-            print(f"Error fetching orders: {e}")
+            logger.exception("Ошибка получения заказов профиля: %s", e)
             orders = []
     
     context = {
@@ -138,5 +141,5 @@ def telegram_auth_callback(request):
     except json.JSONDecodeError:
         return JsonResponse({'error': 'Неверный формат JSON'}, status=400)
     except Exception as e:
-        print(f"Ошибка авторизации Telegram: {e}")
+        logger.exception("Ошибка авторизации Telegram: %s", e)
         return JsonResponse({'error': 'Внутренняя ошибка сервера'}, status=500)